@@ -0,0 +1,234 @@
+import bisect
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from text_analysis import STOPWORDS, PhraseAutomaton, TextAnalysis, analyze_text, normalize_word
+
+# Phrase labels
+TASK = "task"                  # Starts a task; a capitalized word before it is the owner
+ASSIGNMENT = "assignment"      # A commitment ("mike will ..."); the word before it is the owner
+ASSIGNEE = "assignee"          # The word after it is the owner ("assigned to sarah")
+DEADLINE = "deadline"          # A due date ("by friday")
+NOTICE = "notice"              # Polite phrasing that asks for nothing ("please note")
+
+MAX_ACTION_WORDS = 14          # Longest action item kept, counted from the owner or cue
+
+TASK_PHRASES = (
+    "need to", "needs to", "have to", "has to", "got to", "should", "must", "todo", "to-do",
+    "action item", "follow up", "follow-up", "make sure", "remember to", "don't forget", "do not forget",
+    "please", "let's", "next step", "next steps", "take care of", "is responsible for", "are responsible for",
+    "required to", "is required", "deliverable", "i'll", "we'll", "you'll", "they'll", "he'll", "she'll"
+)
+ASSIGNMENT_PHRASES = (
+    "will", "will be handling", "is going to", "are going to", "volunteered to", "agreed to",
+    "offered to", "is handling", "is taking", "owns"
+)
+ASSIGNEE_PHRASES = ("assigned to", "owned by", "owner", "handled by", "ask", "asked")
+NOTICE_PHRASES = ("please note", "please see", "please find", "please be aware", "please keep in mind")
+
+DEADLINE_PREFIXES = ("by", "before", "until", "due", "no later than", "on or before")
+DEADLINE_TIMES = (
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+    "mon", "tue", "wed", "thu", "fri", "tomorrow", "today", "tonight", "noon", "eod", "eow", "eom",
+    "end of day", "end of the day", "end of week", "end of the week", "end of month", "end of the month",
+    "end of quarter", "end of the quarter", "next week", "next month", "next quarter", "the weekend",
+    "the end of the week", "q1", "q2", "q3", "q4", "january", "february", "march", "april", "may",
+    "june", "july", "august", "september", "october", "november", "december"
+)
+STANDALONE_DEADLINES = (
+    "asap", "tomorrow", "tonight", "next week", "next month", "end of day", "end of the day",
+    "end of week", "end of the week", "this week", "this afternoon", "later today"
+)
+
+# Pronoun subjects make a real task but name nobody in particular
+PRONOUN_OWNERS = frozenset(("i", "we", "you", "they", "he", "she", "someone", "everyone", "team"))
+# A subject after one of these is a thing ("the weather will ..."), not a person
+DETERMINERS = frozenset((
+    "a", "an", "the", "this", "these", "those", "my", "our", "your", "their", "its", "his", "her",
+    "some", "any", "each", "every", "no"
+))
+# Capitalized words that are never owners
+NAMELESS_WORDS = frozenset(DEADLINE_TIMES + ("action", "item", "next", "note", "notes", "todo", "please"))
+
+OWNER_BEFORE_RE = re.compile(r"([A-Za-z][\w'-]*)[^\w]*$")
+OWNER_AFTER_RE = re.compile(r"\W*([A-Za-z][\w'-]*)")
+# "Action item: Priya to send the deck" names the owner right after the cue
+LABELED_OWNER_RE = re.compile(r"[^\S\n]*[:-]?[^\S\n]*([A-Z][\w'-]*)\s+to\b")
+SPEAKER_RE = re.compile(r"([A-Za-z][\w.'-]*):\s+")
+NAME_RE = re.compile(r"\b[A-Z][a-z][\w'-]*")
+
+
+def build_action_phrases() -> Dict[str, str]:
+    """Return the default phrase vocabulary, mapping each phrase to its label"""
+    phrases = {}
+    for phrase in TASK_PHRASES:
+        phrases[phrase] = TASK
+    for phrase in ASSIGNMENT_PHRASES:
+        phrases[phrase] = ASSIGNMENT
+    for phrase in ASSIGNEE_PHRASES:
+        phrases[phrase] = ASSIGNEE
+    for phrase in NOTICE_PHRASES:
+        phrases[phrase] = NOTICE
+    for prefix in DEADLINE_PREFIXES:
+        for time_phrase in DEADLINE_TIMES:
+            phrases[f"{prefix} {time_phrase}"] = DEADLINE
+    for phrase in STANDALONE_DEADLINES:
+        phrases[phrase] = DEADLINE
+    return phrases
+
+
+ACTION_AUTOMATON = PhraseAutomaton(build_action_phrases())
+
+
+def _known_names(text: str, analysis: TextAnalysis) -> Set[str]:
+    """Return the lowercased speaker labels and capitalized words seen inside sentences
+
+    A capitalized word that opens a sentence may be any word ("Release will
+    include ..."), so only the words after it are taken as names.
+    """
+    names = set()
+    for start, end in analysis.sentences:
+        speaker = SPEAKER_RE.match(text, start, end)
+        if speaker is not None:
+            names.add(speaker.group(1).lower())
+            start = speaker.end()
+        for match in NAME_RE.finditer(text, start, end):
+            if text[start:match.start()].strip():
+                names.add(match.group().lower())
+    return names - STOPWORDS - NAMELESS_WORDS
+
+
+def _looks_like_name(word: str, opens_sentence: bool, names: Set[str]) -> bool:
+    """Return whether word reads as a person's name rather than a noun that starts a sentence"""
+    if word.lower() in names:
+        return True
+    # Titlecase only: "API will change" is not about a person
+    return not opens_sentence and word[0].isupper() and not word.isupper() and word.lower() not in NAMELESS_WORDS
+
+
+def _owner_before(text: str, sentence_start: int, cue_start: int, label: str,
+                  names: Set[str]) -> Tuple[Optional[str], Optional[int], bool]:
+    """Return (owner, owner start, keep) for the word just before a cue"""
+    match = OWNER_BEFORE_RE.search(text, sentence_start, cue_start)
+    if match is None:
+        return None, None, label == TASK
+
+    speaker = SPEAKER_RE.match(text, sentence_start, cue_start)
+    subject_start = sentence_start
+    if speaker is not None:
+        if match.start(1) == sentence_start:
+            # "Sarah: I'll update the roadmap" is hers; "Sarah: please send it" asks someone else
+            owner = speaker.group(1).capitalize() if normalize_word(text[cue_start:cue_start + 4]) == "i'll" else None
+            return owner, None, label == TASK
+        subject_start = speaker.end()
+
+    word = match.group(1)
+    normalized = normalize_word(word)
+    if normalized in PRONOUN_OWNERS:
+        # "Sarah: I will send it" is the speaker's commitment
+        owner = speaker.group(1).capitalize() if speaker is not None and normalized == "i" else None
+        return owner, match.start(1), True
+    if normalized in STOPWORDS:
+        # "it will rain" is not a commitment; "it should be reviewed" still is a task
+        return None, None, label == TASK
+    previous = OWNER_BEFORE_RE.search(text, subject_start, match.start(1))
+    previous_word = normalize_word(previous.group(1)) if previous is not None else None
+    if previous_word in DETERMINERS:
+        # "The weather will be nice" is a forecast, not a commitment
+        return None, None, label == TASK
+    if _looks_like_name(word, previous is None, names):
+        return word.capitalize(), match.start(1), True
+    if previous is None or previous_word in STOPWORDS:
+        if word[0].islower():
+            # Speech-to-text writes names in lowercase: "mike will handle the design phase"
+            return word.capitalize(), match.start(1), True
+        # Could be a name or any other word opening the sentence: keep the item, not the owner
+        return None, match.start(1), True
+    # "the project budget will be reviewed": the word is the end of a noun phrase
+    return None, None, label == TASK
+
+
+def extract_action_items(text: str, analysis: Optional[TextAnalysis] = None,
+                         automaton: PhraseAutomaton = ACTION_AUTOMATON) -> List[Dict]:
+    """Find action items in text, with the owner and deadline when they are mentioned
+
+    analysis must have been produced with the same automaton; it is built here
+    when not given. Returns a list of {"text", "owner", "deadline"} dicts in
+    reading order.
+    """
+    if analysis is None:
+        analysis = analyze_text(text, automaton)
+    names = _known_names(text, analysis)
+
+    # Group keyword matches by the sentence they fall in
+    sentence_starts = [start for start, _ in analysis.sentences]
+    by_sentence: Dict[int, List[Tuple[int, int, str]]] = {}
+    for match in analysis.keyword_matches:
+        index = bisect.bisect_right(sentence_starts, match[0]) - 1
+        if index >= 0:
+            by_sentence.setdefault(index, []).append(match)
+
+    items = []
+    seen = set()
+    for index in sorted(by_sentence):
+        sentence_start, sentence_end = analysis.sentences[index]
+        matches = sorted(by_sentence[index])
+        deadlines = [match for match in matches if automaton.labels[match[2]] == DEADLINE]
+        notices = {match[0] for match in matches if automaton.labels[match[2]] == NOTICE}
+
+        # Adjacent cues ("need to follow up") describe the same task
+        cues = []
+        for start, end, phrase in matches:
+            label = automaton.labels[phrase]
+            if label not in (TASK, ASSIGNMENT, ASSIGNEE) or start in notices:
+                continue
+            if cues and not text[cues[-1]["end"]:start].strip():
+                cues[-1]["end"] = max(cues[-1]["end"], end)
+                continue
+            cues.append({"start": start, "end": end, "label": label})
+
+        clauses = []
+        for cue in cues:
+            if cue["label"] == ASSIGNEE:
+                # "... assigned to priya" names the owner of the task before it
+                match = OWNER_AFTER_RE.match(text, cue["end"], sentence_end)
+                owner = None
+                if match and _looks_like_name(match.group(1), False, names):
+                    owner = match.group(1).capitalize()
+                if clauses:
+                    clauses[-1]["owner"] = clauses[-1]["owner"] or owner
+                else:
+                    clauses.append({"start": sentence_start, "end": cue["end"], "owner": owner})
+                continue
+
+            owner, owner_start, keep = _owner_before(text, sentence_start, cue["start"], cue["label"], names)
+            if not keep:
+                continue
+            labeled = LABELED_OWNER_RE.match(text, cue["end"], sentence_end)
+            if cue["label"] == TASK and labeled is not None:
+                owner = owner or labeled.group(1)
+            clause_start = owner_start if owner_start is not None else cue["start"]
+            # A bare label such as "Action item:" only introduces the task that follows
+            if clauses and not text[clauses[-1]["end"]:clause_start].strip(" :-\t"):
+                label_owner = clauses.pop()["owner"]
+                owner = owner or label_owner
+            clauses.append({"start": clause_start, "end": cue["end"], "owner": owner})
+
+        for position, clause in enumerate(clauses):
+            limit = clauses[position + 1]["start"] if position + 1 < len(clauses) else sentence_end
+            end = limit
+            deadline = None
+            for start, deadline_end, _ in deadlines:
+                if clause["start"] <= start < limit:
+                    deadline = text[start:deadline_end].strip(".,;:!?")
+                    end = deadline_end
+                    break
+
+            words = text[clause["start"]:end].split()[:MAX_ACTION_WORDS]
+            action = " ".join(words).rstrip(".,;:!?")
+            key = action.lower()
+            if not action or key in seen:
+                continue
+            seen.add(key)
+            items.append({"text": action[0].upper() + action[1:], "owner": clause["owner"], "deadline": deadline})
+    return items
@@ -0,0 +1,342 @@
+import abc
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import AsyncIterator, Dict, List, Optional, Union
+
+from degeneration import DegenerationDetector, find_degeneration
+
+logger = logging.getLogger(__name__)
+
+# Local inference defaults
+LOCAL_MODELS_DIR = os.environ.get("LOCAL_MODELS_DIR", "models")  # One sub-directory per model name
+DEFAULT_MAX_BATCH_SIZE = 8       # Prompts combined into one forward pass
+DEFAULT_MAX_BATCH_DELAY = 0.01   # Seconds to wait for more prompts before running a batch
+DEFAULT_MAX_POSITIONS = 1024     # Context size when the model config does not say
+DEFAULT_MAX_NEW_TOKENS = 300     # Output budget when a request does not set one
+
+
+class BackendError(Exception):
+    """Raised when an inference backend cannot produce a result"""
+
+
+class InferenceBackend(abc.ABC):
+    """Interface for turning an Inference API style payload into generated text
+
+    generate() returns the same shapes as the hosted API: a list like
+    [{"generated_text": ...}] on success or {"error": ...} on failure.
+    """
+
+    name = "backend"
+
+    @property
+    def identity(self) -> str:
+        """Name of what generates the text, for cache keys"""
+        return self.name
+
+    @abc.abstractmethod
+    async def generate(self, payload: Dict) -> Union[List[Dict], Dict]:
+        """Generate text for an Inference API style payload"""
+
+    async def stream(self, payload: Dict) -> AsyncIterator[str]:
+        """Yield generated text pieces; backends without streaming yield everything at once"""
+        result = await self.generate(payload)
+        if isinstance(result, dict) and "error" in result:
+            raise BackendError(result["error"])
+        yield result[0].get("generated_text", "")
+
+    def close(self):
+        """Release resources held by the backend"""
+
+
+def local_backend_available() -> bool:
+    """Return whether the optional torch/transformers dependencies are installed"""
+    try:
+        import torch  # noqa: F401
+        import transformers  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ByteTokenizer:
+    """Byte-level tokenizer for tiny test models, covering the subset of the transformers API we use"""
+
+    def __init__(self):
+        self.eos_token_id = 256
+        self.pad_token_id = 256
+        self.vocab_size = 257
+
+    def __call__(self, texts: List[str], return_tensors: str = "pt", padding: bool = True,
+                 truncation: bool = True, max_length: Optional[int] = None) -> Dict:
+        import torch
+
+        encoded = [list(text.encode("utf-8")) for text in texts]
+        if truncation and max_length:
+            encoded = [ids[-max_length:] for ids in encoded]
+        width = max(len(ids) for ids in encoded)
+
+        # Left padding, as decoder-only generation expects
+        input_ids = [[self.pad_token_id] * (width - len(ids)) + ids for ids in encoded]
+        attention_mask = [[0] * (width - len(ids)) + [1] * len(ids) for ids in encoded]
+        return {
+            "input_ids": torch.tensor(input_ids, dtype=torch.long),
+            "attention_mask": torch.tensor(attention_mask, dtype=torch.long)
+        }
+
+    def batch_decode(self, sequences, skip_special_tokens: bool = True) -> List[str]:
+        texts = []
+        for ids in sequences:
+            data = bytes(int(token) for token in ids if int(token) < 256)
+            texts.append(data.decode("utf-8", errors="ignore"))
+        return texts
+
+
+class _DegenerationStop:
+    """Generation stopping criterion that ends each sequence of a batch once it starts looping"""
+
+    def __init__(self, tokenizer, prompt_length: int, batch_size: int):
+        self.tokenizer = tokenizer
+        self.prompt_length = prompt_length
+        self.detectors = [DegenerationDetector() for _ in range(batch_size)]
+
+    def __call__(self, input_ids, scores, **kwargs):
+        import torch
+
+        if input_ids.shape[1] <= self.prompt_length:
+            return torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+        # Only the newest token of each sequence is decoded, so every step costs the same
+        pieces = self.tokenizer.batch_decode(input_ids[:, -1:], skip_special_tokens=True)
+        done = [detector.feed(piece) for detector, piece in zip(self.detectors, pieces)]
+        return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+    @property
+    def stopped(self) -> int:
+        return sum(1 for detector in self.detectors if detector.degenerated)
+
+
+class _BudgetStop:
+    """Generation stopping criterion that ends each sequence of a batch at its own max_new_tokens"""
+
+    def __init__(self, prompt_length: int, budgets: List[int]):
+        self.prompt_length = prompt_length
+        self.budgets = budgets
+
+    def __call__(self, input_ids, scores, **kwargs):
+        import torch
+
+        generated = input_ids.shape[1] - self.prompt_length
+        return torch.tensor([generated >= budget for budget in self.budgets], dtype=torch.bool,
+                            device=input_ids.device)
+
+
+class _PendingRequest:
+    def __init__(self, prompt: str, parameters: Dict, loop: asyncio.AbstractEventLoop, future: asyncio.Future):
+        self.prompt = prompt
+        self.parameters = parameters
+        # Output budgets differ per chunk, so they do not split a batch; see _run_group
+        self.parameters_key = json.dumps({key: value for key, value in parameters.items() if key != "max_new_tokens"},
+                                         sort_keys=True)
+        self.max_new_tokens = parameters.get("max_new_tokens", DEFAULT_MAX_NEW_TOKENS)
+        self.loop = loop
+        self.future = future
+
+
+def _resolve(future: asyncio.Future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+class LocalModelBackend(InferenceBackend):
+    """Runs a causal language model on the local CPU, batching concurrent requests
+
+    The model stays loaded for the lifetime of the backend. Requests that
+    arrive within max_batch_delay of each other and share sampling
+    parameters are padded into a single generate() call on a worker thread,
+    so the event loop never blocks on model inference. Their output budgets
+    may differ; each sequence stops at its own max_new_tokens.
+    """
+
+    name = "local"
+
+    def __init__(self, model_name: str, model_dir: Optional[str] = None,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_batch_delay: float = DEFAULT_MAX_BATCH_DELAY,
+                 model=None, tokenizer=None):
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+
+        if model is None or tokenizer is None:
+            model, tokenizer = self._load(model_dir or os.path.join(LOCAL_MODELS_DIR, model_name))
+        self.model = model
+        self.tokenizer = tokenizer
+        self.model.eval()
+
+        config = getattr(self.model, "config", None)
+        self.max_positions = (getattr(config, "n_positions", None)
+                              or getattr(config, "max_position_embeddings", None)
+                              or DEFAULT_MAX_POSITIONS)
+
+        self.batches_run = 0
+        self.requests_served = 0
+        self.stopped_early = 0
+        self._requests = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name=f"local-backend-{model_name}", daemon=True)
+        self._worker.start()
+
+    @property
+    def identity(self) -> str:
+        return f"{self.name}:{self.model_name}"
+
+    @staticmethod
+    def _load(model_dir: str):
+        try:
+            from transformers import AutoModelForCausalLM, AutoTokenizer
+        except ImportError as e:
+            raise BackendError("The local backend needs the optional 'torch' and 'transformers' packages") from e
+
+        if not os.path.isdir(model_dir):
+            raise BackendError(f"Model directory not found: {model_dir}")
+
+        logger.info(f"Loading local model from {model_dir}")
+        tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
+        model = AutoModelForCausalLM.from_pretrained(model_dir, local_files_only=True)
+
+        # GPT-2 style tokenizers ship without a pad token
+        if tokenizer.pad_token_id is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        tokenizer.padding_side = "left"
+        tokenizer.truncation_side = "left"
+        return model, tokenizer
+
+    @classmethod
+    def tiny_random(cls, model_name: str = "tiny-random-gpt2", seed: int = 0, **kwargs) -> "LocalModelBackend":
+        """Build a backend around a tiny randomly initialized GPT-2; needs no downloads"""
+        import torch
+        from transformers import GPT2Config, GPT2LMHeadModel
+
+        tokenizer = ByteTokenizer()
+        config = GPT2Config(
+            vocab_size=tokenizer.vocab_size,
+            n_positions=512,
+            n_embd=32,
+            n_layer=2,
+            n_head=2,
+            bos_token_id=tokenizer.eos_token_id,
+            eos_token_id=tokenizer.eos_token_id,
+            pad_token_id=tokenizer.pad_token_id
+        )
+        torch.manual_seed(seed)
+        return cls(model_name, model=GPT2LMHeadModel(config), tokenizer=tokenizer, **kwargs)
+
+    async def generate(self, payload: Dict) -> Union[List[Dict], Dict]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._requests.put(_PendingRequest(payload["inputs"], payload.get("parameters", {}), loop, future))
+        return await future
+
+    def _run(self):
+        while True:
+            first = self._requests.get()
+            if first is None:
+                return
+
+            # Collect whatever else arrives shortly after the first request
+            batch = [first]
+            batch_deadline = time.monotonic() + self.max_batch_delay
+            while len(batch) < self.max_batch_size:
+                remaining = batch_deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._requests.put(None)
+                    break
+                batch.append(request)
+
+            # Only requests with identical sampling parameters can share a forward pass
+            groups = {}
+            for request in batch:
+                groups.setdefault(request.parameters_key, []).append(request)
+            for group in groups.values():
+                self._run_group(group)
+
+    def _run_group(self, group: List[_PendingRequest]):
+        try:
+            # The batch runs to the largest budget and each result is cut back to its own
+            budgets = [request.max_new_tokens for request in group]
+            parameters = {**group[0].parameters, "max_new_tokens": max(budgets)}
+            texts = self._generate_texts([request.prompt for request in group], parameters, budgets)
+            results = [[{"generated_text": text}] for text in texts]
+        except Exception as e:
+            logger.error(f"Local generation failed for {self.model_name}: {e}")
+            results = [{"error": f"Local generation failed: {str(e)}"}] * len(group)
+
+        self.batches_run += 1
+        self.requests_served += len(group)
+        for request, result in zip(group, results):
+            request.loop.call_soon_threadsafe(_resolve, request.future, result)
+
+    def _generate_texts(self, prompts: List[str], parameters: Dict, budgets: Optional[List[int]] = None) -> List[str]:
+        import torch
+
+        max_new_tokens = parameters.get("max_new_tokens", DEFAULT_MAX_NEW_TOKENS)
+        budgets = budgets or [max_new_tokens] * len(prompts)
+        max_prompt_tokens = max(1, self.max_positions - max_new_tokens)
+        encoded = self.tokenizer(
+            prompts,
+            return_tensors="pt",
+            padding=True,
+            truncation=True,
+            max_length=max_prompt_tokens
+        )
+
+        generate_kwargs = {
+            "max_new_tokens": max_new_tokens,
+            "do_sample": parameters.get("do_sample", False),
+            "repetition_penalty": parameters.get("repetition_penalty", 1.0),
+            "pad_token_id": self.tokenizer.pad_token_id
+        }
+        if generate_kwargs["do_sample"]:
+            generate_kwargs["temperature"] = parameters.get("temperature", 1.0)
+            generate_kwargs["top_p"] = parameters.get("top_p", 1.0)
+
+        # Sequences that start repeating themselves stop early instead of using up max_new_tokens
+        prompt_length = encoded["input_ids"].shape[1]
+        degeneration_stop = _DegenerationStop(self.tokenizer, prompt_length, len(prompts))
+        generate_kwargs["stopping_criteria"] = [degeneration_stop, _BudgetStop(prompt_length, budgets)]
+
+        with torch.no_grad():
+            output = self.model.generate(**encoded, **generate_kwargs)
+
+        new_tokens = [row[prompt_length:prompt_length + budget] for row, budget in zip(output, budgets)]
+        texts = self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+        if degeneration_stop.stopped:
+            self.stopped_early += degeneration_stop.stopped
+            logger.info(f"Stopped {degeneration_stop.stopped} looping generation(s) early on {self.model_name}")
+            # Keep only the text before the loop
+            texts = [text[:find_degeneration(text)] for text in texts]
+        if parameters.get("return_full_text", True):
+            texts = [prompt + text for prompt, text in zip(prompts, texts)]
+        return texts
+
+    def stats(self) -> Dict:
+        """Return batching and early-stop counters"""
+        return {
+            "requests": self.requests_served,
+            "batches": self.batches_run,
+            "stopped_early": self.stopped_early,
+            "average_batch_size": self.requests_served / self.batches_run if self.batches_run else 0.0
+        }
+
+    def close(self):
+        self._requests.put(None)
+        self._worker.join(timeout=5)
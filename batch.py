@@ -0,0 +1,288 @@
+"""Headless bulk conversion of text files into Notion-style notes.
+
+Converts a directory of .txt/.md files, or a JSONL file of {"id", "text"}
+records, into one markdown file per input. Finished items are recorded in a
+checkpoint file inside the output directory, so an interrupted run picks up
+where it stopped.
+
+Usage:
+    python batch.py INPUT OUTPUT_DIR [--model gpt2] [--parallel 8] [--engine offline]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from main import ENGINE_AI, ENGINE_HYBRID, ENGINE_OFFLINE, AsyncNotionNotesConverter, DEFAULT_MAX_CONCURRENCY
+from notes_cache import NotesCache
+from offline_engine import DEFAULT_WINDOW_CHARS, stream_offline_notes
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARALLEL_ITEMS = 8                # Inputs converted at the same time
+CHECKPOINT_FILENAME = ".checkpoint.jsonl" # Lives in the output directory
+INPUT_EXTENSIONS = (".txt", ".md")
+STREAM_INPUT_BYTES = DEFAULT_WINDOW_CHARS # Larger files built offline are streamed, never read whole
+
+
+async def convert_many_async(converter: AsyncNotionNotesConverter, texts: List[str],
+                             max_parallel: int = DEFAULT_PARALLEL_ITEMS,
+                             on_progress: Optional[Callable[[int, int], None]] = None) -> List[str]:
+    """Convert texts with at most max_parallel conversions in flight, keeping input order"""
+    semaphore = asyncio.Semaphore(max_parallel)
+    completed = 0
+
+    async def convert(text: str) -> str:
+        nonlocal completed
+        async with semaphore:
+            notes = await converter.convert_to_notes(text)
+        completed += 1
+        if on_progress:
+            on_progress(completed, len(texts))
+        return notes
+
+    return await asyncio.gather(*(convert(text) for text in texts))
+
+
+def convert_many(texts: List[str], api_token: str, model_name: str = "gpt2",
+                 max_parallel: int = DEFAULT_PARALLEL_ITEMS,
+                 on_progress: Optional[Callable[[int, int], None]] = None,
+                 **converter_options) -> List[str]:
+    """Convert many texts to notes without Streamlit; returns notes in input order"""
+    async def run() -> List[str]:
+        async with AsyncNotionNotesConverter(api_token, model_name, **converter_options) as converter:
+            return await convert_many_async(converter, texts, max_parallel, on_progress)
+
+    return asyncio.run(run())
+
+
+def iter_inputs(input_path: str) -> Iterator[Tuple[str, str]]:
+    """Yield (item_id, text) pairs from a directory of text files or a JSONL file"""
+    for item_id, file_path, text in _iter_sources(input_path):
+        if file_path is not None:
+            with open(file_path, encoding="utf-8") as f:
+                text = f.read()
+        yield item_id, text
+
+
+def _iter_sources(input_path: str) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    """Yield (item_id, file_path, text) for every input; files are left unread and their text is None"""
+    if os.path.isdir(input_path):
+        for root, dirs, files in os.walk(input_path):
+            dirs.sort()
+            for filename in sorted(files):
+                if not filename.endswith(INPUT_EXTENSIONS):
+                    continue
+                file_path = os.path.join(root, filename)
+                yield os.path.splitext(os.path.relpath(file_path, input_path))[0], file_path, None
+        return
+
+    with open(input_path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                logger.error(f"Skipping line {line_number} of {input_path}: {e}")
+                continue
+            if not isinstance(record, dict) or not isinstance(record.get("text"), str):
+                logger.error(f"Skipping line {line_number} of {input_path}: expected an object with a 'text' field")
+                continue
+            yield str(record.get("id", f"item-{line_number:06d}")), None, record["text"]
+
+
+def load_checkpoint(checkpoint_path: str) -> set:
+    """Return the ids of items recorded as finished"""
+    finished = set()
+    if not os.path.exists(checkpoint_path):
+        return finished
+
+    with open(checkpoint_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                finished.add(json.loads(line)["id"])
+            except (ValueError, KeyError):
+                # A crash mid-write can leave a truncated last line
+                continue
+    return finished
+
+
+def output_path_for(output_dir: str, item_id: str) -> str:
+    """Return OUTPUT_DIR/<item_id>.md, refusing ids that would point outside output_dir"""
+    root = os.path.realpath(output_dir)
+    path = os.path.realpath(os.path.join(root, f"{item_id}.md"))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"item id {item_id!r} points outside the output directory")
+    return path
+
+
+def _fsync_directory(directory: str):
+    """Make a rename inside directory durable; Windows cannot open directories, so it is skipped there"""
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextlib.contextmanager
+def open_atomic(path: str) -> Iterator[TextIO]:
+    """Open path for writing so readers never see a partially written file
+
+    The data and the rename are both synced to disk when the block exits, so
+    a checkpoint recorded afterwards never points at a lost or empty file.
+    If the block raises, path is left untouched.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    os.replace(temp_path, path)
+    _fsync_directory(directory)
+
+
+def write_atomic(path: str, content: str):
+    """Write content to path so readers never see a partially written file"""
+    with open_atomic(path) as f:
+        f.write(content)
+
+
+def _streams_offline(converter: AsyncNotionNotesConverter, file_path: Optional[str]) -> bool:
+    """Return whether an input is a large file whose notes will be built offline anyway"""
+    return (file_path is not None and os.path.getsize(file_path) > STREAM_INPUT_BYTES
+            and converter.builds_offline())
+
+
+class ProgressReporter:
+    """Prints progress, throughput and ETA to a stream"""
+
+    def __init__(self, total: int, stream=sys.stderr):
+        self.total = total
+        self.stream = stream
+        self.started_at = time.monotonic()
+
+    def __call__(self, done: int, item_id: str, failed: bool = False):
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        rate = done / elapsed
+        eta = (self.total - done) / rate if rate else 0.0
+        status = "FAILED" if failed else "ok"
+        self.stream.write(f"[{done}/{self.total}] {item_id} {status} ({rate:.2f} items/s, ETA {eta:.0f}s)\n")
+        self.stream.flush()
+
+
+async def run_batch(converter: AsyncNotionNotesConverter, input_path: str, output_dir: str,
+                    max_parallel: int = DEFAULT_PARALLEL_ITEMS, resume: bool = True,
+                    on_progress: Optional[Callable] = None) -> Dict:
+    """Convert every input into OUTPUT_DIR/<id>.md, skipping items in the checkpoint"""
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILENAME)
+    if not resume and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    finished = load_checkpoint(checkpoint_path)
+
+    # Count first so progress has a total without holding every text in memory
+    total = sum(1 for item_id, _, _ in _iter_sources(input_path) if item_id not in finished)
+    if on_progress is None:
+        on_progress = ProgressReporter(total)
+    logger.info(f"{len(finished)} item(s) already converted, {total} to go")
+
+    pending = (source for source in _iter_sources(input_path) if source[0] not in finished)
+    summary = {"converted": 0, "failed": 0, "skipped": len(finished)}
+
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+        async def worker():
+            # Workers share one lazy iterator; next() never awaits so this is safe
+            for item_id, file_path, text in pending:
+                messages = []
+                try:
+                    output_path = output_path_for(output_dir, item_id)
+                    if _streams_offline(converter, file_path):
+                        # Structure the file one window at a time instead of reading it whole
+                        with open(file_path, encoding="utf-8") as source, open_atomic(output_path) as output:
+                            stream_offline_notes(source, output)
+                    else:
+                        if file_path is not None:
+                            with open(file_path, encoding="utf-8") as f:
+                                text = f.read()
+                        notes = await converter.convert_to_notes(text, messages)
+                        write_atomic(output_path, notes)
+                except Exception as e:
+                    logger.error(f"Conversion failed for {item_id}: {e}")
+                    summary["failed"] += 1
+                    on_progress(summary["converted"] + summary["failed"], item_id, True)
+                    continue
+
+                for level, message in messages:
+                    logger.info(f"{item_id}: {message}")
+
+                # Record only after the output is safely on disk
+                checkpoint.write(json.dumps({"id": item_id, "output": output_path, "at": time.time()}) + "\n")
+                checkpoint.flush()
+                os.fsync(checkpoint.fileno())
+                summary["converted"] += 1
+                on_progress(summary["converted"] + summary["failed"], item_id, False)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, max_parallel))))
+
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Convert many texts into Notion-style notes.")
+    parser.add_argument("input", help="Directory of .txt/.md files, or a JSONL file of {\"id\", \"text\"} records")
+    parser.add_argument("output_dir", help="Directory for the generated .md files and the checkpoint")
+    parser.add_argument("--model", default="gpt2", help="Hugging Face model name (default: gpt2)")
+    parser.add_argument("--token", default=os.environ.get("HUGGINGFACE_API_TOKEN"),
+                        help="Hugging Face API token (default: $HUGGINGFACE_API_TOKEN)")
+    parser.add_argument("--parallel", type=int, default=DEFAULT_PARALLEL_ITEMS,
+                        help=f"Inputs converted at the same time (default: {DEFAULT_PARALLEL_ITEMS})")
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help=f"API requests in flight at once (default: {DEFAULT_MAX_CONCURRENCY})")
+    parser.add_argument("--engine", choices=[ENGINE_AI, ENGINE_HYBRID, ENGINE_OFFLINE], default=ENGINE_AI,
+                        help="Notes engine: hybrid has the model write only the summary of a locally "
+                             "built skeleton; offline needs no token or network (default: ai)")
+    parser.add_argument("--deterministic", action="store_true", help="Disable sampling and use the cache")
+    parser.add_argument("--cache-db", help="SQLite file for the on-disk notes cache")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and convert everything again")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.engine != ENGINE_OFFLINE and not args.token:
+        parser.error("an API token is required (--token or HUGGINGFACE_API_TOKEN)")
+
+    cache = NotesCache(db_path=args.cache_db) if args.cache_db else None
+
+    async def run() -> Dict:
+        async with AsyncNotionNotesConverter(
+            args.token or "",
+            args.model,
+            max_concurrency=args.max_concurrency,
+            cache=cache,
+            deterministic=args.deterministic,
+            engine=args.engine
+        ) as converter:
+            return await run_batch(converter, args.input, args.output_dir, args.parallel, resume=not args.restart)
+
+    summary = asyncio.run(run())
+    print(f"Converted {summary['converted']}, failed {summary['failed']}, "
+          f"skipped {summary['skipped']} already done.")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""Micro-benchmarks for the offline text pipeline.
+
+Runs each benchmark on a synthetic meeting transcript of the requested size
+and reports the best and median wall-clock time over several repeats, plus
+throughput in MB/s at the median. --streaming instead feeds transcripts of
+several megabytes, generated line by line, through stream_offline_notes and
+reports throughput and peak memory.
+
+Usage:
+    python benchmarks.py [analyzer segmenter summarizer topics ...] [--size-kb 100] [--repeat 20]
+    python benchmarks.py --streaming [--sizes-mb 1 10 100]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from action_items import TASK, build_action_phrases, extract_action_items
+from keyphrases import extract_keyphrases
+from offline_engine import generate_offline_notes, stream_offline_notes
+from text_analysis import PhraseAutomaton, analyze_text, segment_sentences, summarize
+from topics import segment_topics
+
+DEFAULT_SIZE_KB = 100
+DEFAULT_REPEAT = 20
+DEFAULT_STREAMING_SIZES_MB = [1, 10, 100]
+SHORT_INPUT_BYTES = 500         # Typical size of one pasted note for the offline engine benchmark
+
+TRANSCRIPT_SPEAKERS = ["John", "Sarah", "Mike", "Priya", "Chen"]
+TRANSCRIPT_WORDS = (
+    "project timeline budget design phase client requirements marketing strategy q4 launch release "
+    "testing deployment roadmap feedback metrics revenue hiring onboarding infrastructure database "
+    "migration performance latency dashboard report review deadline friday monday sprint backlog "
+    "customer support ticket escalation contract vendor pricing forecast quarter goals risk"
+).split()
+FILLER_WORDS = "we need to should will the a and so then also about for with on is it that this".split()
+
+
+def iter_transcript(size_bytes: int, seed: int = 0) -> Iterator[str]:
+    """Yield the lines of a reproducible meeting transcript of roughly size_bytes characters"""
+    rng = random.Random(seed)
+    size = 0
+    while size < size_bytes:
+        words = [rng.choice(TRANSCRIPT_WORDS if rng.random() < 0.5 else FILLER_WORDS)
+                 for _ in range(rng.randint(6, 30))]
+        # Mix punctuated lines with run-on speech, as real transcripts do
+        ending = "." if rng.random() < 0.7 else ""
+        line = f"{rng.choice(TRANSCRIPT_SPEAKERS)}: {' '.join(words)}{ending}"
+        size += len(line) + 1
+        yield line + "\n"
+
+
+def make_transcript(size_bytes: int, seed: int = 0) -> str:
+    """Build a reproducible meeting transcript of roughly size_bytes characters"""
+    return "".join(iter_transcript(size_bytes, seed)).rstrip("\n")
+
+
+def time_call(func: Callable[[], object], repeat: int) -> List[float]:
+    """Return the wall-clock duration of each of repeat calls, in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def bench_analyzer(text: str, repeat: int) -> Dict:
+    analyze_text(text)
+    return {"timings": time_call(lambda: analyze_text(text), repeat)}
+
+
+def bench_segmenter(text: str, repeat: int) -> Dict:
+    segment_sentences(text)
+    return {"timings": time_call(lambda: segment_sentences(text), repeat)}
+
+
+def bench_summarizer(text: str, repeat: int) -> Dict:
+    summarize(text)  # Warm up regex and NumPy code paths
+    return {"timings": time_call(lambda: summarize(text), repeat)}
+
+
+def bench_topics(text: str, repeat: int) -> Dict:
+    analysis = analyze_text(text)
+    segment_topics(text, analysis)
+    return {"timings": time_call(lambda: segment_topics(text, analysis), repeat)}
+
+
+def bench_keyphrases(text: str, repeat: int) -> Dict:
+    extract_keyphrases(text)
+    return {"timings": time_call(lambda: extract_keyphrases(text), repeat)}
+
+
+def bench_action_items(text: str, repeat: int) -> Dict:
+    extract_action_items(text)
+    return {"timings": time_call(lambda: extract_action_items(text), repeat)}
+
+
+def bench_action_items_large_vocabulary(text: str, repeat: int) -> Dict:
+    # Ten thousand extra phrases should leave the matching cost roughly unchanged
+    phrases = build_action_phrases()
+    for index in range(10000):
+        phrases[f"{TRANSCRIPT_WORDS[index % len(TRANSCRIPT_WORDS)]} item{index}"] = TASK
+    automaton = PhraseAutomaton(phrases)
+    extract_action_items(text, automaton=automaton)
+    return {"timings": time_call(lambda: extract_action_items(text, automaton=automaton), repeat)}
+
+
+def bench_offline_engine(text: str, repeat: int) -> Dict:
+    # Many short conversions, as when the offline engine stands in for the API
+    inputs = [text[start:start + SHORT_INPUT_BYTES] for start in range(0, len(text), SHORT_INPUT_BYTES)]
+    generate_offline_notes(inputs[0])
+
+    def convert_all():
+        for item in inputs:
+            generate_offline_notes(item)
+
+    return {"timings": time_call(convert_all, repeat), "items": len(inputs)}
+
+
+class CountingWriter:
+    """A text sink that keeps only the number of characters written"""
+
+    def __init__(self):
+        self.chars = 0
+
+    def write(self, text: str) -> int:
+        self.chars += len(text)
+        return len(text)
+
+
+def peak_memory_mb() -> Optional[float]:
+    """Return the process's peak resident memory so far, or None where it cannot be read"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def bench_streaming(sizes_mb: List[int]):
+    """Stream transcripts of each size through the offline engine without holding them in memory"""
+    for size_mb in sizes_mb:
+        writer = CountingWriter()
+        started = time.perf_counter()
+        stats = stream_offline_notes(iter_transcript(size_mb * 1024 * 1024), writer)
+        elapsed = time.perf_counter() - started
+        peak = peak_memory_mb()
+        memory = f", peak RSS {peak:.0f} MB" if peak is not None else ""
+        print(f"streaming: {size_mb} MB in {elapsed:.1f} s ({size_mb / elapsed:.2f} MB/s), "
+              f"{stats['windows']} windows, {writer.chars / 1024:.0f} KB of notes{memory}")
+
+
+BENCHMARKS = {
+    "analyzer": bench_analyzer,
+    "segmenter": bench_segmenter,
+    "summarizer": bench_summarizer,
+    "topics": bench_topics,
+    "keyphrases": bench_keyphrases,
+    "action_items": bench_action_items,
+    "action_items_large_vocabulary": bench_action_items_large_vocabulary,
+    "offline_engine": bench_offline_engine,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the offline text pipeline.")
+    parser.add_argument("names", nargs="*", choices=[[]] + list(BENCHMARKS),
+                        help="Benchmarks to run (default: all)")
+    parser.add_argument("--size-kb", type=int, default=DEFAULT_SIZE_KB,
+                        help=f"Input size in kilobytes (default: {DEFAULT_SIZE_KB})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"Timed runs per benchmark (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Benchmark stream_offline_notes on multi-megabyte inputs instead")
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=DEFAULT_STREAMING_SIZES_MB,
+                        help="Input sizes for --streaming, in megabytes (default: 1 10 100)")
+    args = parser.parse_args(argv)
+
+    if args.streaming:
+        # Sizes run in increasing order, so peak memory growth would show up as a rising peak
+        bench_streaming(sorted(args.sizes_mb))
+        return 0
+
+    text = make_transcript(args.size_kb * 1024)
+    for name in args.names or list(BENCHMARKS):
+        result = BENCHMARKS[name](text, args.repeat)
+        timings = result["timings"]
+        throughput = len(text.encode("utf-8")) / 1e6 / (statistics.median(timings) / 1000)
+        print(f"{name}: {len(text) / 1024:.0f} KB, best {min(timings):.2f} ms, "
+              f"median {statistics.median(timings):.2f} ms over {len(timings)} runs ({throughput:.1f} MB/s)")
+        if "items" in result:
+            rate = result["items"] / (statistics.median(timings) / 1000)
+            print(f"  {result['items']} inputs per run, {rate:.0f} conversions/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
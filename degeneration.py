@@ -0,0 +1,117 @@
+from collections import Counter, deque
+from typing import Deque, Optional, Tuple
+
+from text_analysis import WORD_RE
+
+# Degeneration thresholds
+MAX_PERIOD_WORDS = 12           # Longest phrase checked for back-to-back repetition
+MIN_LOOP_WORDS = 12             # Back-to-back repeats must cover at least this many words
+MIN_LOOP_REPEATS = 3            # ...and repeat the phrase at least this many times
+NGRAM_WORDS = 3                 # Words per n-gram for the diversity check
+DIVERSITY_WINDOW = 48           # Recent words whose n-grams must stay varied
+MIN_NGRAM_DIVERSITY = 0.4       # Share of distinct n-grams in the window below which the text is cycling
+MAX_SYMBOL_RUN = 200            # Characters in a row without a word, such as "-----" or blank lines
+MAX_WORD_CHARS = 64             # Longer "words" are a character loop such as "kkkkkk"
+
+
+class DegenerationDetector:
+    """Spots a completion that has started looping, while it is being generated
+
+    feed() takes the completion in pieces of any size, such as streamed
+    tokens, and returns True once the text has degenerated: a phrase repeated
+    back to back, recent words cycling through the same few n-grams, a
+    run-on word, or a long run of symbols without a word. loop_start is then the offset in the
+    fed text where the loop began, so the text before it can still be used.
+    Each word is looked at once, so the cost stays linear in the text length.
+    """
+
+    def __init__(self):
+        self.loop_start: Optional[int] = None
+        self._length = 0                  # Characters fed so far
+        self._pending = ""                # Unscanned tail, which may end inside a word
+        self._last_word_end = 0
+        self._words: Deque[Tuple[str, int]] = deque(maxlen=DIVERSITY_WINDOW)  # (word, offset)
+        # Number of consecutive words equal to the word `period` positions earlier
+        self._runs = [0] * (MAX_PERIOD_WORDS + 1)
+        self._ngrams: Counter = Counter()
+
+    @property
+    def degenerated(self) -> bool:
+        return self.loop_start is not None
+
+    def feed(self, text: str) -> bool:
+        """Scan the next piece of the completion; returns whether it has degenerated"""
+        if self.degenerated:
+            return True
+        base = self._length - len(self._pending)
+        scanned = self._pending + text
+        self._length += len(text)
+
+        cut = len(scanned)
+        for match in WORD_RE.finditer(scanned):
+            if match.end() == len(scanned):
+                # The word may continue in the next piece
+                cut = match.start()
+                break
+            if self._add_word(match.group().lower(), base + match.start(), base + match.end()):
+                return True
+        self._pending = scanned[cut:]
+
+        if base + cut - self._last_word_end > MAX_SYMBOL_RUN:
+            self.loop_start = self._last_word_end
+        elif len(self._pending) > MAX_WORD_CHARS:
+            self.loop_start = base + cut
+        return self.degenerated
+
+    def _add_word(self, word: str, start: int, end: int) -> bool:
+        if start - self._last_word_end > MAX_SYMBOL_RUN:
+            self.loop_start = self._last_word_end
+            return True
+        if end - start > MAX_WORD_CHARS:
+            self.loop_start = start
+            return True
+        self._last_word_end = end
+
+        words = self._words
+        if len(words) == words.maxlen:
+            # The oldest word's n-gram leaves the window
+            oldest = self._ngram(0)
+            self._ngrams[oldest] -= 1
+            if not self._ngrams[oldest]:
+                del self._ngrams[oldest]
+        words.append((word, start))
+        if len(words) >= NGRAM_WORDS:
+            self._ngrams[self._ngram(len(words) - NGRAM_WORDS)] += 1
+
+        for period in range(1, MAX_PERIOD_WORDS + 1):
+            if len(words) > period and words[-1 - period][0] == word:
+                self._runs[period] += 1
+            else:
+                self._runs[period] = 0
+            repeats = max(MIN_LOOP_REPEATS, -(-MIN_LOOP_WORDS // period))
+            if self._runs[period] >= period * (repeats - 1):
+                # The loop starts with the first copy of the repeated phrase
+                self.loop_start = words[-self._runs[period] - period][1]
+                return True
+
+        if len(words) == words.maxlen:
+            ngram_count = len(words) - NGRAM_WORDS + 1
+            if len(self._ngrams) < MIN_NGRAM_DIVERSITY * ngram_count:
+                # The cycle starts where its most frequent n-gram first appears in the window
+                common = max(self._ngrams, key=self._ngrams.get)
+                first = next(index for index in range(ngram_count) if self._ngram(index) == common)
+                self.loop_start = words[first][1]
+                return True
+        return False
+
+    def _ngram(self, first: int) -> Tuple[str, ...]:
+        return tuple(self._words[index][0] for index in range(first, first + NGRAM_WORDS))
+
+
+def find_degeneration(text: str) -> Optional[int]:
+    """Return the offset where text starts looping, or None when it does not"""
+    detector = DegenerationDetector()
+    detector.feed(text)
+    # A final word has nothing after it; a trailing newline lets it be scanned
+    detector.feed("\n")
+    return detector.loop_start
@@ -0,0 +1,145 @@
+import functools
+import math
+import re
+from typing import Dict, List, Tuple
+
+from text_analysis import STOPWORDS, SUBJECT_VERBS
+
+# Keyphrase defaults
+DEFAULT_MAX_KEYPHRASES = 8      # Phrases returned by extract_keyphrases
+MAX_PHRASE_WORDS = 3            # Longer candidate runs are cut into pieces of this size
+MIN_WORD_LENGTH = 2             # Shorter words never start or join a candidate
+
+# Words, and the punctuation and line breaks that end a candidate phrase
+PHRASE_TOKEN_RE = re.compile(r"[A-Za-z][A-Za-z0-9'-]*|[0-9]+|[.,;:!?()\[\]{}\"/]|\n")
+
+# Verbs that separate noun phrases; ambiguous noun/verb words ("plan", "review") are left out
+VERB_STEMS = (
+    "talk", "discuss", "mention", "cover", "find", "learn", "mimic", "handle", "finish", "follow", "make",
+    "take", "give", "know", "think", "want", "come", "try", "ask", "feel", "leave", "mean", "keep", "begin",
+    "seem", "help", "show", "hear", "move", "believe", "bring", "happen", "write", "provide", "stand", "lose",
+    "meet", "include", "continue", "lead", "understand", "speak", "spend", "grow", "win", "remember",
+    "consider", "appear", "buy", "wait", "send", "expect", "build", "stay", "reach", "remain", "suggest",
+    "raise", "pass", "sell", "require", "decide", "explain", "agree", "reduce", "increase", "deliver",
+    "complete", "touch", "focus", "propose", "identify", "improve", "ensure", "implement", "prepare",
+    "present", "confirm", "discover", "describe", "compare", "need", "tell", "become"
+)
+IRREGULAR_VERBS = (
+    "said", "says", "made", "took", "went", "gone", "gave", "knew", "thought", "came", "found", "told", "left",
+    "felt", "kept", "began", "brought", "wrote", "stood", "lost", "paid", "met", "led", "understood", "spoke",
+    "spent", "grew", "won", "bought", "built", "sent", "sold", "became", "uses", "used", "using", "goes"
+)
+# Generic nouns that add little at the end of a longer phrase ("battery storage advances")
+WEAK_TRAILING_WORDS = frozenset((
+    "solutions", "advances", "potential", "trends", "rates", "analysis", "basics", "ideas", "issues",
+    "things", "stuff", "points", "aspects", "options", "overview", "details", "notes", "updates", "topics"
+))
+# Suffixes of words that usually close a noun phrase ("solar panel efficiency", "carbon capture")
+HEAD_SUFFIXES = ("ency", "ancy", "ity", "ure", "ness", "sis")
+FILLER_WORDS = frozenset(("today", "yesterday", "tomorrow", "also", "lot", "bit", "way", "etc", "thing"))
+
+
+def _verb_forms(stem: str) -> Tuple[str, ...]:
+    # No -ing forms: gerunds are usually nouns here ("machine learning", "marketing")
+    if stem.endswith("e"):
+        return stem, stem + "s", stem + "d"
+    if stem.endswith(("s", "sh", "ch", "x")):
+        return stem, stem + "es", stem + "ed"
+    return stem, stem + "s", stem + "ed"
+
+
+KEYPHRASE_STOPWORDS = frozenset(
+    STOPWORDS
+    | FILLER_WORDS
+    | set(IRREGULAR_VERBS)
+    | {form for stem in VERB_STEMS for form in _verb_forms(stem)}
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _is_head(word: str) -> bool:
+    if word.endswith(HEAD_SUFFIXES):
+        return True
+    # Plural nouns, but not "business", "status" or "analysis"
+    return len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is"))
+
+
+def candidate_phrases(text: str) -> List[List[str]]:
+    """Split text into candidate phrases of content words, in reading order"""
+    candidates = []
+    run = []
+
+    def flush():
+        # A lone participle ("delayed") is not a topic
+        if len(run) > 1 or (run and not run[0].endswith("ed")):
+            for start in range(0, len(run), MAX_PHRASE_WORDS):
+                candidates.append(run[start:start + MAX_PHRASE_WORDS])
+        run.clear()
+
+    # findall on the lowercased text skips a match object and a lower() call per word
+    for word in PHRASE_TOKEN_RE.findall(text.lower()):
+        word = word.strip("'-")
+        if word in SUBJECT_VERBS and run:
+            # "... project timeline john said": the word before a reporting verb is its subject
+            run.pop()
+        if (word in KEYPHRASE_STOPWORDS or len(word) < MIN_WORD_LENGTH
+                or not word[0].isalpha()):
+            flush()
+            continue
+        if word in WEAK_TRAILING_WORDS and len(run) >= 2:
+            flush()
+            continue
+        if word.endswith("ed") and run and not run[-1].endswith("ed"):
+            # A participle after a noun starts the next phrase: "labeled data | unsupervised learning"
+            flush()
+        run.append(word)
+        if _is_head(word):
+            flush()
+    flush()
+    return candidates
+
+
+def extract_keyphrases(text: str, max_phrases: int = DEFAULT_MAX_KEYPHRASES) -> List[str]:
+    """Return the top keyphrases of text, scored RAKE-style by word degree over frequency"""
+    candidates = candidate_phrases(text)
+    if not candidates:
+        return []
+
+    # Word degree counts co-occurring words, so words inside longer phrases score higher
+    frequency: Dict[str, int] = {}
+    degree: Dict[str, int] = {}
+    for phrase in candidates:
+        for word in phrase:
+            frequency[word] = frequency.get(word, 0) + 1
+            degree[word] = degree.get(word, 0) + len(phrase)
+
+    phrases: Dict[str, Tuple[float, int]] = {}  # phrase -> (score, first position)
+    counts: Dict[str, int] = {}
+    for position, phrase in enumerate(candidates):
+        key = " ".join(phrase)
+        counts[key] = counts.get(key, 0) + 1
+        if key not in phrases:
+            phrases[key] = (sum(degree[word] / frequency[word] for word in phrase), position)
+
+    ranked = sorted(
+        phrases,
+        key=lambda key: (-phrases[key][0] * (1.0 + math.log(counts[key])), phrases[key][1])
+    )
+
+    selected = []
+    covered = set()
+    for key in ranked:
+        words = set(key.split())
+        # Skip phrases whose words all appear in a better one
+        if words <= covered:
+            continue
+        selected.append(key)
+        covered |= words
+        if len(selected) >= max_phrases:
+            break
+    return selected
+
+
+def make_tags(phrases: List[str]) -> List[str]:
+    """Turn keyphrases into tags usable as identifiers ("solar-panel-efficiency")"""
+    return [re.sub(r"[^a-z0-9]+", "-", phrase.lower()).strip("-") for phrase in phrases]
@@ -1,24 +1,134 @@
 import streamlit as st
-import requests
+import httpx
+import asyncio
+from collections import deque
+from email.utils import parsedate_to_datetime
+import hashlib
 import json
-from typing import List, Dict
+import math
+from typing import AsyncIterator, Callable, Iterator, List, Dict, Optional, Tuple
+import os
+import queue
+import random
+import statistics
+import re
+import threading
 import time
 import logging
+import uuid
+
+from backends import BackendError, InferenceBackend, LocalModelBackend, local_backend_available
+from degeneration import DegenerationDetector
+from keyphrases import extract_keyphrases, make_tags
+from markdown_ast import MarkdownParser, parse_markdown
+from notes_cache import NotesCache, make_cache_key
+from quality import ACCEPT_QUALITY_SCORE, MIN_QUALITY_SCORE, score_notes
+from offline_engine import NoteSkeleton, build_skeleton, generate_offline_notes, render_notes
+from tables import is_tabular
+from text_analysis import DEFAULT_SUMMARY_SENTENCES, TextAnalysis, analyze_text
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(_name_)
+logger = logging.getLogger(__name__)
+logging.getLogger("httpx").setLevel(logging.WARNING)  # Silence per-request logs
+
+# Connection pool defaults for the Hugging Face Inference API
+DEFAULT_MAX_CONNECTIONS = 32            # Connections kept in the shared pool
+DEFAULT_MAX_CONNECTIONS_PER_HOST = 16   # Concurrent requests allowed per host
+DEFAULT_KEEP_ALIVE = 60                 # Seconds an idle pooled connection is kept open
+REQUEST_TIMEOUT = 30                    # Seconds before an API request times out
+
+# Retry defaults for loading (503) and rate-limited (429) responses
+DEFAULT_MAX_RETRIES = 4                 # Retries per request before giving up
+DEFAULT_RETRY_BASE_DELAY = 1.0          # Seconds; doubled on every retry
+DEFAULT_RETRY_MAX_DELAY = 20.0          # Upper bound for a single backoff step
+DEFAULT_CONVERSION_DEADLINE = 90.0      # Seconds a whole conversion may spend including retries
+RETRYABLE_STATUS_CODES = (502, 503, 504, 429)
+
+# Circuit breaker defaults per model endpoint
+DEFAULT_FAILURE_THRESHOLD = 3           # Consecutive failures that open the circuit
+DEFAULT_RECOVERY_TIMEOUT = 30.0         # Seconds an open circuit waits before a trial request
+DEFAULT_HALF_OPEN_MAX_CALLS = 1         # Trial requests allowed while half-open
+
+# Hedged requests: a slow model gets a backup request to a second model
+DEFAULT_HEDGE_PERCENTILE = 0.95         # Latency percentile after which the backup request starts
+DEFAULT_HEDGE_MIN_SAMPLES = 20          # Successful requests observed before a model is hedged
+DEFAULT_HEDGE_MIN_DELAY = 0.5           # Seconds; faster models are never hedged
+DEFAULT_LATENCY_WINDOW = 200            # Recent latencies kept per model
+
+HF_API_BASE_URL = "https://api-inference.huggingface.co/models/"
+
+# Quality escalation: weak notes are retried on stronger models, cheapest first
+ESCALATION_LADDER = [
+    "distilgpt2",
+    "microsoft/DialoGPT-small",
+    "gpt2",
+    "EleutherAI/gpt-neo-125M",
+    "facebook/opt-350m",
+    "gpt2-medium"
+]
+DEFAULT_ESCALATION_STEPS = 2            # Stronger models tried after the selected one
+ESCALATION_STEP_SHARE = 0.5             # Share of the remaining deadline each step may use; the last gets all
+
+# Shared converter registry
+DEFAULT_IDLE_TIMEOUT = 300.0            # Seconds an unused converter or model stays loaded
+DEFAULT_LEASE_TIMEOUT = 1800.0          # Seconds before a silent session's lease is dropped
+
+# Inference backends selectable in the UI
+BACKEND_API = "Hugging Face API"
+BACKEND_LOCAL = "Local (CPU)"
+BACKEND_OFFLINE = "Offline (rule-based)"
+
+# Note engines: a model with the offline pipeline as fallback, a model filling in a
+# locally built skeleton, or the offline pipeline alone
+ENGINE_AI = "ai"
+ENGINE_HYBRID = "hybrid"
+ENGINE_OFFLINE = "offline"
+
+# Generation budgets
+DEFAULT_MAX_NEW_TOKENS = 300   # Whole notes written by the model
+HYBRID_MAX_NEW_TOKENS = 120    # Summary bullets only; the skeleton supplies everything else
+MIN_SUMMARY_POINT_WORDS = 3    # Shorter generated bullets are dropped
 
-# Set page config
-st.set_page_config(
-    page_title="Notion Notes Converter",
-    page_icon="📝",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+# Output budget per chunk, sized from its length and structure
+MIN_NEW_TOKENS = 48                 # A heading and a couple of bullets
+NOTES_BASE_TOKENS = 40              # Title, summary heading and spacing
+NOTES_TOKENS_PER_INPUT_TOKEN = 0.5  # Notes are shorter than the text they structure
+SECTION_TOKENS = 16                 # One topic heading and its spacing
+ACTION_ITEM_TOKENS = 20             # One "- [ ] ..." line with owner and deadline
+TABLE_ROW_TOKENS = 12               # One markdown table row
+SUMMARY_POINT_TOKENS = 30           # One generated summary bullet in hybrid mode
+
+# Generation parameters per model; models not listed use the defaults
+DEFAULT_MODEL_PROFILE = {
+    "context_tokens": 1024,         # Prompt and output together must fit the context window
+    "max_new_tokens": DEFAULT_MAX_NEW_TOKENS,
+    "temperature": 0.3,
+    "top_p": 0.8,
+    "repetition_penalty": 1.1
+}
+MODEL_PROFILES = {
+    "distilgpt2": {"max_new_tokens": 256, "repetition_penalty": 1.2},  # Loops readily
+    "microsoft/DialoGPT-small": {"temperature": 0.5, "top_p": 0.9, "repetition_penalty": 1.3},
+    "gpt2-medium": {"max_new_tokens": 400},
+    "EleutherAI/gpt-neo-125M": {"context_tokens": 2048, "max_new_tokens": 400},
+    "facebook/opt-350m": {"context_tokens": 2048, "max_new_tokens": 400, "repetition_penalty": 1.05}
+}
+
+# Optional SQLite file for the on-disk notes cache tier
+NOTES_CACHE_PATH = os.environ.get("NOTES_CACHE_PATH")
+
+# Chunking defaults for long inputs
+DEFAULT_CHUNK_TOKENS = 250     # Approximate prompt tokens per chunk (~1000 characters)
+DEFAULT_MAX_CONCURRENCY = 4    # Chunks converted in parallel
+CHARS_PER_TOKEN = 4            # Rough character-to-token ratio for GPT-2 style tokenizers
+MAX_INPUT_CHARS = 100000       # Text area limit in the UI
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+BULLET_PREFIX_RE = re.compile(r"^(?:[-*•]|\d+[.)])\s*")
 
 # Custom CSS for better UI and Notion-like styling
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .chat-message {
         padding: 1.5rem;
@@ -85,14 +195,804 @@ st.markdown("""
         border: 2px dashed #dee2e6;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
 
-class NotionNotesConverter:
-    def _init_(self, api_token: str, model_name: str = "gpt2"):
+class PooledAsyncTransport(httpx.AsyncHTTPTransport):
+    """Async transport that keeps connections alive, caps per-host concurrency and counts connection reuse"""
+
+    def __init__(self, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_connections_per_host: int = DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                 keep_alive: float = DEFAULT_KEEP_ALIVE):
+        super().__init__(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=keep_alive
+            )
+        )
+        self.max_connections_per_host = max_connections_per_host
+        self._host_limits = {}
+        self._requests_sent = 0
+        self._connections_opened = 0
+
+    async def _trace(self, event_name: str, info: Dict):
+        if event_name == "connection.connect_tcp.complete":
+            self._connections_opened += 1
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._requests_sent += 1
+        request.extensions = {**request.extensions, "trace": self._trace}
+        
+        host_limit = self._host_limits.get(request.url.host)
+        if host_limit is None:
+            host_limit = asyncio.Semaphore(self.max_connections_per_host)
+            self._host_limits[request.url.host] = host_limit
+        
+        async with host_limit:
+            return await super().handle_async_request(request)
+
+    def stats(self) -> Dict:
+        """Return request and connection counters for this transport"""
+        requests_sent = self._requests_sent
+        connections_opened = self._connections_opened
+        connections_reused = max(requests_sent - connections_opened, 0)
+        return {
+            "requests": requests_sent,
+            "connections_opened": connections_opened,
+            "connections_reused": connections_reused,
+            "reuse_ratio": connections_reused / requests_sent if requests_sent else 0.0
+        }
+
+def parse_retry_hint(response: httpx.Response) -> Optional[float]:
+    """Return the server-suggested wait in seconds from Retry-After or HF's estimated_time"""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                return max(0.0, retry_at.timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    if isinstance(body, dict) and isinstance(body.get("estimated_time"), (int, float)):
+        return max(0.0, float(body["estimated_time"]))
+    return None
+
+class RetryMetrics:
+    """Thread-safe counters describing retry behaviour"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.retries_by_status = {}
+        self.retry_wait_seconds = 0.0
+        self.recovered = 0
+        self.exhausted = 0
+    
+    def record_retry(self, status_code: int, delay: float):
+        with self._lock:
+            self.retries += 1
+            self.retries_by_status[status_code] = self.retries_by_status.get(status_code, 0) + 1
+            self.retry_wait_seconds += delay
+    
+    def record_outcome(self, recovered: bool):
+        """Record how a request that needed retrying ended"""
+        with self._lock:
+            if recovered:
+                self.recovered += 1
+            else:
+                self.exhausted += 1
+    
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "retries": self.retries,
+                "retries_by_status": dict(self.retries_by_status),
+                "retry_wait_seconds": self.retry_wait_seconds,
+                "recovered": self.recovered,
+                "exhausted": self.exhausted
+            }
+
+class RetryPolicy:
+    """Bounded exponential backoff with full jitter that honors server wait hints"""
+    
+    def __init__(self, max_retries: int = DEFAULT_MAX_RETRIES,
+                 base_delay: float = DEFAULT_RETRY_BASE_DELAY,
+                 max_delay: float = DEFAULT_RETRY_MAX_DELAY,
+                 deadline: float = DEFAULT_CONVERSION_DEADLINE,
+                 metrics: Optional[RetryMetrics] = None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.metrics = metrics or RetryMetrics()
+    
+    def next_delay(self, attempt: int, retry_hint: Optional[float] = None) -> Optional[float]:
+        """Return seconds to wait before retry number attempt + 1, or None to give up"""
+        if attempt >= self.max_retries:
+            return None
+        
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_hint is not None:
+            # Never retry sooner than the server asked us to
+            delay = max(delay, retry_hint)
+        return delay
+
+@st.cache_resource(show_spinner=False)
+def get_retry_policy() -> RetryPolicy:
+    """Return the process-wide retry policy so metrics cover all sessions"""
+    return RetryPolicy()
+
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker guarding a single model endpoint"""
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, name: str = "endpoint",
+                 failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 recovery_timeout: float = DEFAULT_RECOVERY_TIMEOUT,
+                 half_open_max_calls: int = DEFAULT_HALF_OPEN_MAX_CALLS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_calls = 0
+        self.times_opened = 0
+        self.rejected = 0
+    
+    def _current_state(self) -> str:
+        # Caller holds the lock
+        if self._state == self.OPEN and self.clock() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_calls = 0
+        return self._state
+    
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+    
+    def is_available(self) -> bool:
+        """Return whether a request would currently be let through, without reserving it"""
+        with self._lock:
+            state = self._current_state()
+            return state == self.CLOSED or (state == self.HALF_OPEN and self._trial_calls < self.half_open_max_calls)
+    
+    def allow_request(self) -> bool:
+        """Reserve permission for one request; every allowed request must call record()"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and self._trial_calls < self.half_open_max_calls:
+                self._trial_calls += 1
+                return True
+            self.rejected += 1
+            return False
+    
+    def record(self, success: Optional[bool]):
+        """Record a request outcome; None means it was abandoned before the endpoint answered"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.HALF_OPEN:
+                self._trial_calls = max(0, self._trial_calls - 1)
+            
+            if success is None:
+                return
+            if success:
+                self._consecutive_failures = 0
+                self._state = self.CLOSED
+                return
+            
+            self._consecutive_failures += 1
+            if state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if state != self.OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"Circuit for {self.name} opened after {self._consecutive_failures} consecutive failure(s)")
+                self._state = self.OPEN
+                self._opened_at = self.clock()
+    
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._consecutive_failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected
+            }
+
+class CircuitBreakerRegistry:
+    """Circuit breakers keyed by model name"""
+    
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 recovery_timeout: float = DEFAULT_RECOVERY_TIMEOUT,
+                 half_open_max_calls: int = DEFAULT_HALF_OPEN_MAX_CALLS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self._breakers = {}
+        self._lock = threading.Lock()
+    
+    def get(self, model_name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(model_name)
+            if breaker is None:
+                breaker = CircuitBreaker(model_name, self.failure_threshold, self.recovery_timeout,
+                                         self.half_open_max_calls, self.clock)
+                self._breakers[model_name] = breaker
+            return breaker
+    
+    def snapshot(self) -> Dict:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {model_name: breaker.snapshot() for model_name, breaker in breakers.items()}
+
+@st.cache_resource(show_spinner=False)
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """Return the process-wide circuit breakers so every session sees endpoint health"""
+    return CircuitBreakerRegistry()
+
+def latency_percentile(latencies, percentile: float) -> Optional[float]:
+    """Return the nearest-rank percentile of a collection of latencies, or None when it is empty"""
+    if not latencies:
+        return None
+    ordered = sorted(latencies)
+    rank = max(1, math.ceil(percentile * len(ordered)))
+    return ordered[rank - 1]
+
+class HedgeMetrics:
+    """Thread-safe counters describing hedged requests and the latency they saved"""
+    
+    def __init__(self, window: int = DEFAULT_LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        # Latency the caller saw, and the primary model's latency had there been no hedge,
+        # which is estimated when the primary was cancelled
+        self._served = deque(maxlen=window)
+        self._unhedged = deque(maxlen=window)
+    
+    def record(self, hedged: bool, hedge_won: bool, served: float, unhedged: float):
+        with self._lock:
+            self.requests += 1
+            self.hedged += hedged
+            self.hedge_wins += hedge_won
+            self._served.append(served)
+            self._unhedged.append(unhedged)
+    
+    def snapshot(self) -> Dict:
+        with self._lock:
+            p95 = latency_percentile(self._served, DEFAULT_HEDGE_PERCENTILE)
+            p95_unhedged = latency_percentile(self._unhedged, DEFAULT_HEDGE_PERCENTILE)
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "hedge_rate": self.hedged / self.requests if self.requests else 0.0,
+                "p95_latency": p95,
+                "p95_unhedged_latency": p95_unhedged,
+                "p95_saved": p95_unhedged - p95 if p95 is not None else None
+            }
+
+class HedgePolicy:
+    """Decides when a request has waited long enough to send a backup, from each model's recent latencies"""
+    
+    def __init__(self, percentile: float = DEFAULT_HEDGE_PERCENTILE,
+                 min_samples: int = DEFAULT_HEDGE_MIN_SAMPLES,
+                 min_delay: float = DEFAULT_HEDGE_MIN_DELAY,
+                 window: int = DEFAULT_LATENCY_WINDOW,
+                 metrics: Optional[HedgeMetrics] = None):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.window = window
+        self.metrics = metrics or HedgeMetrics(window)
+        self._latencies = {}
+        self._lock = threading.Lock()
+    
+    def record_latency(self, model_name: str, seconds: float):
+        """Record how long a request to model_name took, or a lower bound for a cancelled one"""
+        with self._lock:
+            latencies = self._latencies.get(model_name)
+            if latencies is None:
+                latencies = self._latencies[model_name] = deque(maxlen=self.window)
+            latencies.append(seconds)
+    
+    def hedge_delay(self, model_name: str) -> Optional[float]:
+        """Return seconds to wait for model_name before hedging, or None until enough requests were seen"""
+        with self._lock:
+            latencies = list(self._latencies.get(model_name, ()))
+        if len(latencies) < self.min_samples:
+            return None
+        return max(self.min_delay, latency_percentile(latencies, self.percentile))
+    
+    def estimate_latency(self, model_name: str, at_least: float) -> float:
+        """Estimate the latency of a cancelled request that had run for at_least seconds
+        
+        Uses the median of the model's recent latencies beyond at_least, or
+        at_least itself when no request took that long.
+        """
+        with self._lock:
+            longer = [seconds for seconds in self._latencies.get(model_name, ()) if seconds > at_least]
+        return statistics.median(longer) if longer else at_least
+
+@st.cache_resource(show_spinner=False)
+def get_hedge_policy() -> HedgePolicy:
+    """Return the process-wide hedge policy so latencies and metrics cover all sessions"""
+    return HedgePolicy()
+
+class EventLoopThread:
+    """Background event loop that runs async conversions for synchronous callers"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="notes-converter-loop", daemon=True)
+        self.thread.start()
+
+    def run(self, coro):
+        """Run a coroutine on the background loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def iterate(self, async_iterator: AsyncIterator) -> Iterator:
+        """Consume an async iterator on the background loop, yielding its items to the caller"""
+        items = queue.Queue()
+        finished = object()
+        
+        async def pump():
+            try:
+                async for item in async_iterator:
+                    items.put(item)
+            finally:
+                items.put(finished)
+        
+        future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        try:
+            while True:
+                item = items.get()
+                if item is finished:
+                    break
+                yield item
+            future.result()  # Re-raise anything the iterator raised
+        finally:
+            # The caller stopped early: stop generating on the loop too
+            future.cancel()
+
+@st.cache_resource(show_spinner=False)
+def get_event_loop_thread() -> EventLoopThread:
+    """Return the process-wide event loop used by NotionNotesConverter"""
+    return EventLoopThread()
+
+class SharedResourceRegistry:
+    """Thread-safe registry of converters and models shared by all Streamlit sessions
+    
+    Each session holds a lease on the resources it uses and renews it on every
+    rerun. Leases that are not renewed within lease_timeout are dropped, since
+    Streamlit does not tell us when a session ends. Resources without leases
+    are closed and removed after idle_timeout, so memory follows the set of
+    models in active use rather than the number of sessions.
+    """
+    
+    def __init__(self, idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 lease_timeout: float = DEFAULT_LEASE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self.lease_timeout = lease_timeout
+        # key -> {"resource", "ready", "holders": {holder_id: last_seen}, "last_used"}; ready is set once
+        # the resource is built, so slow factories and close() calls run outside the lock
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+    
+    def acquire(self, key, holder_id: str, factory):
+        """Return the resource for key, creating it with factory() if needed, and lease it to holder_id
+        
+        Only the first caller for a key runs factory(); concurrent callers for
+        the same key wait for it, while other keys stay available.
+        """
+        now = time.monotonic()
+        with self._lock:
+            evicted = self._evict_idle(now)
+            entry = self._entries.get(key)
+            creating = entry is None
+            if creating:
+                entry = {"resource": None, "ready": threading.Event(), "holders": {}, "last_used": now}
+                self._entries[key] = entry
+            entry["holders"][holder_id] = now
+            entry["last_used"] = now
+        self._close(evicted)
+        
+        if not creating:
+            entry["ready"].wait()
+            if entry["resource"] is None:
+                # The caller building it failed; try again
+                return self.acquire(key, holder_id, factory)
+            return entry["resource"]
+        
+        try:
+            entry["resource"] = factory()
+        except BaseException:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            raise
+        finally:
+            entry["ready"].set()
+        with self._lock:
+            self.created += 1
+        logger.info(f"Registry created {key[0]} for {key[1:]}")
+        return entry["resource"]
+    
+    def release(self, key, holder_id: str):
+        """Drop holder_id's lease on key"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["holders"].pop(holder_id, None)
+                entry["last_used"] = time.monotonic()
+    
+    def evict_idle(self) -> int:
+        """Close and remove resources nobody has used recently; returns how many were removed"""
+        with self._lock:
+            evicted = self._evict_idle(time.monotonic())
+        self._close(evicted)
+        return len(evicted)
+    
+    def _evict_idle(self, now: float) -> List[Tuple]:
+        # Caller holds the lock and closes the returned (key, resource) pairs after releasing it
+        evicted = []
+        for key in list(self._entries):
+            entry = self._entries[key]
+            if not entry["ready"].is_set():
+                continue
+            for holder_id, last_seen in list(entry["holders"].items()):
+                if now - last_seen > self.lease_timeout:
+                    del entry["holders"][holder_id]
+            if entry["holders"] or now - entry["last_used"] <= self.idle_timeout:
+                continue
+            
+            del self._entries[key]
+            evicted.append((key, entry["resource"]))
+        self.evicted += len(evicted)
+        return evicted
+    
+    def _close(self, evicted: List[Tuple]):
+        for key, resource in evicted:
+            close = getattr(resource, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception as e:
+                    logger.error(f"Error closing {key}: {e}")
+            logger.info(f"Registry evicted idle {key[0]} for {key[1:]}")
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "resources": len(self._entries),
+                "leases": sum(len(entry["holders"]) for entry in self._entries.values()),
+                "created": self.created,
+                "evicted": self.evicted
+            }
+
+@st.cache_resource(show_spinner=False)
+def get_resource_registry() -> SharedResourceRegistry:
+    """Return the process-wide registry of converters and loaded models"""
+    return SharedResourceRegistry()
+
+def token_fingerprint(api_token: str) -> str:
+    """Return a short, non-reversible id for a token so it can be part of a registry key"""
+    return hashlib.sha256((api_token or "").encode("utf-8")).hexdigest()[:16]
+
+@st.cache_resource(show_spinner=False)
+def get_notes_cache(db_path: Optional[str] = None) -> NotesCache:
+    """Return the process-wide notes cache, optionally backed by SQLite at db_path"""
+    return NotesCache(db_path=db_path)
+
+@st.cache_resource(show_spinner=False)
+def get_http_transport(max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                       max_connections_per_host: int = DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                       keep_alive: float = DEFAULT_KEEP_ALIVE) -> PooledAsyncTransport:
+    """Return the process-wide connection pool for the given pool settings"""
+    logger.info(f"Created pooled HTTP transport (max_connections={max_connections}, keep_alive={keep_alive}s)")
+    return PooledAsyncTransport(max_connections, max_connections_per_host, keep_alive)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of model tokens in text"""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+def _split_words(text: str, token_budget: int) -> List[str]:
+    """Split text that exceeds the budget on word boundaries"""
+    pieces = []
+    words = []
+    for word in text.split():
+        if words and estimate_tokens(" ".join(words + [word])) > token_budget:
+            pieces.append(" ".join(words))
+            words = []
+        words.append(word)
+    if words:
+        pieces.append(" ".join(words))
+    return pieces
+
+def split_into_chunks(text: str, token_budget: int = DEFAULT_CHUNK_TOKENS,
+                      analysis: Optional[TextAnalysis] = None) -> List[str]:
+    """Split text into chunks of at most token_budget tokens on natural boundaries"""
+    if analysis is None:
+        analysis = analyze_text(text)
+    chunks = []
+    current = []
+    current_chars = 0  # Including the separators between pieces, which the budget must cover too
+    sentence_index = 0
+    
+    for paragraph_start, paragraph_end in analysis.paragraphs:
+        paragraph = text[paragraph_start:paragraph_end]
+        
+        # Sentence spans never cross paragraph boundaries
+        paragraph_sentences = []
+        while sentence_index < len(analysis.sentences) and analysis.sentences[sentence_index][0] < paragraph_end:
+            paragraph_sentences.append(analysis.sentences[sentence_index])
+            sentence_index += 1
+        
+        # (piece, separator that follows it)
+        if estimate_tokens(paragraph) <= token_budget:
+            pieces = [(paragraph, "\n\n")]
+        elif "\n" in paragraph.strip():
+            # Keep line-oriented text such as CSV rows or lists one line per line
+            pieces = []
+            for line in paragraph.strip().splitlines():
+                if estimate_tokens(line) <= token_budget:
+                    pieces.append((line, "\n"))
+                else:
+                    words = _split_words(line, token_budget)
+                    pieces.extend((piece, " ") for piece in words[:-1])
+                    pieces.append((words[-1], "\n"))
+        else:
+            pieces = []
+            for start, end in paragraph_sentences:
+                sentence = text[start:end]
+                if estimate_tokens(sentence) <= token_budget:
+                    pieces.append((sentence, " "))
+                else:
+                    pieces.extend((piece, " ") for piece in _split_words(sentence, token_budget))
+        
+        for piece, separator in pieces:
+            # estimate_tokens() of the chunk with this piece; a trailing separator is stripped when it is finished
+            if current and (current_chars + len(piece)) // CHARS_PER_TOKEN > token_budget:
+                chunks.append("".join(current).strip())
+                current = []
+                current_chars = 0
+            current.append(piece + separator)
+            current_chars += len(piece) + len(separator)
+        
+        # Keep paragraph breaks between packed paragraphs
+        if current and not current[-1].endswith("\n\n"):
+            current_chars -= len(current[-1])
+            current[-1] = current[-1].rstrip() + "\n\n"
+            current_chars += len(current[-1])
+    
+    if current:
+        chunks.append("".join(current).strip())
+    return chunks or [text]
+
+def _heading_key(title: str) -> str:
+    """Normalize a heading title so the same heading from different chunks matches"""
+    key = re.sub(r"[^\w\s]", "", title.lower())
+    key = " ".join(key.split())
+    return key or title.strip()
+
+def _trim_trailing_blank(node: Dict):
+    """Drop a trailing blank line so content appended later stays contiguous"""
+    if node["lines"] and node["lines"][-1] == "":
+        node["lines"].pop()
+
+def merge_partial_notes(partial_notes: List[str]) -> str:
+    """Stitch per-chunk notes into one document, merging duplicate headings"""
+    root = {"heading": None, "lines": [], "seen": {}, "children": {}}
+    
+    for index, notes in enumerate(partial_notes):
+        stack = [(0, root)]
+        in_code = False
+        for line in notes.splitlines():
+            match = None if in_code else HEADING_RE.match(line.strip())
+            if match:
+                _trim_trailing_blank(stack[-1][1])
+                level = len(match.group(1))
+                while stack[-1][0] >= level:
+                    stack.pop()
+                parent = stack[-1][1]
+                key = (level, _heading_key(match.group(2)))
+                node = parent["children"].get(key)
+                if node is None:
+                    node = {"heading": line.strip(), "lines": [], "seen": {}, "children": {}}
+                    parent["children"][key] = node
+                stack.append((level, node))
+                continue
+            
+            node = stack[-1][1]
+            stripped = line.strip()
+            if not stripped:
+                # Collapse runs of blank lines
+                if node["lines"] and node["lines"][-1] != "":
+                    node["lines"].append("")
+                continue
+            if stripped.startswith("```"):
+                in_code = not in_code
+            elif not in_code and not stripped.startswith("|"):
+                # Overlapping chunks repeat bullets and sentences, but a chunk's own
+                # repeats are kept; table rows and code are never dropped
+                if node["seen"].get(stripped, index) != index:
+                    continue
+                node["seen"].setdefault(stripped, index)
+            node["lines"].append(line.rstrip())
+        _trim_trailing_blank(stack[-1][1])
+    
+    output = []
+    
+    def render(node: Dict):
+        if node["heading"]:
+            output.append(node["heading"])
+            output.append("")
+        body = node["lines"]
+        while body and body[0] == "":
+            body = body[1:]
+        if body:
+            output.extend(body)
+            output.append("")
+        for child in node["children"].values():
+            render(child)
+    
+    render(root)
+    return "\n".join(output).strip() + "\n"
+
+def assemble_notes(partial_notes: List[str]) -> str:
+    """Return a single partial note as-is, or merge several into one document"""
+    if len(partial_notes) == 1:
+        return partial_notes[0]
+    
+    # Reduce step: stitch the partial notes into one document
+    return merge_partial_notes(partial_notes)
+
+def clean_generated_text(generated_text: str) -> str:
+    """Strip echoed prompt text from a model completion and repair its markdown"""
+    return parse_markdown(generated_text).render()
+
+def extract_summary_points(response: str) -> List[str]:
+    """Turn a skeleton-guided completion into summary bullet points"""
+    points = []
+    seen = set()
+    for line in response.splitlines():
+        line = line.strip()
+        if line.startswith("#"):
+            if points:
+                # The model moved on to a section the skeleton already provides
+                break
+            continue
+        point = BULLET_PREFIX_RE.sub("", line)
+        if len(point.split()) < MIN_SUMMARY_POINT_WORDS or point.lower() in seen:
+            continue
+        seen.add(point.lower())
+        points.append(point)
+        if len(points) >= DEFAULT_SUMMARY_SENTENCES:
+            break
+    return points
+
+def format_skeleton_outline(skeleton: NoteSkeleton) -> str:
+    """List the sections a skeleton already provides, for the hybrid prompt"""
+    lines = []
+    if skeleton.keyphrases:
+        lines.append(f"- Key Topics: {', '.join(skeleton.keyphrases)}")
+    for heading, _ in skeleton.sections:
+        lines.append(f"- {heading}")
+    if skeleton.action_items:
+        lines.append(f"- Action Items ({len(skeleton.action_items)})")
+    return "\n".join(lines)
+
+def fill_skeleton(skeleton: Optional[NoteSkeleton], response: str) -> str:
+    """Return the notes for a cleaned completion: as-is, or with its bullets as the skeleton's summary"""
+    if skeleton is None:
+        return response
+    points = extract_summary_points(response)
+    # No usable bullet means the completion failed; the caller falls back
+    return render_notes(skeleton, points) if points else ""
+
+def is_usable_notes(response: str) -> bool:
+    """Check that a cleaned completion looks like structured notes"""
+    return len(response) >= 20 and parse_markdown(response, strip_prompt=False).has_structure()
+
+def model_profile(model_name: str) -> Dict:
+    """Return the generation parameters for a model"""
+    return {**DEFAULT_MODEL_PROFILE, **MODEL_PROFILES.get(model_name, {})}
+
+def plan_new_tokens(chunk: str, structure: NoteSkeleton, hybrid: bool = False) -> int:
+    """Size the output budget for a chunk from its length and structure
+    
+    Notes need room for every topic section, action item and table row in
+    the chunk, so structured inputs are not cut off mid-list while short
+    ones finish sooner. In hybrid mode only the summary bullets are generated.
+    """
+    if hybrid:
+        points = min(DEFAULT_SUMMARY_SENTENCES, max(1, structure.sentence_count))
+        return max(MIN_NEW_TOKENS, min(HYBRID_MAX_NEW_TOKENS, SUMMARY_POINT_TOKENS * points))
+    
+    tokens = (NOTES_BASE_TOKENS
+              + NOTES_TOKENS_PER_INPUT_TOKEN * estimate_tokens(chunk)
+              + SECTION_TOKENS * len(structure.sections)
+              + ACTION_ITEM_TOKENS * len(structure.action_items)
+              + TABLE_ROW_TOKENS * sum(len(table.rows) + 2 for table in structure.tables))
+    return max(MIN_NEW_TOKENS, int(tokens))
+
+class StreamingError(Exception):
+    """Raised when a streamed generation request fails"""
+
+class AsyncNotionNotesConverter:
+    def __init__(self, api_token: str, model_name: str = "gpt2",
+                 chunk_token_budget: int = DEFAULT_CHUNK_TOKENS,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 transport: Optional[PooledAsyncTransport] = None,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_connections_per_host: int = DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                 keep_alive: float = DEFAULT_KEEP_ALIVE,
+                 cache: Optional[NotesCache] = None,
+                 deterministic: bool = False,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breakers: Optional[CircuitBreakerRegistry] = None,
+                 fallback_models: Optional[List[str]] = None,
+                 backend: Optional[InferenceBackend] = None,
+                 engine: str = ENGINE_AI,
+                 escalation_steps: int = DEFAULT_ESCALATION_STEPS,
+                 hedge_policy: Optional[HedgePolicy] = None):
         self.api_token = api_token
         self.model_name = model_name
-        self.api_url = f"https://api-inference.huggingface.co/models/{model_name}"
+        self.api_url = f"{HF_API_BASE_URL}{model_name}"
         self.headers = {"Authorization": f"Bearer {api_token}"}
+        self.chunk_token_budget = chunk_token_budget
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.deterministic = deterministic
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breakers = circuit_breakers or CircuitBreakerRegistry()
+        self.fallback_models = [model for model in (fallback_models or []) if model != model_name]
+        
+        # Generate with this backend instead of the hosted Inference API when set
+        self.backend = backend
+        
+        # Default engine for requests that do not pick one
+        self.engine = engine
+        
+        # Weak notes are retried on up to this many stronger models
+        self.escalation_steps = escalation_steps
+        self.escalation_counts = {"chunks": 0, "escalated": 0, "improved": 0, "stopped_early": 0}
+        
+        # Requests slower than a model's usual latency are also sent to a second model
+        self.hedge_policy = hedge_policy or HedgePolicy()
+        
+        # Bound the number of in-flight API requests for this converter
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        
+        # Reuse a shared pool when given one, otherwise own a private pool
+        self._owns_transport = transport is None
+        if transport is None:
+            transport = PooledAsyncTransport(max_connections, max_connections_per_host, keep_alive)
+        self.transport = transport
+        self.client = httpx.AsyncClient(transport=transport, timeout=REQUEST_TIMEOUT)
         
         # System prompt for Notion-style conversion
         self.system_prompt = """You are a professional note-taking assistant that converts messy text, transcripts, or raw ideas into clean, structured Notion-style notes. Your task is to:
@@ -107,153 +1007,895 @@ class NotionNotesConverter:
 
 Always respond in clean Markdown format that would look great in Notion. Make the notes scannable and well-organized."""
     
-    def query(self, payload: Dict) -> Dict:
-        """Send request to Hugging Face API with proper error handling"""
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+    
+    async def aclose(self):
+        """Close the connection pool if this converter owns it"""
+        if self._owns_transport:
+            await self.client.aclose()
+    
+    async def query(self, payload: Dict, deadline: Optional[float] = None,
+                    model_name: Optional[str] = None, in_flight: Optional[asyncio.Event] = None) -> Dict:
+        """Send request to Hugging Face API with proper error handling
+        
+        Loading (503) and rate-limit (429) responses are retried with backoff
+        until the retry policy gives up or the loop-time deadline passes.
+        Requests to a model whose circuit breaker is open fail immediately.
+        in_flight, when given, is set once the first attempt has a connection
+        slot and is actually sent.
+        """
+        if self.backend is not None:
+            return await self.backend.generate(payload)
+        
+        model_name = model_name or self.model_name
+        breaker = self.circuit_breakers.get(model_name)
+        if not breaker.allow_request():
+            return {"error": f"{model_name} is temporarily unavailable after repeated failures. Skipping the API call."}
+        
+        api_url = self.api_url if model_name == self.model_name else f"{HF_API_BASE_URL}{model_name}"
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        endpoint_ok = None
+        
         try:
-            response = requests.post(
-                self.api_url, 
-                headers=self.headers, 
-                json=payload,
-                timeout=30  # Add timeout
-            )
+            while True:
+                timeout = REQUEST_TIMEOUT
+                if deadline is not None:
+                    timeout = max(0.1, min(timeout, deadline - loop.time()))
+                
+                sent_at = []
+                
+                def mark_sent():
+                    sent_at.append(loop.time())
+                    if in_flight is not None:
+                        in_flight.set()
+                
+                result, status_code, retry_hint = await self._send(api_url, payload, timeout, mark_sent)
+                if status_code == 200 and sent_at:
+                    # Only the HTTP attempt counts towards hedging, not the backoff or the wait for a slot
+                    self.hedge_policy.record_latency(model_name, loop.time() - sent_at[0])
+                
+                # Timeouts, connection errors and 5xx count against the endpoint
+                endpoint_ok = status_code is not None and status_code < 500
+                
+                if status_code not in RETRYABLE_STATUS_CODES:
+                    if attempt:
+                        self.retry_policy.metrics.record_outcome(recovered=status_code == 200)
+                    return result
+                
+                delay = self.retry_policy.next_delay(attempt, retry_hint)
+                if delay is None or (deadline is not None and loop.time() + delay > deadline):
+                    self.retry_policy.metrics.record_outcome(recovered=False)
+                    return result
+                
+                self.retry_policy.metrics.record_retry(status_code, delay)
+                logger.info(f"Retrying {model_name} after HTTP {status_code} in {delay:.1f}s (attempt {attempt + 1})")
+                await asyncio.sleep(delay)
+                attempt += 1
+        finally:
+            breaker.record(endpoint_ok)
+    
+    async def _hedged_query(self, make_payload: Callable[[str], Dict], deadline: Optional[float], model_name: str,
+                            is_valid: Callable[[object], bool]) -> Tuple[object, str]:
+        """Query model_name, also asking a second model when the first is slower than usual
+        
+        make_payload builds the payload for a given model. Once model_name has
+        been silent for its observed p95 latency, the same prompt goes to the
+        model from _hedge_model. The first result that
+        passes is_valid wins and the other request is cancelled. Returns
+        (result, model that served it); when neither result is valid, the
+        primary's result is returned.
+        """
+        hedge_model = self._hedge_model(model_name)
+        delay = self.hedge_policy.hedge_delay(model_name) if hedge_model else None
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        if delay is not None and deadline is not None and started + delay >= deadline:
+            # No time left for a backup to make a difference
+            delay = None
+        
+        if delay is None:
+            primary = asyncio.ensure_future(self.query(make_payload(model_name), deadline, model_name))
+        else:
+            in_flight = asyncio.Event()
+            primary = asyncio.ensure_future(self.query(make_payload(model_name), deadline, model_name, in_flight))
+        tasks = {primary: model_name}
+        results = {}
+        winner = None
+        primary_latency = None
+        try:
+            if delay is not None:
+                # Waiting for a connection slot is local queueing, not the model being slow
+                sent = asyncio.ensure_future(in_flight.wait())
+                await asyncio.wait([primary, sent], return_when=asyncio.FIRST_COMPLETED)
+                sent.cancel()
+            done, pending = await asyncio.wait([primary], timeout=delay)
+            if pending and self._semaphore.locked():
+                # A backup would only queue behind the same requests
+                logger.info(f"{model_name} is slow but every connection slot is busy; not hedging")
+            elif pending:
+                logger.info(f"{model_name} is slower than its p95 of {delay:.1f}s; hedging with {hedge_model}")
+                backup = self.query(make_payload(hedge_model), deadline, hedge_model)
+                tasks[asyncio.ensure_future(backup)] = hedge_model
+            pending = set(tasks)
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                served = loop.time() - started
+                # The primary wins ties
+                for task in sorted(done, key=lambda task: task is not primary):
+                    results[task] = task.result()
+                    if task is primary:
+                        primary_latency = served
+                    try:
+                        valid = is_valid(results[task])
+                    except Exception as e:
+                        logger.error(f"Error validating API response: {e}")
+                        valid = False
+                    if valid:
+                        winner = task
+                        break
+        finally:
+            losers = [task for task in tasks if not task.done()]
+            for task in losers:
+                task.cancel()
+            if losers:
+                # Let cancelled requests release their connection and circuit breaker slot
+                await asyncio.gather(*losers, return_exceptions=True)
+        
+        hedged = len(tasks) > 1
+        unhedged = primary_latency
+        if unhedged is None:
+            unhedged = self.hedge_policy.estimate_latency(model_name, served)
+            # The primary ran at least this long; leaving it out would make the model look faster than it is
+            self.hedge_policy.record_latency(model_name, served)
+        self.hedge_policy.metrics.record(
+            hedged=hedged,
+            hedge_won=hedged and winner is not None and winner is not primary,
+            served=served,
+            unhedged=unhedged
+        )
+        
+        if winner is None:
+            winner = primary
+        return results[winner], tasks[winner]
+    
+    async def _send(self, api_url: str, payload: Dict, timeout: float,
+                    on_sent: Optional[Callable[[], None]] = None):
+        """Make a single API request
+        
+        Returns (result, status_code, retry_hint). status_code is None when the
+        request never got a response, and retry_hint is the server-suggested
+        wait in seconds, if any. on_sent is called once a connection slot is
+        free and the request goes out.
+        """
+        try:
+            async with self._semaphore:
+                if on_sent is not None:
+                    on_sent()
+                response = await self.client.post(
+                    api_url, 
+                    headers=self.headers, 
+                    json=payload,
+                    timeout=timeout
+                )
             
             # Check if the response is successful
             if response.status_code == 200:
-                return response.json()
+                return response.json(), 200, None
             elif response.status_code == 503:
-                return {"error": "Model is currently loading. Please try again in a few moments."}
+                return (
+                    {"error": "Model is currently loading. Please try again in a few moments."},
+                    503,
+                    parse_retry_hint(response)
+                )
             elif response.status_code == 401:
-                return {"error": "Invalid API token. Please check your Hugging Face API token."}
+                return {"error": "Invalid API token. Please check your Hugging Face API token."}, 401, None
             elif response.status_code == 429:
-                return {"error": "Rate limit exceeded. Please wait before making another request."}
+                return (
+                    {"error": "Rate limit exceeded. Please wait before making another request."},
+                    429,
+                    parse_retry_hint(response)
+                )
             else:
-                return {"error": f"API request failed with status {response.status_code}: {response.text}"}
+                return (
+                    {"error": f"API request failed with status {response.status_code}: {response.text}"},
+                    response.status_code,
+                    parse_retry_hint(response)
+                )
                 
-        except requests.exceptions.Timeout:
-            return {"error": "Request timed out. Please try again."}
-        except requests.exceptions.ConnectionError:
-            return {"error": "Connection error. Please check your internet connection."}
-        except requests.exceptions.RequestException as e:
-            return {"error": f"Request failed: {str(e)}"}
+        except httpx.TimeoutException:
+            return {"error": "Request timed out. Please try again."}, None, None
+        except httpx.NetworkError:
+            return {"error": "Connection error. Please check your internet connection."}, None, None
+        except httpx.HTTPError as e:
+            return {"error": f"Request failed: {str(e)}"}, None, None
         except Exception as e:
-            return {"error": f"Unexpected error: {str(e)}"}
+            return {"error": f"Unexpected error: {str(e)}"}, None, None
     
-    def convert_to_notes(self, messy_text: str) -> str:
-        """Convert messy text to structured Notion-style notes"""
+    async def convert_to_notes(self, messy_text: str, messages: Optional[List] = None,
+                               engine: Optional[str] = None) -> str:
+        """Convert messy text to structured Notion-style notes
         
+        User-facing problems are appended to messages as (level, text) pairs,
+        where level is a Streamlit call name ("error", "warning", "info").
+        When messages is None they are logged instead. engine overrides the
+        converter's default engine for this request.
+        """
         # Validate input
         if not messy_text or len(messy_text.strip()) < 10:
             return "❌ *Error:* Please provide more text content (at least 10 characters)."
         
-        # Truncate if too long to avoid API limits
-        if len(messy_text) > 1000:
-            messy_text = messy_text[:1000] + "..."
-            st.warning("⚠ Text was truncated to 1000 characters to avoid API limits.")
+        engine = engine or self.engine
+        if self._use_offline_engine(messy_text, engine, messages):
+            return generate_offline_notes(messy_text)
+        
+        # Split long text into token-budgeted chunks instead of truncating it
+        chunks = split_into_chunks(messy_text, self.chunk_token_budget)
+        deadline = asyncio.get_running_loop().time() + self.retry_policy.deadline
+        results = await asyncio.gather(*(self._convert_chunk(chunk, deadline, engine) for chunk in chunks))
+        
+        partial_notes = self._collect_notes(chunks, results, messages)
+        if len(chunks) > 1 and all(result["notes"] is None for result in results):
+            # One document-wide pass reads better than stitched per-chunk fallbacks
+            return generate_offline_notes(messy_text)
+        return assemble_notes(partial_notes)
+    
+    async def stream_notes(self, messy_text: str, messages: Optional[List] = None,
+                           engine: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield progressively longer notes while the model generates them
+        
+        Every yielded value is the whole document so far; the last one is the
+        final notes. messages and engine work as in convert_to_notes.
+        """
+        # Validate input
+        if not messy_text or len(messy_text.strip()) < 10:
+            yield "❌ *Error:* Please provide more text content (at least 10 characters)."
+            return
+        
+        engine = engine or self.engine
+        if self._use_offline_engine(messy_text, engine, messages):
+            yield generate_offline_notes(messy_text)
+            return
+        
+        chunks = split_into_chunks(messy_text, self.chunk_token_budget)
+        deadline = asyncio.get_running_loop().time() + self.retry_policy.deadline
+        
+        # The first chunk streams so tokens arrive early; the rest convert concurrently meanwhile
+        later = [asyncio.ensure_future(self._convert_chunk(chunk, deadline, engine)) for chunk in chunks[1:]]
+        try:
+            outcome = {}
+            async for partial in self._stream_chunk(chunks[0], deadline, outcome, engine):
+                yield partial
+            results = [outcome]
+            
+            # Later chunks join in order as they finish, so the document is merged once per chunk
+            for chunk, task in zip(chunks[1:], later):
+                results.append(await task)
+                yield assemble_notes([
+                    result["notes"] if result["notes"] is not None else self.create_fallback_notes(part)
+                    for part, result in zip(chunks, results)
+                ])
+        finally:
+            # The caller may stop listening early
+            for task in later:
+                task.cancel()
+        
+        partial_notes = self._collect_notes(chunks, results, messages)
+        if len(chunks) > 1 and all(result["notes"] is None for result in results):
+            yield generate_offline_notes(messy_text)
+            return
+        yield assemble_notes(partial_notes)
+    
+    def _use_offline_engine(self, text: str, engine: str, messages: Optional[List] = None) -> bool:
+        """Return whether a request should skip the model, degrading to offline when nothing can serve it"""
+        if engine == ENGINE_OFFLINE:
+            return True
+        if engine == ENGINE_AI and is_tabular(text):
+            # Tables come out of the offline pipeline intact; a model would only garble them
+            logger.info("Input is mostly tables; building the notes offline")
+            return True
+        if self.backend is None and not self._api_available():
+            # Every endpoint's circuit is open, so waiting on the API would only end in the fallback
+            self._notify(messages, "info", "ℹ All models are unavailable right now, so these notes were built offline.")
+            return True
+        return False
+    
+    def builds_offline(self, engine: Optional[str] = None) -> bool:
+        """Return whether every request would skip the model right now, whatever its text"""
+        engine = engine or self.engine
+        return engine == ENGINE_OFFLINE or (self.backend is None and not self._api_available())
+    
+    def _api_available(self) -> bool:
+        """Return whether the configured model or any alternate would accept a request now"""
+        return any(self.circuit_breakers.get(model_name).is_available()
+                   for model_name in [self.model_name] + self.fallback_models)
+    
+    @staticmethod
+    def _notify(messages: Optional[List], level: str, text: str):
+        """Queue a user-facing message, or log it when there is nobody to show it to"""
+        if messages is not None:
+            messages.append((level, text))
+        else:
+            logger.warning(text)
+    
+    def _collect_notes(self, chunks: List[str], results: List[Dict], messages: Optional[List] = None) -> List[str]:
+        """Turn per-chunk results into partial notes, falling back where a chunk failed"""
+        def notify(level: str, text: str):
+            self._notify(messages, level, text)
+        
+        partial_notes = []
+        api_errors = []
+        incomplete_count = 0
+        for chunk, result in zip(chunks, results):
+            if result["notes"] is not None:
+                partial_notes.append(result["notes"])
+                continue
+            
+            if result["error"]:
+                api_errors.append(result["error"])
+            else:
+                incomplete_count += 1
+            partial_notes.append(self.create_fallback_notes(chunk))
+        
+        # Handle API errors
+        if api_errors:
+            error_msg = api_errors[0]
+            if len(chunks) > 1:
+                notify("error", f"❌ *API Error:* {error_msg} ({len(api_errors)}/{len(chunks)} parts used the fallback)")
+            else:
+                notify("error", f"❌ *API Error:* {error_msg}")
+            
+            # Provide fallback for certain errors
+            if "loading" in error_msg.lower():
+                notify("info", "💡 *Tip:* Try switching to a different model or wait a few minutes.")
+        
+        if incomplete_count:
+            notify("warning", "⚠ AI response seems incomplete. Using structured fallback.")
+        
+        alternate_models = sorted({result["model"] for result in results
+                                   if result["notes"] is not None and result["model"] != self.model_name
+                                   and not result.get("escalated") and not result.get("hedged")})
+        if alternate_models:
+            notify("info", f"ℹ {self.model_name} is unavailable right now, so {', '.join(alternate_models)} was used instead.")
+        
+        hedged_models = sorted({result["model"] for result in results
+                                if result["notes"] is not None and result.get("hedged") and not result.get("escalated")})
+        if hedged_models:
+            notify("info", f"ℹ {self.model_name} was slow to answer, so {', '.join(hedged_models)} was used instead.")
+        
+        escalated_models = sorted({result["model"] for result in results
+                                   if result["notes"] is not None and result.get("escalated")})
+        if escalated_models:
+            notify("info", f"ℹ Notes from {self.model_name} scored low, so {', '.join(escalated_models)} was used to improve them.")
+        
+        return partial_notes
+    
+    def _select_model(self) -> str:
+        """Return the configured model, or the first healthy alternate while its circuit is open"""
+        if self.circuit_breakers.get(self.model_name).is_available():
+            return self.model_name
+        for model_name in self.fallback_models:
+            if self.circuit_breakers.get(model_name).is_available():
+                return model_name
+        return self.model_name
+    
+    def _escalation_ladder(self) -> List[str]:
+        """Return the models to try for one chunk: the selected one, then healthy stronger alternates"""
+        first = self._select_model()
+        if self.backend is not None or self.escalation_steps <= 0:
+            # A local backend serves exactly one model
+            return [first]
+        
+        rank = {model_name: position for position, model_name in enumerate(ESCALATION_LADDER)}
+        candidates = set(self.fallback_models) | {self.model_name}
+        stronger = [
+            model_name for model_name in ESCALATION_LADDER
+            if model_name in candidates and rank[model_name] > rank.get(first, len(ESCALATION_LADDER))
+            and self.circuit_breakers.get(model_name).is_available()
+        ]
+        return [first] + stronger[:self.escalation_steps]
+    
+    def _hedge_model(self, model_name: str) -> Optional[str]:
+        """Return a healthy model at least as strong as model_name to hedge its requests with, if any"""
+        if self.backend is not None:
+            return None
+        rank = {name: position for position, name in enumerate(ESCALATION_LADDER)}
+        floor = rank.get(model_name, -1)
+        candidates = [name for name in [self.model_name] + self.fallback_models
+                      if name != model_name and rank.get(name, len(ESCALATION_LADDER)) >= floor]
+        # The closest in strength is likely the closest in latency
+        for name in sorted(candidates, key=lambda name: rank.get(name, len(ESCALATION_LADDER))):
+            if self.circuit_breakers.get(name).is_available():
+                return name
+        return None
+    
+    def _build_payload(self, chunk: str, skeleton: Optional[NoteSkeleton] = None,
+                       model_name: Optional[str] = None, new_tokens: Optional[int] = None) -> Dict:
+        """Build the Inference API payload for one chunk
         
-        # Create a focused prompt for note conversion
-        conversion_prompt = f"""Convert the following messy text into clean, structured Notion-style notes with proper headings, bullet points, and formatting:
+        With a skeleton the model only continues the summary bullet list,
+        since headings, topics and action items are already extracted.
+        new_tokens is the output budget from plan_new_tokens, which is then
+        fitted to the model's profile and context window.
+        """
+        model_name = model_name or self.model_name
+        if new_tokens is None:
+            new_tokens = self._plan_new_tokens(chunk, skeleton)
+        if skeleton is None:
+            # Create a focused prompt for note conversion
+            conversion_prompt = f"""Convert the following messy text into clean, structured Notion-style notes with proper headings, bullet points, and formatting:
 
-Input: {messy_text}
+Input: {chunk}
 
 Output: """
+        else:
+            conversion_prompt = f"""Summarize the following text in a few short bullet points. The notes already have these sections:
+{format_skeleton_outline(skeleton)}
+
+Input: {chunk}
+
+Output:
+## Summary
+- """
+        
+        profile = model_profile(model_name)
+        room = profile["context_tokens"] - estimate_tokens(conversion_prompt)
+        max_new_tokens = max(MIN_NEW_TOKENS, min(new_tokens, profile["max_new_tokens"], room))
+        
+        parameters = {
+            "max_new_tokens": max_new_tokens,
+            "temperature": profile["temperature"],
+            "top_p": profile["top_p"],
+            "do_sample": True,
+            "repetition_penalty": profile["repetition_penalty"],
+            "return_full_text": False  # Only return generated text
+        }
+        if self.deterministic:
+            # Greedy decoding makes the output a pure function of the prompt
+            parameters["do_sample"] = False
+            del parameters["temperature"]
+            del parameters["top_p"]
         
-        payload = {
+        return {
             "inputs": conversion_prompt,
-            "parameters": {
-                "max_new_tokens": 300,  # Reduced to avoid timeout
-                "temperature": 0.3,
-                "top_p": 0.8,
-                "do_sample": True,
-                "repetition_penalty": 1.1,
-                "return_full_text": False  # Only return generated text
-            }
+            "parameters": parameters
         }
+    
+    def _plan_new_tokens(self, chunk: str, skeleton: Optional[NoteSkeleton] = None) -> int:
+        """Return the output budget for a chunk, extracting its structure when there is no skeleton"""
+        return plan_new_tokens(chunk, skeleton or build_skeleton(chunk), hybrid=skeleton is not None)
+    
+    def _cache_key(self, model_name: str, payload: Dict, skeleton: Optional[NoteSkeleton]) -> Optional[str]:
+        """Return the cache key for a payload, or None when the response must not be cached"""
+        # Sampled output is not reproducible, so only deterministic requests use the cache
+        if self.cache is None or not self.deterministic:
+            return None
+        backend = self.backend.identity if self.backend is not None else "api"
+        engine = ENGINE_HYBRID if skeleton is not None else ENGINE_AI
+        return make_cache_key(model_name, payload["inputs"], payload["parameters"], backend, engine)
+    
+    async def _convert_chunk(self, chunk: str, deadline: Optional[float] = None,
+                             engine: str = ENGINE_AI) -> Dict:
+        """Convert a single chunk, escalating to stronger models while the notes score poorly
         
-        # Add loading indicator
-        with st.spinner("🤖 AI is processing your text..."):
-            result = self.query(payload)
+        Returns a dict with "notes" set on success, or "notes" set to None and
+        "error" holding the API error (None when the response was unusable).
+        "model" names the model that served the chunk, "score" is the quality
+        score of its notes and "escalated" tells whether a stronger model than
+        the first one tried was needed.
+        """
+        self.escalation_counts["chunks"] += 1
+        skeleton = build_skeleton(chunk) if engine == ENGINE_HYBRID else None
+        new_tokens = self._plan_new_tokens(chunk, skeleton)
+        return await self._escalate(chunk, skeleton, new_tokens, self._escalation_ladder(), deadline)
+    
+    async def _escalate(self, chunk: str, skeleton: Optional[NoteSkeleton], new_tokens: int,
+                        ladder: List[str], deadline: Optional[float] = None,
+                        best: Optional[Dict] = None) -> Dict:
+        """Try models in ladder order until one writes notes that score well enough
         
-        # Handle API errors
-        if "error" in result:
-            error_msg = result["error"]
-            st.error(f"❌ *API Error:* {error_msg}")
+        best is a result already in hand, such as a streamed one, that later
+        steps must beat. Every step but the last gets a share of the time left.
+        Each model gets new_tokens fitted to its own profile.
+        """
+        loop = asyncio.get_running_loop()
+        counted = False
+        for step, model_name in enumerate(ladder):
+            escalated = best is not None
+            if escalated and best["error"]:
+                # API errors are not about quality; a stronger model would not help
+                break
+            if escalated and best["notes"] is not None and best["score"] >= ACCEPT_QUALITY_SCORE:
+                break
             
-            # Provide fallback for certain errors
-            if "loading" in error_msg.lower():
-                st.info("💡 *Tip:* Try switching to a different model or wait a few minutes.")
+            step_deadline = deadline
+            if deadline is not None and step < len(ladder) - 1:
+                step_deadline = loop.time() + (deadline - loop.time()) * ESCALATION_STEP_SHARE
             
-            return self.create_fallback_notes(messy_text)
+            if escalated and not counted:
+                self.escalation_counts["escalated"] += 1
+                counted = True
+            result = await self._generate_notes(chunk, skeleton, new_tokens, model_name, step_deadline)
+            result["escalated"] = escalated
+            if best is None or (result["notes"] is not None and
+                                (best["notes"] is None or result["score"] > best["score"])):
+                best = result
+        
+        if best["notes"] is not None and best["score"] < MIN_QUALITY_SCORE:
+            logger.info(f"Best notes scored {best['score']:.2f}; using the fallback instead")
+            return {"notes": None, "error": None, "model": best["model"], "score": best["score"],
+                    "escalated": best["escalated"]}
+        if best["escalated"] and best["notes"] is not None:
+            self.escalation_counts["improved"] += 1
+        return best
+    
+    async def _generate_notes(self, chunk: str, skeleton: Optional[NoteSkeleton], new_tokens: int,
+                              model_name: str, deadline: Optional[float] = None) -> Dict:
+        """Ask one model for notes and score them; returns the same keys as _convert_chunk"""
+        def make_payload(name: str) -> Dict:
+            return self._build_payload(chunk, skeleton, name, new_tokens)
+        
+        cache_key = self._cache_key(model_name, make_payload(model_name), skeleton)
+        if cache_key is not None:
+            cached_notes = self.cache.get(cache_key)
+            if cached_notes is not None:
+                return {"notes": cached_notes, "error": None, "model": model_name, "score": 1.0}
+        
+        result, served_by = await self._hedged_query(
+            make_payload, deadline, model_name, lambda result: self._read_notes(skeleton, result) is not None
+        )
+        hedged = served_by != model_name
+        model_name = served_by
+        payload = make_payload(model_name)
+        
+        # Handle API errors
+        if isinstance(result, dict) and "error" in result:
+            return {"notes": None, "error": result["error"], "model": model_name, "score": None}
         
         # Process successful response
         try:
-            if isinstance(result, list) and len(result) > 0:
-                generated_text = result[0].get("generated_text", "")
-            elif isinstance(result, dict) and "generated_text" in result:
-                generated_text = result["generated_text"]
-            else:
-                generated_text = str(result)
-            
-            # Clean up the generated text
-            if "Output:" in generated_text:
-                response = generated_text.split("Output:")[-1].strip()
-            else:
-                response = generated_text.strip()
-            
-            # Remove any remaining prompt text
-            if "Input:" in response:
-                response = response.split("Input:")[-1].strip()
+            notes = self._read_notes(skeleton, result)
             
             # Validate response quality
-            if len(response) < 20 or not any(char in response for char in ['#', '*', '-']):
-                st.warning("⚠ AI response seems incomplete. Using structured fallback.")
-                return self.create_fallback_notes(messy_text)
+            if notes is None:
+                return {"notes": None, "error": None, "model": model_name, "score": None}
+            
+            completion, response = notes
+            score = self._score(chunk, skeleton, payload, completion)
+            cache_key = self._cache_key(model_name, payload, skeleton)
+            if cache_key is not None and score >= ACCEPT_QUALITY_SCORE:
+                self.cache.set(cache_key, response)
             
-            return response
+            return {"notes": response, "error": None, "model": model_name, "score": score, "hedged": hedged}
             
         except Exception as e:
             logger.error(f"Error processing API response: {e}")
-            return self.create_fallback_notes(messy_text)
+            return {"notes": None, "error": None, "model": model_name, "score": None}
+    
+    @staticmethod
+    def _read_notes(skeleton: Optional[NoteSkeleton], result) -> Optional[Tuple[str, str]]:
+        """Return (completion, notes) from an API result, or None when it is an error or unusable"""
+        if isinstance(result, dict) and "error" in result:
+            return None
+        if isinstance(result, list) and len(result) > 0:
+            generated_text = result[0].get("generated_text", "")
+        elif isinstance(result, dict) and "generated_text" in result:
+            generated_text = result["generated_text"]
+        else:
+            generated_text = str(result)
+        
+        completion = clean_generated_text(generated_text)
+        response = fill_skeleton(skeleton, completion)
+        if not is_usable_notes(response):
+            return None
+        return completion, response
+    
+    def _score(self, chunk: str, skeleton: Optional[NoteSkeleton], payload: Dict, completion: str) -> float:
+        """Score the model's own contribution: the whole notes, or the summary bullets in hybrid mode"""
+        if skeleton is not None:
+            # The prompt ended with "- ", so the completion starts inside a bullet
+            completion = f"- {completion}"
+        instructions = payload["inputs"].replace(chunk, "")
+        return score_notes(completion, chunk, instructions)["score"]
+    
+    async def _stream_chunk(self, chunk: str, deadline: Optional[float], outcome: Dict,
+                            engine: str = ENGINE_AI) -> AsyncIterator[str]:
+        """Yield the cleaned notes for one chunk as tokens arrive
+        
+        When the stream ends, outcome is filled in with the same keys that
+        _convert_chunk returns. A stream that starts looping is cut off where
+        the loop began. Streamed notes that score poorly are replaced by a
+        stronger model's, as in _convert_chunk.
+        """
+        self.escalation_counts["chunks"] += 1
+        ladder = self._escalation_ladder()
+        model_name = ladder[0]
+        skeleton = build_skeleton(chunk) if engine == ENGINE_HYBRID else None
+        new_tokens = self._plan_new_tokens(chunk, skeleton)
+        payload = self._build_payload(chunk, skeleton, model_name, new_tokens)
+        
+        cache_key = self._cache_key(model_name, payload, skeleton)
+        if cache_key is not None:
+            cached_notes = self.cache.get(cache_key)
+            if cached_notes is not None:
+                outcome.update(notes=cached_notes, error=None, model=model_name, score=1.0, escalated=False)
+                yield cached_notes
+                return
+        
+        # Tokens are parsed as they arrive, so cleaning the whole stream costs one pass
+        parser = MarkdownParser()
+        detector = DegenerationDetector()
+        tokens = []
+        received = False
+        stream = self.stream_query(payload, deadline, model_name)
+        try:
+            async for token in stream:
+                received = True
+                tokens.append(token)
+                if detector.feed(token):
+                    # Stop paying for a loop; the text before it may still be worth keeping
+                    logger.info(f"{model_name} started repeating itself; stopping generation early")
+                    self.escalation_counts["stopped_early"] += 1
+                    parser = parse_markdown("".join(tokens)[:detector.loop_start])
+                    response = fill_skeleton(skeleton, parser.render())
+                    if response:
+                        yield response
+                    break
+                parser.feed(token)
+                response = fill_skeleton(skeleton, parser.render())
+                if response:
+                    yield response
+        except StreamingError as e:
+            if not received:
+                # Nothing streamed yet: use the buffered path, which knows how to retry
+                logger.info(f"Streaming unavailable for {model_name} ({e}); using a buffered request")
+                outcome.update(await self._escalate(chunk, skeleton, new_tokens, ladder, deadline))
+                if outcome["notes"] is not None:
+                    yield outcome["notes"]
+                return
+            logger.warning(f"Stream from {model_name} ended early: {e}")
+        finally:
+            # Closing the stream drops the connection, so the server stops generating
+            await stream.aclose()
+        
+        parser.close()
+        completion = parser.render()
+        response = fill_skeleton(skeleton, completion)
+        
+        # Validate response quality
+        streamed = {"notes": None, "error": None, "model": model_name, "score": None, "escalated": False}
+        if is_usable_notes(response):
+            streamed.update(notes=response, score=self._score(chunk, skeleton, payload, completion))
+        if streamed["notes"] is not None and streamed["score"] >= ACCEPT_QUALITY_SCORE:
+            if cache_key is not None:
+                self.cache.set(cache_key, response)
+            outcome.update(streamed)
+            return
+        
+        outcome.update(await self._escalate(chunk, skeleton, new_tokens, ladder[1:], deadline, streamed))
+        if outcome["notes"] is not None and outcome["notes"] != response:
+            yield outcome["notes"]
+    
+    async def stream_query(self, payload: Dict, deadline: Optional[float] = None,
+                           model_name: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield generated token text from the Inference API's server-sent event stream
+        
+        Raises StreamingError when the request fails; tokens yielded before
+        the failure remain valid.
+        """
+        if self.backend is not None:
+            try:
+                async for text in self.backend.stream(payload):
+                    yield text
+            except BackendError as e:
+                raise StreamingError(str(e))
+            return
+        
+        model_name = model_name or self.model_name
+        breaker = self.circuit_breakers.get(model_name)
+        if not breaker.allow_request():
+            raise StreamingError(f"{model_name} is temporarily unavailable after repeated failures")
+        
+        api_url = self.api_url if model_name == self.model_name else f"{HF_API_BASE_URL}{model_name}"
+        timeout = REQUEST_TIMEOUT
+        if deadline is not None:
+            timeout = max(0.1, min(timeout, deadline - asyncio.get_running_loop().time()))
+        
+        endpoint_ok = None
+        try:
+            async with self._semaphore:
+                async with self.client.stream(
+                    "POST",
+                    api_url,
+                    headers=self.headers,
+                    json={**payload, "stream": True},
+                    timeout=timeout
+                ) as response:
+                    endpoint_ok = response.status_code < 500
+                    if response.status_code != 200:
+                        await response.aread()
+                        raise StreamingError(f"API request failed with status {response.status_code}")
+                    
+                    # Endpoints without streaming support answer with a single JSON body
+                    if not response.headers.get("content-type", "").startswith("text/event-stream"):
+                        await response.aread()
+                        result = response.json()
+                        if isinstance(result, list) and len(result) > 0:
+                            yield result[0].get("generated_text", "")
+                        elif isinstance(result, dict) and "generated_text" in result:
+                            yield result["generated_text"]
+                        return
+                    
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        event = json.loads(line[len("data:"):])
+                        if "error" in event:
+                            raise StreamingError(event["error"])
+                        token = event.get("token") or {}
+                        if token.get("special"):
+                            continue
+                        if token.get("text"):
+                            yield token["text"]
+        except httpx.TimeoutException:
+            endpoint_ok = False
+            raise StreamingError("Request timed out")
+        except httpx.HTTPError as e:
+            endpoint_ok = False
+            raise StreamingError(f"Request failed: {str(e)}")
+        except ValueError as e:
+            raise StreamingError(f"Malformed stream event: {str(e)}")
+        finally:
+            breaker.record(endpoint_ok)
+    
+    def connection_stats(self) -> Dict:
+        """Return connection reuse counters for the HTTP pool"""
+        return self.transport.stats()
+    
+    def retry_stats(self) -> Dict:
+        """Return retry counters for this converter's retry policy"""
+        return self.retry_policy.metrics.snapshot()
+    
+    def escalation_stats(self) -> Dict:
+        """Return how many chunks needed a stronger model, how often it helped, and how many looping streams were stopped"""
+        return dict(self.escalation_counts)
+    
+    def hedge_stats(self) -> Dict:
+        """Return how often requests were hedged, how often the backup won, and the estimated p95 latency saved"""
+        return self.hedge_policy.metrics.snapshot()
     
     def create_fallback_notes(self, text: str) -> str:
         """Create a basic structured note when AI fails"""
-        try:
-            lines = [line.strip() for line in text.split('\n') if line.strip()]
-            sentences = [s.strip() for s in text.split('.') if s.strip()]
-            
-            notes = "# 📝 Structured Notes\n\n"
-            
-            # Add summary
-            notes += "## 📋 Summary\n"
-            notes += f"- Content contains {len(sentences)} key points\n"
-            notes += f"- Organized into {min(len(lines), 10)} main items\n"
-            notes += f"- Word count: approximately {len(text.split())} words\n\n"
-            
-            # Add main content
-            notes += "## 📌 Key Points\n\n"
-            
-            if lines:
-                for i, line in enumerate(lines[:8], 1):  # Limit to 8 lines
-                    if len(line) > 10:  # Only include substantial lines
-                        notes += f"{i}.** {line}\n\n"
-            else:
-                # Fallback to sentences
-                for i, sentence in enumerate(sentences[:6], 1):  # Limit to 6 sentences
-                    if len(sentence) > 15:
-                        notes += f"- {sentence.strip()}.\n"
-            
-            # Add action items if keywords found
-            action_keywords = ['need', 'should', 'must', 'todo', 'action', 'follow up', 'complete']
-            if any(keyword in text.lower() for keyword in action_keywords):
-                notes += "\n## ✅ Action Items\n"
-                notes += "- Review and organize the above points\n"
-                notes += "- Follow up on any mentioned tasks\n"
-                notes += "- Add more details where needed\n"
-            
-            return notes
-            
-        except Exception as e:
-            logger.error(f"Error in fallback notes creation: {e}")
-            return f"# 📝 Notes\n\n## Content\n\n{text}\n\n*Note: Automatic structuring failed, showing original content.*"
+        return generate_offline_notes(text)
+
+
+class NotionNotesConverter:
+    """Synchronous wrapper around AsyncNotionNotesConverter for Streamlit and scripts"""
+    
+    def __init__(self, api_token: str, model_name: str = "gpt2",
+                 chunk_token_budget: int = DEFAULT_CHUNK_TOKENS,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_connections_per_host: int = DEFAULT_MAX_CONNECTIONS_PER_HOST,
+                 keep_alive: float = DEFAULT_KEEP_ALIVE,
+                 cache: Optional[NotesCache] = None,
+                 deterministic: bool = False,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 fallback_models: Optional[List[str]] = None,
+                 backend: Optional[InferenceBackend] = None,
+                 engine: str = ENGINE_AI,
+                 escalation_steps: int = DEFAULT_ESCALATION_STEPS,
+                 hedge_policy: Optional[HedgePolicy] = None):
+        # Shared across converters and Streamlit sessions so connections are reused
+        self._loop_thread = get_event_loop_thread()
+        transport = get_http_transport(max_connections, max_connections_per_host, keep_alive)
+        self.async_converter = AsyncNotionNotesConverter(
+            api_token,
+            model_name,
+            chunk_token_budget=chunk_token_budget,
+            max_concurrency=max_concurrency,
+            transport=transport,
+            cache=cache,
+            deterministic=deterministic,
+            retry_policy=retry_policy or get_retry_policy(),
+            circuit_breakers=get_circuit_breakers(),
+            fallback_models=fallback_models,
+            backend=backend,
+            engine=engine,
+            escalation_steps=escalation_steps,
+            hedge_policy=hedge_policy or get_hedge_policy()
+        )
+    
+    @property
+    def model_name(self) -> str:
+        return self.async_converter.model_name
+    
+    @property
+    def api_url(self) -> str:
+        return self.async_converter.api_url
+    
+    @api_url.setter
+    def api_url(self, value: str):
+        self.async_converter.api_url = value
+    
+    @property
+    def chunk_token_budget(self) -> int:
+        return self.async_converter.chunk_token_budget
+    
+    @property
+    def deterministic(self) -> bool:
+        return self.async_converter.deterministic
+    
+    @property
+    def cache(self) -> Optional[NotesCache]:
+        return self.async_converter.cache
+    
+    @property
+    def backend(self) -> Optional[InferenceBackend]:
+        return self.async_converter.backend
+    
+    @property
+    def engine(self) -> str:
+        return self.async_converter.engine
+    
+    def query(self, payload: Dict) -> Dict:
+        """Send request to Hugging Face API with proper error handling"""
+        return self._loop_thread.run(self.async_converter.query(payload))
+    
+    def convert_to_notes(self, messy_text: str, engine: Optional[str] = None) -> str:
+        """Convert messy text to structured Notion-style notes"""
+        chunk_count = len(split_into_chunks(messy_text, self.chunk_token_budget)) if messy_text else 1
+        
+        # Add loading indicator
+        spinner_text = "🤖 AI is processing your text..."
+        if (engine or self.engine) == ENGINE_OFFLINE:
+            spinner_text = "📝 Building notes offline..."
+        elif chunk_count > 1:
+            spinner_text = f"🤖 AI is processing your text in {chunk_count} parts..."
+        
+        messages = []
+        with st.spinner(spinner_text):
+            notes = self._loop_thread.run(self.async_converter.convert_to_notes(messy_text, messages, engine))
+        
+        # Streamlit calls must happen on the script thread, not the event loop
+        for level, text in messages:
+            getattr(st, level)(text)
+        
+        return notes
+    
+    def stream_notes(self, messy_text: str, engine: Optional[str] = None) -> Iterator[str]:
+        """Yield progressively longer notes while the model generates them"""
+        messages = []
+        yield from self._loop_thread.iterate(self.async_converter.stream_notes(messy_text, messages, engine))
+        
+        # Streamlit calls must happen on the script thread, not the event loop
+        for level, text in messages:
+            getattr(st, level)(text)
+    
+    def connection_stats(self) -> Dict:
+        """Return connection reuse counters for the shared HTTP pool"""
+        return self.async_converter.connection_stats()
+    
+    def retry_stats(self) -> Dict:
+        """Return retry counters for the shared retry policy"""
+        return self.async_converter.retry_stats()
+    
+    def escalation_stats(self) -> Dict:
+        """Return how many chunks needed a stronger model, and how often it helped"""
+        return self.async_converter.escalation_stats()
+    
+    def hedge_stats(self) -> Dict:
+        """Return hedging counters for the shared hedge policy"""
+        return self.async_converter.hedge_stats()
+    
+    def create_fallback_notes(self, text: str) -> str:
+        """Create a basic structured note when AI fails"""
+        return self.async_converter.create_fallback_notes(text)
+
 
 def initialize_session_state():
     """Initialize session state variables"""
@@ -261,6 +1903,26 @@ def initialize_session_state():
         st.session_state.conversion_history = []
     if "converter_instance" not in st.session_state:
         st.session_state.converter_instance = None
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    if "registry_keys" not in st.session_state:
+        st.session_state.registry_keys = set()
+    if "history_index" not in st.session_state:
+        st.session_state.history_index = {}  # tag -> positions in conversion_history
+
+def record_conversion(user_input: str, structured_notes: str, model: str):
+    """Save a conversion to history and index it by the keyphrase tags of its input"""
+    tags = make_tags(extract_keyphrases(user_input))
+    st.session_state.conversion_history.append({
+        "input": user_input,
+        "output": structured_notes,
+        "timestamp": time.strftime("%Y-%m-%d %H:%M"),
+        "model": model,
+        "tags": tags
+    })
+    position = len(st.session_state.conversion_history) - 1
+    for tag in tags:
+        st.session_state.history_index.setdefault(tag, []).append(position)
 
 def display_conversion_history():
     """Display conversion history with error handling"""
@@ -268,8 +1930,19 @@ def display_conversion_history():
         if st.session_state.conversion_history:
             st.subheader("📚 Recent Conversions")
             
+            # Narrow the history down to one tag
+            history = st.session_state.conversion_history
+            if st.session_state.history_index:
+                selected_tag = st.selectbox(
+                    "🏷 Filter by tag:",
+                    ["All"] + sorted(st.session_state.history_index),
+                    key="history_tag_filter"
+                )
+                if selected_tag != "All":
+                    history = [history[position] for position in st.session_state.history_index[selected_tag]]
+            
             # Show only last 3 conversions to avoid UI clutter
-            recent_conversions = list(reversed(st.session_state.conversion_history[-3:]))
+            recent_conversions = list(reversed(history[-3:]))
             
             for i, conversion in enumerate(recent_conversions):
                 timestamp = conversion.get('timestamp', 'Unknown time')
@@ -292,6 +1965,9 @@ def display_conversion_history():
                     with col2:
                         st.markdown("✨ Structured Notes:")
                         st.markdown(conversion["output"])
+                    
+                    if conversion.get("tags"):
+                        st.caption(" ".join(f"#{tag}" for tag in conversion["tags"]))
     except Exception as e:
         logger.error(f"Error displaying history: {e}")
         st.error("Error loading conversion history.")
@@ -303,7 +1979,19 @@ def validate_api_token(token: str) -> bool:
     # Basic validation - HF tokens typically start with 'hf_'
     return len(token) > 20 and (token.startswith('hf_') or len(token) > 30)
 
+def configure_page():
+    """Set page config and styling; must run before any other Streamlit output"""
+    st.set_page_config(
+        page_title="Notion Notes Converter",
+        page_icon="📝",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
 def main():
+    configure_page()
+    
     try:
         st.title("📝 Notion Notes Converter")
         st.markdown("*Transform messy text, transcripts, or raw ideas into clean, structured Notion-style notes!*")
@@ -314,6 +2002,18 @@ def main():
         with st.sidebar:
             st.header("⚙ Configuration")
             
+            # Inference backend - local models are only offered when torch/transformers are installed
+            backend_options = [BACKEND_API]
+            if local_backend_available():
+                backend_options.append(BACKEND_LOCAL)
+            backend_options.append(BACKEND_OFFLINE)
+            selected_backend = st.radio(
+                "🖥 Inference Backend",
+                backend_options,
+                help="Local runs the selected model on this machine from LOCAL_MODELS_DIR. "
+                     "Offline builds notes with rules only: no token, no model, same notes every time."
+            )
+            
             # Get API token
             api_token = None
             
@@ -366,6 +2066,29 @@ def main():
             if selected_model in model_info:
                 st.info(f"ℹ {model_info[selected_model]}")
             
+            if get_circuit_breakers().get(selected_model).state != CircuitBreaker.CLOSED:
+                st.warning("⚠ This model has been failing repeatedly. Requests go to another model or the offline fallback for now.")
+            
+            deterministic = st.checkbox(
+                "🎯 Deterministic output",
+                value=False,
+                help="Turns off sampling so identical text gives identical notes and repeats are served from cache"
+            )
+            
+            stream_output = st.checkbox(
+                "⚡ Stream output",
+                value=True,
+                help="Show notes as they are generated instead of waiting for the full response"
+            )
+            
+            skeleton_guided = st.checkbox(
+                "🧩 Skeleton-guided generation",
+                value=False,
+                disabled=selected_backend == BACKEND_OFFLINE,
+                help="Build headings, topics and action items locally and let the model write only the summary. "
+                     "Faster, and more reliable with small models"
+            )
+            
             # Features info
             st.markdown("---")
             st.markdown("📋 *Features*")
@@ -380,6 +2103,7 @@ def main():
             # Clear history
             if st.button("🗑 Clear History", help="Clear all conversion history"):
                 st.session_state.conversion_history = []
+                st.session_state.history_index = {}
                 st.rerun()
             
             # Statistics
@@ -387,9 +2111,38 @@ def main():
                 st.markdown("---")
                 st.markdown("📊 *Stats*")
                 st.metric("Total Conversions", len(st.session_state.conversion_history))
+                if st.session_state.converter_instance is not None:
+                    pool_stats = st.session_state.converter_instance.connection_stats()
+                    st.metric(
+                        "Connections Reused",
+                        f"{pool_stats['connections_reused']}/{pool_stats['requests']}",
+                        help=f"{pool_stats['connections_opened']} connection(s) opened in this process"
+                    )
+                    cache_stats = get_notes_cache(NOTES_CACHE_PATH).stats()
+                    st.metric("Cache Hits", f"{cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']}")
+                    retry_stats = st.session_state.converter_instance.retry_stats()
+                    st.metric(
+                        "API Retries",
+                        retry_stats["retries"],
+                        help=f"{retry_stats['recovered']} recovered, {retry_stats['exhausted']} gave up"
+                    )
+                    escalation_stats = st.session_state.converter_instance.escalation_stats()
+                    st.metric(
+                        "Escalations",
+                        f"{escalation_stats['escalated']}/{escalation_stats['chunks']}",
+                        help=(f"Parts retried on a stronger model after weak notes; {escalation_stats['improved']} improved, "
+                              f"{escalation_stats['stopped_early']} looping generation(s) stopped early")
+                    )
+                    hedge_stats = st.session_state.converter_instance.hedge_stats()
+                    if hedge_stats["p95_latency"] is not None:
+                        hedge_help = (f"{hedge_stats['hedge_wins']} won by the backup model; p95 latency "
+                                      f"{hedge_stats['p95_latency']:.1f}s, about {hedge_stats['p95_saved']:.1f}s faster than without hedging")
+                    else:
+                        hedge_help = "Slow requests are also sent to a second model"
+                    st.metric("Hedged Requests", f"{hedge_stats['hedged']}/{hedge_stats['requests']}", help=hedge_help)
         
         # Main interface
-        if not api_token or not validate_api_token(api_token):
+        if selected_backend == BACKEND_API and (not api_token or not validate_api_token(api_token)):
             st.warning("⚠ Please provide a valid Hugging Face API token to start.")
             
             st.info("""
@@ -412,10 +2165,59 @@ def main():
             """)
             return
         
-        # Initialize converter
-        if (st.session_state.converter_instance is None or 
-            st.session_state.converter_instance.model_name != selected_model):
-            st.session_state.converter_instance = NotionNotesConverter(api_token, selected_model)
+        # Converters and models come from the shared registry instead of per-session copies
+        registry = get_resource_registry()
+        holder_id = st.session_state.session_id
+        registry_keys = set()
+        
+        backend = None
+        if selected_backend == BACKEND_LOCAL:
+            model_key = ("model", selected_model)
+            try:
+                with st.spinner("Loading model..."):
+                    backend = registry.acquire(model_key, holder_id, lambda: LocalModelBackend(selected_model))
+            except BackendError as e:
+                st.error(f"❌ *Local Backend Error:* {e}")
+                return
+            registry_keys.add(model_key)
+        
+        if selected_backend == BACKEND_OFFLINE:
+            engine = ENGINE_OFFLINE
+        elif skeleton_guided:
+            engine = ENGINE_HYBRID
+        else:
+            engine = ENGINE_AI
+        
+        # Tokens are part of the key so sessions never share each other's credentials, and the
+        # backend's identity ties a local converter to the currently loaded copy of its model
+        converter_key = (
+            "converter",
+            selected_backend,
+            engine,
+            selected_model,
+            token_fingerprint(api_token),
+            deterministic,
+            id(backend) if backend is not None else None
+        )
+        st.session_state.converter_instance = registry.acquire(
+            converter_key,
+            holder_id,
+            lambda: NotionNotesConverter(
+                api_token or "",
+                selected_model,
+                cache=get_notes_cache(NOTES_CACHE_PATH),
+                deterministic=deterministic,
+                fallback_models=model_options,
+                backend=backend,
+                engine=engine
+            )
+        )
+        registry_keys.add(converter_key)
+        
+        # Give up leases this session no longer uses
+        for key in st.session_state.registry_keys - registry_keys:
+            registry.release(key, holder_id)
+        st.session_state.registry_keys = registry_keys
         
         # Input section
         st.markdown("### 📝 Input Your Text")
@@ -435,15 +2237,16 @@ def main():
             value=example_texts[selected_example],
             height=150,
             placeholder="Paste your messy text, meeting notes, or ideas here...",
-            max_chars=2000  # Limit input length
+            max_chars=MAX_INPUT_CHARS  # Limit input length
         )
         
         # Character count
         if user_input:
             char_count = len(user_input)
-            st.caption(f"Characters: {char_count}/2000")
-            if char_count > 1500:
-                st.warning("⚠ Long text may be truncated for API limits.")
+            st.caption(f"Characters: {char_count}/{MAX_INPUT_CHARS}")
+            chunk_count = len(split_into_chunks(user_input, st.session_state.converter_instance.chunk_token_budget))
+            if chunk_count > 1:
+                st.info(f"ℹ Long text will be converted in {chunk_count} parts and merged.")
         
         # Convert button
         col1, col2, col3 = st.columns([1, 2, 1])
@@ -458,15 +2261,26 @@ def main():
         # Handle conversion
         if convert_button and user_input.strip():
             try:
-                # Generate structured notes
-                structured_notes = st.session_state.converter_instance.convert_to_notes(user_input)
-                
-                # Display result
-                st.markdown("---")
-                st.subheader("✅ Your Structured Notes")
-                
-                # Display with styling
-                st.markdown(structured_notes)
+                if stream_output:
+                    st.markdown("---")
+                    st.subheader("✅ Your Structured Notes")
+                    
+                    # Render partial notes as tokens arrive
+                    notes_placeholder = st.empty()
+                    notes_placeholder.info("🤖 AI is processing your text...")
+                    structured_notes = ""
+                    for structured_notes in st.session_state.converter_instance.stream_notes(user_input):
+                        notes_placeholder.markdown(structured_notes)
+                else:
+                    # Generate structured notes
+                    structured_notes = st.session_state.converter_instance.convert_to_notes(user_input)
+                    
+                    # Display result
+                    st.markdown("---")
+                    st.subheader("✅ Your Structured Notes")
+                    
+                    # Display with styling
+                    st.markdown(structured_notes)
                 
                 # Copy section
                 st.markdown("---")
@@ -475,12 +2289,11 @@ def main():
                 st.info("💡 Copy the markdown above and paste directly into Notion!")
                 
                 # Save to history
-                st.session_state.conversion_history.append({
-                    "input": user_input,
-                    "output": structured_notes,
-                    "timestamp": time.strftime("%Y-%m-%d %H:%M"),
-                    "model": selected_model
-                })
+                record_conversion(
+                    user_input,
+                    structured_notes,
+                    BACKEND_OFFLINE if selected_backend == BACKEND_OFFLINE else selected_model
+                )
                 
                 st.success("🎉 Conversion completed!")
                 
@@ -501,7 +2314,7 @@ def main():
         with col1:
             st.markdown("""
             *💡 Tips:*
-            - Keep text under 1000 characters
+            - Long text is split into parts automatically
             - Include context and details
             - Try different models for variety
             - Copy output directly to Notion
@@ -521,5 +2334,5 @@ def main():
         st.error("❌ Application error occurred. Please refresh and try again.")
         st.exception(e)
 
-if _name_ == "_main_":
+if __name__ == "__main__":
     main()
@@ -0,0 +1,253 @@
+import re
+from typing import List, Optional
+
+# Lines that only make sense in the prompt; a completion that repeats them is echoing it
+PROMPT_PREFIXES = ("Convert the following", "Summarize the following", "The notes already have")
+OUTPUT_MARKER = "Output:"
+INPUT_MARKER = "Input:"
+
+HEADING_LINE_RE = re.compile(r"^(#+)\s*(.*?)\s*#*\s*$")
+LIST_ITEM_RE = re.compile(r"^(\s*)([-*+•]|\d+[.)])\s+(.*)$")
+RULE_RE = re.compile(r"^([-*_])(?:\s*\1){2,}$")
+CODE_SPAN_RE = re.compile(r"`[^`]*`")
+EMPHASIS_RUN_RE = re.compile(r"\*+")
+OPENING_PUNCTUATION = "([{\"'"
+CLOSING_PUNCTUATION = ".,;:!?)]}\"'"
+
+
+def repair_emphasis(text: str) -> str:
+    """Close code spans, bold and italics left open at the end of a line
+
+    Only asterisks that open emphasis count: a run at the start of a word
+    with text after it. Asterisks between spaces, as in "2 * 3", and inside
+    code spans are literal. A line whose asterisks neither open nor close
+    emphasis, such as "*args/**kwargs", is left alone.
+    """
+    text = text.rstrip()
+    if text.count("`") % 2:
+        text += "`"
+    plain = CODE_SPAN_RE.sub(" ", text)
+    opened: List[str] = []
+    for match in EMPHASIS_RUN_RE.finditer(plain):
+        run = match.group()
+        before = plain[match.start() - 1] if match.start() else " "
+        after = plain[match.end()] if match.end() < len(plain) else " "
+        if before.isspace() and after.isspace():
+            continue
+        closes = not before.isspace() and (after.isspace() or after in CLOSING_PUNCTUATION)
+        if opened and opened[-1] == run and closes:
+            opened.pop()
+        elif not after.isspace() and (before.isspace() or before in OPENING_PUNCTUATION):
+            opened.append(run)
+        else:
+            # Asterisks used literally; guessing a repair would only damage them
+            return text
+    return text + "".join(reversed(opened))
+
+
+class MarkdownBlock:
+    """One line-level node of a parsed note
+
+    kind is "heading", "item", "paragraph", "table", "code", "rule" or
+    "blank". level is the normalized heading level or the list depth.
+    """
+
+    def __init__(self, kind: str, text: str = "", level: int = 0, marker: str = ""):
+        self.kind = kind
+        self.text = text
+        self.level = level
+        self.marker = marker
+
+    def render(self) -> str:
+        if self.kind == "heading":
+            return f"{'#' * self.level} {self.text}"
+        if self.kind == "item":
+            return f"{'  ' * self.level}{self.marker} {self.text}"
+        if self.kind == "rule":
+            return "---"
+        return self.text
+
+
+class MarkdownParser:
+    """Incremental parser that turns a raw model completion into clean notes
+
+    feed() accepts the completion in pieces of any size, such as streamed
+    tokens. Each complete line is parsed once into blocks, so the total
+    work stays linear in the completion's length; only the unfinished last
+    line is looked at again on every render().
+
+    While parsing it drops echoed prompt text, normalizes heading levels so
+    they start at 1 and never skip a level, renumbers list markers and
+    indentation, separates lists from following paragraphs, and closes
+    emphasis, code spans and code fences left open.
+    """
+
+    def __init__(self, strip_prompt: bool = True):
+        self.strip_prompt = strip_prompt
+        self._pending = ""
+        self._reset()
+
+    def _reset(self):
+        self.blocks: List[MarkdownBlock] = []
+        self._heading_offset: Optional[int] = None
+        self._heading_level = 0
+        self._list_indents: List[int] = []
+        self._list_numbers: List[Optional[int]] = []  # Last number at each depth; None for bullets
+        self._in_code = False
+        self._in_echo = False
+        self._ended = False
+
+    def feed(self, text: str):
+        """Parse every line of text that is now complete"""
+        if "\n" not in text:
+            self._pending += text
+            return
+        lines = (self._pending + text).split("\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self._commit(line)
+
+    def close(self):
+        """Parse the last, unterminated line"""
+        if self._pending:
+            self._commit(self._pending)
+            self._pending = ""
+
+    def render(self) -> str:
+        """Return the notes parsed so far, with the unfinished last line repaired"""
+        lines = [block.render() for block in self.blocks]
+        if self._pending and not self._ended:
+            line = self._pending
+            if self._starts_with_marker(line, OUTPUT_MARKER):
+                lines, line = [], line.split(OUTPUT_MARKER, 1)[1]
+            if not (self._in_echo or self._is_prompt_line(line)):
+                lines.extend(block.render() for block in self._parse(line, commit=False))
+        if self._in_code:
+            lines.append("```")
+        return "\n".join(lines).strip()
+
+    def has_structure(self) -> bool:
+        """Return whether the notes contain a heading, list or table"""
+        return any(block.kind in ("heading", "item", "table") for block in self.blocks)
+
+    def _is_prompt_line(self, line: str) -> bool:
+        return self.strip_prompt and line.lstrip().startswith(PROMPT_PREFIXES)
+
+    def _starts_with_marker(self, line: str, marker: str) -> bool:
+        # "- Input: raw files" in a list or a code block is content, not an echoed prompt
+        return self.strip_prompt and not self._in_code and line.lstrip().startswith(marker)
+
+    def _commit(self, line: str):
+        if self._ended:
+            return
+        if self.strip_prompt:
+            if self._starts_with_marker(line, OUTPUT_MARKER):
+                # Everything before the last "Output:" is the echoed prompt
+                self._reset()
+                line = line.split(OUTPUT_MARKER, 1)[1]
+            elif self._starts_with_marker(line, INPUT_MARKER):
+                if self.blocks:
+                    # The model started inventing another example
+                    self._ended = True
+                else:
+                    self._in_echo = True
+                return
+            if self._in_echo or self._is_prompt_line(line):
+                return
+        self.blocks.extend(self._parse(line, commit=True))
+
+    def _end_list(self):
+        self._list_indents = []
+        self._list_numbers = []
+
+    def _previous_kind(self) -> Optional[str]:
+        return self.blocks[-1].kind if self.blocks else None
+
+    def _parse(self, line: str, commit: bool) -> List[MarkdownBlock]:
+        """Turn one line into blocks; state only advances when commit is set"""
+        stripped = line.strip()
+        previous = self._previous_kind()
+        separator = [MarkdownBlock("blank")] if previous not in (None, "blank") else []
+
+        if self._in_code:
+            if stripped.startswith("```") and commit:
+                self._in_code = False
+            return [MarkdownBlock("code", line.rstrip())]
+        if stripped.startswith("```"):
+            if commit:
+                self._in_code = True
+                self._end_list()
+            return separator + [MarkdownBlock("code", stripped)]
+
+        if not stripped:
+            if commit:
+                self._end_list()
+            return separator
+
+        heading = HEADING_LINE_RE.match(stripped)
+        if heading and heading.group(2):
+            raw_level = len(heading.group(1))
+            offset = self._heading_offset if self._heading_offset is not None else raw_level - 1
+            # The first heading sets the base level; later ones may go at most one level deeper
+            level = max(1, min(raw_level - offset, self._heading_level + 1, 6))
+            if commit:
+                self._heading_offset = offset
+                self._heading_level = level
+                self._end_list()
+            return separator + [MarkdownBlock("heading", repair_emphasis(heading.group(2)), level)]
+
+        if RULE_RE.match(stripped):
+            if commit:
+                self._end_list()
+            return separator + [MarkdownBlock("rule")]
+
+        item = LIST_ITEM_RE.match(line)
+        if item:
+            text = repair_emphasis(item.group(3))
+            if not text:
+                return []
+            indent = len(item.group(1).expandtabs(4))
+            indents = list(self._list_indents)
+            while indents and indent < indents[-1]:
+                indents.pop()
+            if not indents or indent > indents[-1]:
+                indents.append(indent)
+            depth = len(indents) - 1
+
+            # Ordered items count on from the previous item at the same depth
+            numbers = self._list_numbers[:depth + 1]
+            numbers += [None] * (depth + 1 - len(numbers))
+            marker = item.group(2)
+            if marker[0].isdigit():
+                previous_number = numbers[depth]
+                numbers[depth] = previous_number + 1 if previous_number is not None else int(marker[:-1])
+                marker = f"{numbers[depth]}."
+            else:
+                numbers[depth] = None
+                marker = "-"
+            if commit:
+                self._list_indents = indents
+                self._list_numbers = numbers
+            before = separator if previous not in ("item", "heading") else []
+            return before + [MarkdownBlock("item", text, depth, marker)]
+
+        if stripped.startswith("|"):
+            before = separator if previous != "table" else []
+            return before + [MarkdownBlock("table", stripped)]
+
+        # Plain text: indented text continues a list item; anything else ends the list
+        if previous == "item" and line[:1].isspace():
+            depth = self.blocks[-1].level + 1
+            return [MarkdownBlock("paragraph", "  " * depth + repair_emphasis(stripped))]
+        if commit:
+            self._end_list()
+        before = separator if previous not in ("paragraph", "heading") else []
+        return before + [MarkdownBlock("paragraph", repair_emphasis(stripped))]
+
+
+def parse_markdown(text: str, strip_prompt: bool = True) -> MarkdownParser:
+    """Parse a complete completion"""
+    parser = MarkdownParser(strip_prompt)
+    parser.feed(text)
+    parser.close()
+    return parser
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Cache defaults
+DEFAULT_MAX_ENTRIES = 512                  # Entries kept in the in-memory LRU tier
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600        # Entries older than this are treated as missing
+DEFAULT_MAX_DISK_BYTES = 64 * 1024 * 1024  # Size cap for the on-disk tier
+
+
+def make_cache_key(model_name: str, prompt: str, parameters: Dict, backend: str, engine: str) -> str:
+    """Build a content-addressed key for a model, prompt and generation parameters
+
+    backend names what ran the model (the hosted API or a local copy) and
+    engine how its output was turned into notes, since either changes the
+    notes for the same prompt.
+    """
+    material = json.dumps(
+        {"model": model_name, "prompt": prompt, "parameters": parameters, "backend": backend, "engine": engine},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class NotesCache:
+    """Two-tier cache of converted notes: an in-memory LRU backed by optional SQLite storage"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 db_path: Optional[str] = None,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()  # key -> (created_at, value)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        # Optional on-disk tier shared by every process that points at the same file
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS notes_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )"""
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS notes_cache_accessed ON notes_cache (accessed_at)")
+            self._db.commit()
+            logger.info(f"Notes cache using disk tier at {db_path}")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM notes_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if now - created_at <= self.ttl_seconds:
+                        self._db.execute("UPDATE notes_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, created_at, value)
+                        self._hits += 1
+                        return value
+                    self._db.execute("DELETE FROM notes_cache WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self._misses += 1
+            return None
+
+    def set(self, key: str, value: str):
+        """Store value under key in every tier"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO notes_cache (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value.encode("utf-8")), now, now)
+                )
+                self._evict_disk(now)
+                self._db.commit()
+
+    def _remember(self, key: str, created_at: float, value: str):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now: float):
+        """Drop expired rows, then least recently used rows until under the size cap"""
+        self._db.execute("DELETE FROM notes_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        total_size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM notes_cache").fetchone()[0]
+        if total_size <= self.max_disk_bytes:
+            return
+
+        rows = self._db.execute("SELECT key, size FROM notes_cache ORDER BY accessed_at").fetchall()
+        evicted = []
+        for key, size in rows:
+            if total_size <= self.max_disk_bytes:
+                break
+            evicted.append((key,))
+            total_size -= size
+        self._db.executemany("DELETE FROM notes_cache WHERE key = ?", evicted)
+
+    def clear(self):
+        """Remove every entry from all tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM notes_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict:
+        """Return hit and miss counters"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory)
+            }
@@ -0,0 +1,295 @@
+"""Rule-based notes that need no model or network.
+
+generate_offline_notes structures a text held in memory. For transcripts
+too large for that, stream_offline_notes reads a file-like object window by
+window and writes markdown as it goes, so memory stays bounded by the window.
+
+Usage:
+    python offline_engine.py INPUT [OUTPUT] [--window-kb 64]
+"""
+import argparse
+import heapq
+import logging
+import sys
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+from action_items import ACTION_AUTOMATON, extract_action_items
+from keyphrases import DEFAULT_MAX_KEYPHRASES, extract_keyphrases, make_tags
+from tables import Table, detect_tables, format_table, strip_tables
+from text_analysis import DEFAULT_SUMMARY_SENTENCES, analyze_text, build_term_matrix, select_sentences, sentence_scores
+from topics import HEADING_KEYWORDS, SECTION_POINTS, format_heading, section_keywords, segment_topics
+
+logger = logging.getLogger(__name__)
+
+KEY_POINTS = 8                  # Sentences listed under Key Points when the text has a single topic
+
+# Streaming defaults for inputs read from files
+DEFAULT_WINDOW_CHARS = 64 * 1024    # Text structured at a time; memory use scales with this
+MAX_STREAMED_ACTION_ITEMS = 200     # Action items kept for the closing list; the rest are counted
+MAX_TRACKED_KEYPHRASES = 1024       # Keyphrase tallies kept across windows
+
+
+class NoteSkeleton:
+    """The structure of a note as built locally: every section heading and its points
+
+    summary holds the most central sentences; a model may replace them with
+    its own wording while the rest of the skeleton stays as extracted.
+    """
+
+    def __init__(self, word_count: int, sentence_count: int):
+        self.word_count = word_count
+        self.sentence_count = sentence_count
+        self.summary: List[str] = []
+        self.summary_scores: List[float] = []  # Centrality of each summary sentence
+        self.keyphrases: List[str] = []
+        self.sections: List[Tuple[str, List[str]]] = []  # (heading, points)
+        self.action_items: List[Dict] = []
+        self.tables: List[Table] = []
+
+
+def build_skeleton(text: str) -> NoteSkeleton:
+    """Extract the summary, key topics, topical sections, action items and tables of text"""
+    # Tables are kept whole; only the prose around them is summarized
+    tables = detect_tables(text)
+    if tables:
+        text = strip_tables(text, tables)
+    analysis = analyze_text(text, ACTION_AUTOMATON)
+    matrix = build_term_matrix(text, analysis.sentences)
+    scores = sentence_scores(text, analysis.sentences, matrix)
+    skeleton = NoteSkeleton(analysis.word_count, len(analysis.sentences))
+
+    # Summary: the most central sentences, in reading order
+    if len(analysis.sentences) <= DEFAULT_SUMMARY_SENTENCES:
+        summary = list(range(len(analysis.sentences)))
+    else:
+        summary = select_sentences(scores, DEFAULT_SUMMARY_SENTENCES)
+    skeleton.summary = [analysis.span_text(analysis.sentences[index]) for index in summary]
+    skeleton.summary_scores = [float(scores[index]) for index in summary]
+
+    skeleton.keyphrases = extract_keyphrases(text)
+
+    # Main content: one section per topic, headed by its keywords
+    sections = segment_topics(text, analysis, matrix)
+    if len(sections) > 1:
+        keywords = section_keywords(text, analysis, sections, matrix=matrix)
+        for (first, end), words in zip(sections, keywords):
+            ranked = [first + index for index in select_sentences(scores[first:end], SECTION_POINTS + len(summary))]
+            points = [index for index in ranked if index not in summary][:SECTION_POINTS] or ranked[:1]
+            skeleton.sections.append((
+                format_heading(words) or "Key Points",
+                [analysis.span_text(analysis.sentences[index]) for index in points]
+            ))
+    else:
+        key_points = select_sentences(scores, KEY_POINTS, skip=DEFAULT_SUMMARY_SENTENCES)
+        if key_points:
+            skeleton.sections.append((
+                "Key Points",
+                [analysis.span_text(analysis.sentences[index]) for index in key_points]
+            ))
+
+    skeleton.action_items = extract_action_items(text, analysis)
+    skeleton.tables = tables
+    if not skeleton.summary:
+        skeleton.summary = [table.describe() for table in tables]
+    return skeleton
+
+
+def _write_summary(write: Callable[[str], object], points: List[str], word_count: int, sentence_count: int):
+    write("## 📋 Summary\n")
+    for point in points:
+        write(f"- {point}\n")
+    write("\n")
+    if sentence_count:
+        write(f"*Approximately {word_count} words across {sentence_count} sentences.*\n\n")
+
+
+def _write_key_topics(write: Callable[[str], object], keyphrases: List[str]):
+    if not keyphrases:
+        return
+    write("## 🏷 Key Topics\n")
+    for phrase in keyphrases:
+        write(f"- {phrase}\n")
+    write(f"\n*Tags:* {' '.join('#' + tag for tag in make_tags(keyphrases))}\n\n")
+
+
+def _write_points(write: Callable[[str], object], heading: str, points: List[str]):
+    write(f"{heading}\n\n")
+    for point in points:
+        write(f"- {point}\n")
+    write("\n")
+
+
+def _write_tables(write: Callable[[str], object], tables: List[Table], heading: str = "## 📊 Data"):
+    if not tables:
+        return
+    write(f"{heading}\n\n")
+    for table in tables:
+        if table.title:
+            write(f"**{table.title}**\n\n")
+        write(format_table(table))
+        write("\n\n")
+
+
+def _write_action_items(write: Callable[[str], object], action_items: List[Dict], omitted: int = 0):
+    # Action items with their owners and deadlines
+    if not action_items:
+        return
+    write("## ✅ Action Items\n")
+    for item in action_items:
+        line = f"- [ ] {item['text']}"
+        if item["owner"]:
+            line += f" — 👤 {item['owner']}"
+        if item["deadline"]:
+            line += f" — 📅 {item['deadline']}"
+        write(line + "\n")
+    if omitted:
+        write(f"\n*…and {omitted} more.*\n")
+
+
+def render_notes(skeleton: NoteSkeleton, summary: Optional[List[str]] = None) -> str:
+    """Render a skeleton as markdown notes, with summary points replacing the extracted ones when given"""
+    parts = []
+    write = parts.append
+    write("# 📝 Structured Notes\n\n")
+    _write_summary(write, summary or skeleton.summary, skeleton.word_count, skeleton.sentence_count)
+    _write_key_topics(write, skeleton.keyphrases)
+    for heading, points in skeleton.sections:
+        _write_points(write, f"## 📌 {heading}", points)
+    _write_tables(write, skeleton.tables)
+    _write_action_items(write, skeleton.action_items)
+    return "".join(parts)
+
+
+def generate_offline_notes(text: str) -> str:
+    """Build structured notes with the local rule-based pipeline
+
+    Needs no network or model, and the same text always gives the same notes.
+    """
+    try:
+        return render_notes(build_skeleton(text))
+    except Exception as e:
+        logger.error(f"Error in offline notes creation: {e}")
+        return f"# 📝 Notes\n\n## Content\n\n{text}\n\n*Note: Automatic structuring failed, showing original content.*"
+
+
+def iter_windows(source: Union[TextIO, Iterable[str]], window_chars: int = DEFAULT_WINDOW_CHARS) -> Iterator[str]:
+    """Yield consecutive pieces of about window_chars characters, cut at paragraph or line breaks
+
+    source is a file-like object with read(), or any iterable of strings such
+    as an open file's lines. At most one window plus one read is held at a time.
+    """
+    if hasattr(source, "read"):
+        read, read_size = source.read, max(1, window_chars // 4)
+        source = iter(lambda: read(read_size), "")
+
+    buffer = ""
+    for piece in source:
+        buffer += piece
+        while len(buffer) >= window_chars:
+            # Prefer a paragraph break, then a line break, then a sentence end in the window's second half
+            cut = -1
+            for separator in ("\n\n", "\n", ". "):
+                cut = buffer.rfind(separator, window_chars // 2, window_chars)
+                if cut >= 0:
+                    cut += len(separator)
+                    break
+            if cut < 0:
+                cut = buffer.rfind(" ", 0, window_chars) + 1 or window_chars
+            window, buffer = buffer[:cut], buffer[cut:]
+            if window.strip():
+                yield window
+    if buffer.strip():
+        yield buffer
+
+
+def stream_offline_notes(source: Union[TextIO, Iterable[str]], output: TextIO,
+                         window_chars: int = DEFAULT_WINDOW_CHARS) -> Dict:
+    """Write rule-based notes for a text of any size to output, one window at a time
+
+    Each window becomes a "## Part" with its central sentences and topical
+    sections, written as soon as it is structured. The overall action items,
+    key topics and summary can only be known at the end, so they close the
+    document; all three are bounded, so memory does not grow with the input.
+    Returns counts of the windows, words and sentences processed.
+    """
+    write = output.write
+    write("# 📝 Structured Notes\n\n")
+
+    summary_heap: List[Tuple[float, int, str]] = []  # (score, -position, sentence), smallest first
+    position = 0
+    keyphrase_counts: Dict[str, int] = {}
+    action_items: List[Dict] = []
+    seen_actions = set()
+    omitted_actions = 0
+    stats = {"windows": 0, "words": 0, "sentences": 0}
+
+    for window in iter_windows(source, window_chars):
+        skeleton = build_skeleton(window)
+        stats["windows"] += 1
+        stats["words"] += skeleton.word_count
+        stats["sentences"] += skeleton.sentence_count
+
+        heading = format_heading(skeleton.keyphrases[:HEADING_KEYWORDS]) or f"Part {stats['windows']}"
+        _write_points(write, f"## 📌 {heading}", skeleton.summary)
+        for section_heading, points in skeleton.sections:
+            _write_points(write, f"### {section_heading}", points)
+        _write_tables(write, skeleton.tables, "### 📊 Data")
+
+        # The overall summary keeps the most central sentences seen so far
+        for point, score in zip(skeleton.summary, skeleton.summary_scores):
+            position += 1
+            entry = (score, -position, point)
+            if len(summary_heap) < DEFAULT_SUMMARY_SENTENCES:
+                heapq.heappush(summary_heap, entry)
+            elif entry > summary_heap[0]:
+                heapq.heapreplace(summary_heap, entry)
+
+        # Keyphrases recurring across windows are the document's topics
+        for rank, phrase in enumerate(skeleton.keyphrases):
+            keyphrase_counts[phrase] = keyphrase_counts.get(phrase, 0) + len(skeleton.keyphrases) - rank
+        if len(keyphrase_counts) > 2 * MAX_TRACKED_KEYPHRASES:
+            kept = sorted(keyphrase_counts, key=keyphrase_counts.get, reverse=True)[:MAX_TRACKED_KEYPHRASES]
+            keyphrase_counts = {phrase: keyphrase_counts[phrase] for phrase in kept}
+
+        for item in skeleton.action_items:
+            key = item["text"].lower()
+            if key in seen_actions:
+                continue
+            if len(action_items) >= MAX_STREAMED_ACTION_ITEMS:
+                omitted_actions += 1
+                continue
+            seen_actions.add(key)
+            action_items.append(item)
+
+    _write_action_items(write, action_items, omitted_actions)
+    write("\n")
+    keyphrases = sorted(keyphrase_counts, key=keyphrase_counts.get, reverse=True)[:DEFAULT_MAX_KEYPHRASES]
+    _write_key_topics(write, keyphrases)
+    summary = [point for _, _, point in sorted(summary_heap, key=lambda entry: -entry[1])]
+    _write_summary(write, summary, stats["words"], stats["sentences"])
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Write rule-based notes for a large text file.")
+    parser.add_argument("input", help="Text file to structure ('-' for stdin)")
+    parser.add_argument("output", nargs="?", help="Markdown file to write (default: stdout)")
+    parser.add_argument("--window-kb", type=int, default=DEFAULT_WINDOW_CHARS // 1024,
+                        help=f"Text structured at a time, in kilobytes (default: {DEFAULT_WINDOW_CHARS // 1024})")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        stats = stream_offline_notes(source, output, args.window_kb * 1024)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    print(f"Structured {stats['words']} words in {stats['windows']} window(s).", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
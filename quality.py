@@ -0,0 +1,77 @@
+from collections import Counter
+from typing import Dict, Iterable, List
+
+from markdown_ast import PROMPT_PREFIXES, parse_markdown
+from text_analysis import STOPWORDS, WORD_RE
+
+# Weights of the quality components; they add up to 1
+STRUCTURE_WEIGHT = 0.35        # Headings, lists and tables instead of loose prose
+REPETITION_WEIGHT = 0.25       # Penalizes loops such as "the the the" or repeated bullets
+RECALL_WEIGHT = 0.25           # Share of the input's main terms that made it into the notes
+ECHO_WEIGHT = 0.15             # Penalizes repeating the prompt's instructions
+
+# Thresholds for escalating to a stronger model
+ACCEPT_QUALITY_SCORE = 0.6     # Good enough; no need to try a stronger model
+MIN_QUALITY_SCORE = 0.35       # Worse than this is not worth showing; use the fallback instead
+MIN_RECALL = 0.25              # Below this, the score shrinks in proportion: the notes ignore the input
+
+RECALL_TERMS = 20              # Most frequent input terms checked for recall
+SHINGLE_WORDS = 3              # Words per shingle for the repetition and echo checks
+
+ECHO_MARKERS = ("Input:", "Output:") + PROMPT_PREFIXES
+
+
+def _words(text: str) -> List[str]:
+    return [word.lower() for word in WORD_RE.findall(text)]
+
+
+def _shingles(words: List[str]) -> List[tuple]:
+    return [tuple(words[index:index + SHINGLE_WORDS]) for index in range(len(words) - SHINGLE_WORDS + 1)]
+
+
+def _content_terms(words: Iterable[str]) -> Counter:
+    return Counter(word for word in words if word not in STOPWORDS and len(word) > 2)
+
+
+def score_notes(notes: str, source: str, instructions: str = "") -> Dict[str, float]:
+    """Score generated notes against their input, from 0 (useless) to 1
+
+    Returns each component alongside the weighted "score":
+    structure - share of lines that are headings, list items or table rows,
+    with half the credit reserved for having any heading at all;
+    repetition - share of repeated word shingles (lower is better);
+    recall - share of the input's most frequent content terms in the notes;
+    echo - share of shingles copied from the prompt instructions, or 1 when
+    prompt markers such as "Input:" appear (lower is better).
+    Notes with recall under MIN_RECALL have their score scaled down by
+    recall / MIN_RECALL, so fluent but off-topic notes are never accepted.
+    """
+    document = parse_markdown(notes, strip_prompt=False)
+    content = [block for block in document.blocks if block.kind not in ("blank", "rule")]
+    if not content:
+        return {"structure": 0.0, "repetition": 1.0, "recall": 0.0, "echo": 0.0, "score": 0.0}
+
+    structured = sum(1 for block in content if block.kind in ("heading", "item", "table"))
+    has_heading = any(block.kind == "heading" for block in content)
+    structure = 0.5 * has_heading + 0.5 * structured / len(content)
+
+    words = _words(notes)
+    shingles = _shingles(words)
+    repetition = 1.0 - len(set(shingles)) / len(shingles) if shingles else 0.0
+
+    source_terms = [term for term, _ in _content_terms(_words(source)).most_common(RECALL_TERMS)]
+    note_terms = _content_terms(words)
+    recall = sum(1 for term in source_terms if term in note_terms) / len(source_terms) if source_terms else 1.0
+
+    if any(marker in notes for marker in ECHO_MARKERS):
+        echo = 1.0
+    elif instructions and shingles:
+        instruction_shingles = set(_shingles(_words(instructions)))
+        echo = sum(1 for shingle in shingles if shingle in instruction_shingles) / len(shingles)
+    else:
+        echo = 0.0
+
+    score = (STRUCTURE_WEIGHT * structure + REPETITION_WEIGHT * (1.0 - repetition)
+             + RECALL_WEIGHT * recall + ECHO_WEIGHT * (1.0 - echo))
+    score *= min(1.0, recall / MIN_RECALL)
+    return {"structure": structure, "repetition": repetition, "recall": recall, "echo": echo, "score": score}
@@ -0,0 +1,251 @@
+import re
+from typing import List, Optional, Tuple
+
+# Table detection thresholds
+MIN_TABLE_ROWS = 3              # Data rows needed before a pattern counts as a table
+MAX_CELL_WORDS = 8              # Longer cells are prose, not data
+MAX_KEY_WORDS = 4               # Longest key in "key: value" lines and numeric series labels
+MAX_VALUE_WORDS = 5             # Longest value in "key: value" lines; speaker turns run longer
+MAX_TITLE_WORDS = 8             # Longest "Title:" line taken as a table's caption
+TABULAR_SHARE = 0.6             # Share of the text inside tables for the text to count as tabular
+
+DELIMITERS = ("|", "\t", ";", ",")
+NUMBER = r"[-+]?[$€£]?\d[\d,]*(?:\.\d+)?%?[kKmMbB]?"
+NUMBER_RE = re.compile(rf"^{NUMBER}$")
+KEY_VALUE_RE = re.compile(r"^\s*(?:[-*•]\s+)?([A-Za-z][^:=|\t]{0,40}?)\s*[:=]\s+(\S.*?)\s*$")
+NUMERIC_ROW_RE = re.compile(rf"^\s*(?:[-*•]\s+)?([A-Za-z][\w .&/'()-]*?)\s*[:=–-]?\s+({NUMBER}(?:[\s,;/]+{NUMBER})*)\s*$")
+NUMBER_SPLIT_RE = re.compile(r"[\s,;/]+(?=[-+$€£\d])")
+SEPARATOR_CELL_RE = re.compile(r"^:?-{3,}:?$")
+# Commas also separate clauses, so comma rows must not read like sentences or speaker turns
+SENTENCE_PUNCTUATION_RE = re.compile(r"[.!?]\W*$|[.!?:;]\s")
+
+# A detector's verdict at a line: (end line, header, rows). header is None when
+# there is no table, and end is then the first line worth trying the detector again
+Detection = Tuple[int, Optional[List[str]], List[List[str]]]
+
+
+class Table:
+    """A table found in text: a header, rows of the same width and the (start, end) offsets it covers"""
+
+    def __init__(self, header: List[str], rows: List[List[str]], start: int, end: int,
+                 title: Optional[str] = None):
+        self.header = header
+        self.rows = rows
+        self.start = start
+        self.end = end
+        self.title = title
+
+    def describe(self) -> str:
+        """Return a one-line description for summaries"""
+        name = self.title or ", ".join(self.header)
+        return f"{name}: {len(self.rows)} rows of {len(self.header)} columns"
+
+
+def _is_number(cell: str) -> bool:
+    return bool(NUMBER_RE.match(cell))
+
+
+def _is_cell(cell: str) -> bool:
+    return 0 < len(cell.split()) <= MAX_CELL_WORDS
+
+
+def _split_row(line: str, delimiter: str) -> List[str]:
+    line = line.strip()
+    if delimiter == "|":
+        line = line.strip("|")
+    return [cell.strip() for cell in line.split(delimiter)]
+
+
+def _line_spans(text: str) -> List[Tuple[int, int]]:
+    spans = []
+    start = 0
+    for line in text.split("\n"):
+        spans.append((start, start + len(line)))
+        start += len(line) + 1
+    return spans
+
+
+def _is_header(cells: List[str]) -> bool:
+    """Return whether cells read as column names: short, distinct and not numbers"""
+    return (len(set(cells)) == len(cells)
+            and all(not _is_number(cell) and len(cell.split()) <= MAX_KEY_WORDS for cell in cells))
+
+
+def _delimited_table(lines: List[str], first: int) -> Detection:
+    """Match rows split by one delimiter into the same number of short cells
+
+    Comma rows must not contain sentence punctuation and must start with a
+    header, or carry a number in every row, so that prose full of commas is
+    not taken for a table.
+    """
+    line = lines[first]
+    for delimiter in DELIMITERS:
+        if delimiter not in line:
+            continue
+        width = len(_split_row(line, delimiter))
+        if width < 2:
+            continue
+
+        rows = []
+        has_separator = False
+        index = first
+        while index < len(lines) and delimiter in lines[index]:
+            cells = _split_row(lines[index], delimiter)
+            if len(cells) != width or (delimiter == "," and SENTENCE_PUNCTUATION_RE.search(lines[index].strip())):
+                break
+            if delimiter == "|" and all(SEPARATOR_CELL_RE.match(cell) for cell in cells):
+                # The "| --- | --- |" row of a markdown table
+                has_separator = has_separator or len(rows) == 1
+            elif all(_is_cell(cell) for cell in cells):
+                rows.append(cells)
+            else:
+                break
+            index += 1
+        if not rows:
+            continue
+        if delimiter == "," and not (_is_header(rows[0])
+                                     or all(any(_is_number(cell) for cell in cells) for cells in rows)):
+            continue
+
+        # A header row only counts when it has no numbers in it, unless the table said so itself
+        if has_separator or not any(_is_number(cell) for cell in rows[0]):
+            header, rows = rows[0], rows[1:]
+        else:
+            header = [f"Column {number}" for number in range(1, width + 1)]
+        if len(rows) >= MIN_TABLE_ROWS or (has_separator and rows):
+            return index, header, rows
+    return first + 1, None, []
+
+
+def _key_value_table(lines: List[str], first: int) -> Detection:
+    """Match runs of "key: value" lines, as one record or as repeated records"""
+    pairs = []
+    index = end = first
+    while index < len(lines):
+        if not lines[index].strip():
+            # Blank lines may separate records
+            index += 1
+            continue
+        match = KEY_VALUE_RE.match(lines[index])
+        if (not match or len(match.group(1).split()) > MAX_KEY_WORDS
+                or len(match.group(2).split()) > MAX_VALUE_WORDS or match.group(2)[-1] in ".!?"):
+            break
+        pairs.append((match.group(1).strip(), match.group(2)))
+        index += 1
+        end = index
+    if len(pairs) < MIN_TABLE_ROWS:
+        return first + 1, None, []
+
+    # Short lines inside a longer "Name: ..." dialogue are still dialogue
+    neighbours = ([lines[first - 1]] if first > 0 else []) + ([lines[end]] if end < len(lines) else [])
+    if any(KEY_VALUE_RE.match(line) for line in neighbours):
+        return end, None, []
+
+    keys = [key for key, _ in pairs]
+    if len(set(keys)) == len(keys):
+        return end, ["Field", "Value"], [[key, value] for key, value in pairs]
+
+    # Repeated keys: a new record starts wherever the first key comes back
+    records = []
+    for key, value in pairs:
+        if key == keys[0]:
+            records.append([])
+        records[-1].append((key, value))
+    header = [key for key, _ in records[0]]
+    if len(records) < 2 or any([key for key, _ in record] != header for record in records):
+        # Keys that repeat without a pattern are speaker turns, not records; nor is any part of them
+        return end, None, []
+    return end, header, [[value for _, value in record] for record in records]
+
+
+def _numeric_table(lines: List[str], first: int) -> Detection:
+    """Match a series of short labels each followed by the same number of values"""
+    rows = []
+    width = None
+    index = first
+    while index < len(lines):
+        match = NUMERIC_ROW_RE.match(lines[index])
+        if not match or len(match.group(1).split()) > MAX_KEY_WORDS:
+            break
+        values = NUMBER_SPLIT_RE.split(match.group(2))
+        if width is None:
+            width = len(values)
+        elif len(values) != width:
+            break
+        rows.append([match.group(1)] + values)
+        index += 1
+    if len(rows) < MIN_TABLE_ROWS:
+        return first + 1, None, []
+    header = ["Item", "Value"] if width == 1 else ["Item"] + [f"Value {number}" for number in range(1, width + 1)]
+    return index, header, rows
+
+
+DETECTORS = (_delimited_table, _key_value_table, _numeric_table)
+
+
+def detect_tables(text: str) -> List[Table]:
+    """Find delimited rows, runs of "key: value" lines and numeric series in text"""
+    lines = text.split("\n")
+    spans = _line_spans(text)
+    tables = []
+    retry_at = [0] * len(DETECTORS)
+    index = 0
+    while index < len(lines):
+        if not lines[index].strip():
+            index += 1
+            continue
+        for position, detector in enumerate(DETECTORS):
+            if index < retry_at[position]:
+                continue
+            end, header, rows = detector(lines, index)
+            if header is not None:
+                break
+            retry_at[position] = end
+        else:
+            index += 1
+            continue
+
+        start = spans[index][0]
+        # A short line ending in ":" just above the table is its caption
+        title = None
+        if index > 0:
+            previous = lines[index - 1].strip()
+            if previous.endswith(":") and len(previous.split()) <= MAX_TITLE_WORDS:
+                title = previous.rstrip(":").strip("#*- ").strip() or None
+                start = spans[index - 1][0]
+        tables.append(Table(header, rows, start, spans[end - 1][1], title))
+        index = end
+    return tables
+
+
+def strip_tables(text: str, tables: List[Table]) -> str:
+    """Return text with the lines covered by tables removed"""
+    pieces = []
+    position = 0
+    for table in tables:
+        pieces.append(text[position:table.start])
+        position = table.end
+    pieces.append(text[position:])
+    return "\n".join(piece for piece in pieces if piece.strip())
+
+
+def is_tabular(text: str, tables: Optional[List[Table]] = None) -> bool:
+    """Return whether most of text is tables"""
+    if tables is None:
+        tables = detect_tables(text)
+    if not tables:
+        return False
+    covered = sum(len(text[table.start:table.end].strip()) for table in tables)
+    return covered >= TABULAR_SHARE * len(text.strip())
+
+
+def format_table(table: Table) -> str:
+    """Render a table as a markdown table, right-aligning numeric columns"""
+    def row(cells: List[str]) -> str:
+        return "| " + " | ".join(cell.replace("|", "\\|") for cell in cells) + " |"
+
+    aligns = []
+    for column in range(len(table.header)):
+        numeric = all(_is_number(cells[column]) for cells in table.rows)
+        aligns.append("---:" if numeric else "---")
+    return "\n".join([row(table.header), "| " + " | ".join(aligns) + " |"] + [row(cells) for cells in table.rows])
@@ -0,0 +1,47 @@
+from action_items import extract_action_items
+
+
+def owners(text):
+    return [item["owner"] for item in extract_action_items(text)]
+
+
+def test_statements_are_not_commitments():
+    assert extract_action_items("The weather will be nice tomorrow.") == []
+    assert extract_action_items("Please note the office is closed on Monday.") == []
+    assert extract_action_items("Please see the attached report.") == []
+
+
+def test_words_opening_a_sentence_are_not_owners():
+    assert owners("Release will include the new dashboard.") == [None]
+    assert owners("The API will change next month.") == []
+    assert owners("Mike asked questions about costs.") == [None]
+
+
+def test_owners_that_name_a_person():
+    assert owners("Action item: Priya to send the deck by Friday.") == ["Priya"]
+    assert owners("Sarah: I will send the report by Friday.") == ["Sarah"]
+    assert owners("Sarah: I'll update the roadmap.") == ["Sarah"]
+    assert owners("Sarah: please send the contract.") == [None]
+    assert owners("We agreed that Tom will handle the vendor contract next week.") == ["Tom"]
+    assert owners("The budget review was assigned to Priya.") == ["Priya"]
+
+
+def test_known_speakers_own_lowercase_commitments():
+    items = extract_action_items("mike: ok. budget concerns mike will handle by friday")
+    assert [(item["owner"], item["deadline"]) for item in items] == [("Mike", "by friday")]
+
+
+def test_lowercase_transcripts_keep_their_owners():
+    items = extract_action_items("mike will handle the design phase")
+    assert [(item["text"], item["owner"]) for item in items] == [("Mike will handle the design phase", "Mike")]
+    assert owners("sarah needs to review the deck") == ["Sarah"]
+    assert owners("john is going to update the docs") == ["John"]
+    assert owners("we agreed that tom will handle the vendor contract") == ["Tom"]
+    items = extract_action_items("we discussed the budget concerns mike will handle by friday")
+    assert [(item["owner"], item["deadline"]) for item in items] == [("Mike", "by friday")]
+
+
+def test_things_are_not_owners():
+    assert extract_action_items("the weather will be nice") == []
+    assert extract_action_items("the project budget will be reviewed next week") == []
+    assert extract_action_items("our release will include the dashboard") == []
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from backends import InferenceBackend, LocalModelBackend, _DegenerationStop  # noqa: E402
+from degeneration import MAX_WORD_CHARS  # noqa: E402
+
+
+def test_backend_must_implement_generate():
+    with pytest.raises(TypeError):
+        InferenceBackend()
+
+
+def test_concurrent_requests_share_one_batch():
+    backend = LocalModelBackend.tiny_random(seed=1, max_batch_delay=0.5)
+    payload = {"parameters": {"max_new_tokens": 8, "return_full_text": False}}
+
+    async def run():
+        return await asyncio.gather(*(
+            backend.generate({"inputs": f"Notes about topic {index}: ", **payload}) for index in range(4)
+        ))
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        backend.close()
+    assert all(isinstance(result, list) and "generated_text" in result[0] for result in results)
+    assert backend.stats()["batches"] == 1
+    assert backend.stats()["requests"] == 4
+
+
+def test_different_output_budgets_share_one_batch():
+    backend = LocalModelBackend.tiny_random(seed=1, max_batch_delay=0.5)
+    budgets = [4, 9, 16, 30]
+
+    async def run():
+        return await asyncio.gather(*(
+            backend.generate({"inputs": f"Notes about topic {index}: ",
+                              "parameters": {"max_new_tokens": budget, "return_full_text": False}})
+            for index, budget in enumerate(budgets)
+        ))
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        backend.close()
+    assert backend.stats()["batches"] == 1
+    # The byte tokenizer decodes one token to at most one byte
+    for result, budget in zip(results, budgets):
+        assert len(result[0]["generated_text"].encode("utf-8")) <= budget
+
+
+class _WordTokenizer:
+    """Decodes token 1 to a repeated word and any other token to a word of its own"""
+
+    def batch_decode(self, ids, skip_special_tokens=True):
+        return [" again" if int(row[-1]) == 1 else f" word{int(row[-1])}" for row in ids]
+
+
+def test_stopping_criterion_ends_only_looping_sequences():
+    import torch
+
+    stop = _DegenerationStop(_WordTokenizer(), prompt_length=2, batch_size=2)
+    # Nothing is generated yet, so nothing stops
+    assert stop(torch.zeros((2, 2), dtype=torch.long), None).tolist() == [False, False]
+
+    done = [False, False]
+    for step in range(3, 40):
+        # Row 0 says something new every step; row 1 repeats one word
+        ids = torch.tensor([[0] * (step - 1) + [step + 100], [1] * step], dtype=torch.long)
+        done = stop(ids, None).tolist()
+        if done[1]:
+            break
+    assert done == [False, True]
+    assert stop.stopped == 1
+
+
+def test_looping_generation_stops_early():
+    import torch
+
+    backend = LocalModelBackend.tiny_random(seed=0)
+    # Zero every weight but make "a" the only likely token, so greedy decoding writes "aaaa..." forever
+    with torch.no_grad():
+        for parameter in backend.model.parameters():
+            parameter.zero_()
+        backend.model.transformer.ln_f.bias.fill_(1.0)
+        backend.model.transformer.wte.weight[ord("a")].fill_(1.0)
+    lengths = []
+    generate = backend.model.generate
+
+    def recording_generate(**kwargs):
+        output = generate(**kwargs)
+        lengths.append(output.shape[1] - kwargs["input_ids"].shape[1])
+        return output
+
+    backend.model.generate = recording_generate
+    payload = {"inputs": "Notes: ", "parameters": {"max_new_tokens": 300, "return_full_text": False}}
+    try:
+        result = asyncio.run(backend.generate(payload))
+    finally:
+        backend.close()
+    # The run-on word is cut as soon as it passes the word length limit
+    assert lengths[0] <= MAX_WORD_CHARS + 1
+    assert result == [{"generated_text": ""}]
+    assert backend.stats()["stopped_early"] == 1
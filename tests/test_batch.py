@@ -0,0 +1,59 @@
+import asyncio
+import json
+import os
+
+import batch
+from batch import load_checkpoint, run_batch
+from main import ENGINE_OFFLINE, AsyncNotionNotesConverter
+
+TEXT = "John: we need to finalize the marketing budget by Friday. Sarah will send the mockups."
+
+
+def test_item_ids_cannot_escape_the_output_directory(tmp_path):
+    input_path = tmp_path / "inputs.jsonl"
+    output_dir = tmp_path / "out"
+    ids = ["../escaped", str(tmp_path / "absolute"), "meeting", "team/standup"]
+    input_path.write_text("".join(json.dumps({"id": item_id, "text": TEXT}) + "\n" for item_id in ids))
+
+    async def run():
+        async with AsyncNotionNotesConverter("", engine=ENGINE_OFFLINE) as converter:
+            return await run_batch(converter, str(input_path), str(output_dir), on_progress=lambda *args: None)
+
+    summary = asyncio.run(run())
+    assert summary == {"converted": 2, "failed": 2, "skipped": 0}
+    assert not (tmp_path / "escaped.md").exists()
+    assert not (tmp_path / "absolute.md").exists()
+    assert (output_dir / "meeting.md").exists()
+    assert (output_dir / "team" / "standup.md").exists()
+    assert load_checkpoint(os.path.join(output_dir, ".checkpoint.jsonl")) == {"meeting", "team/standup"}
+
+
+def test_large_files_are_streamed_offline(tmp_path, monkeypatch):
+    input_dir = tmp_path / "inputs"
+    input_dir.mkdir()
+    (input_dir / "small.txt").write_text(TEXT)
+    (input_dir / "large.txt").write_text((TEXT + "\n\n") * 20)
+    monkeypatch.setattr(batch, "STREAM_INPUT_BYTES", len(TEXT) * 4)
+    read_whole = []
+    original_open = open
+
+    def tracking_open(path, *args, **kwargs):
+        f = original_open(path, *args, **kwargs)
+        if str(path).endswith("large.txt"):
+            original_read = f.read
+            f.read = lambda size=-1: read_whole.append(size) or original_read(size)
+        return f
+
+    monkeypatch.setattr("builtins.open", tracking_open)
+
+    async def run():
+        async with AsyncNotionNotesConverter("", engine=ENGINE_OFFLINE) as converter:
+            return await batch.run_batch(converter, str(input_dir), str(tmp_path / "out"), on_progress=lambda *args: None)
+
+    summary = asyncio.run(run())
+    assert summary == {"converted": 2, "failed": 0, "skipped": 0}
+    # The large file was read a window at a time, never whole
+    assert read_whole and -1 not in read_whole
+    notes = (tmp_path / "out" / "large.md").read_text()
+    assert notes.startswith("# 📝 Structured Notes") and "## 📌" in notes
+    assert not (tmp_path / "out" / "large.md.tmp").exists()
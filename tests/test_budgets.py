@@ -0,0 +1,41 @@
+from main import (DEFAULT_MAX_NEW_TOKENS, HYBRID_MAX_NEW_TOKENS, MIN_NEW_TOKENS, AsyncNotionNotesConverter,
+                  estimate_tokens, plan_new_tokens)
+from offline_engine import NoteSkeleton, build_skeleton
+
+PLAIN = "The team met on Monday and talked about the weather and the office move. " * 4
+TASKS = ("The team met on Monday. John will send the budget by Friday. Sarah needs to book the venue. "
+         "Mike will review the contract next week. Anna will email the client tomorrow. ")
+
+
+def test_structure_earns_a_bigger_budget():
+    assert plan_new_tokens("Hi.", NoteSkeleton(1, 1)) == MIN_NEW_TOKENS
+    plain = plan_new_tokens(PLAIN, build_skeleton(PLAIN))
+    tasks = plan_new_tokens(TASKS, build_skeleton(TASKS))
+    assert estimate_tokens(TASKS) < estimate_tokens(PLAIN)
+    assert tasks > plain
+    # Longer input needs more notes
+    assert plan_new_tokens(PLAIN * 3, NoteSkeleton(0, 0)) > plan_new_tokens(PLAIN, NoteSkeleton(0, 0))
+
+
+def test_hybrid_budget_covers_only_the_summary():
+    assert plan_new_tokens(PLAIN, NoteSkeleton(30, 1), hybrid=True) == MIN_NEW_TOKENS
+    assert plan_new_tokens(PLAIN * 20, NoteSkeleton(1200, 80), hybrid=True) == HYBRID_MAX_NEW_TOKENS
+
+
+def test_payload_budget_fits_the_profile_and_context():
+    converter = AsyncNotionNotesConverter("token", "distilgpt2")
+
+    def budget(chunk, new_tokens, model_name=None):
+        return converter._build_payload(chunk, model_name=model_name, new_tokens=new_tokens)["parameters"]["max_new_tokens"]
+
+    assert budget(PLAIN, 150) == 150
+    assert budget(PLAIN, 5) == MIN_NEW_TOKENS
+    # Capped by the model's profile
+    assert budget(PLAIN, 5000) == 256
+    assert budget(PLAIN, 5000, "gpt2") == DEFAULT_MAX_NEW_TOKENS
+    # A long prompt leaves less room in the 1024-token context, but never less than the minimum
+    long_payload = converter._build_payload(PLAIN * 12, new_tokens=5000)
+    room = 1024 - estimate_tokens(long_payload["inputs"])
+    assert MIN_NEW_TOKENS < room < 256
+    assert long_payload["parameters"]["max_new_tokens"] == room
+    assert budget(PLAIN * 20, 5000) == MIN_NEW_TOKENS
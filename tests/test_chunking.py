@@ -0,0 +1,37 @@
+from main import estimate_tokens, merge_partial_notes, split_into_chunks
+
+SENTENCE = "John: we need to review the project budget with the client before Friday. "
+
+
+def test_every_chunk_fits_the_budget():
+    # Short sentences make the separators between pieces a large share of each chunk
+    text = "\n\n".join(SENTENCE * count for count in (1, 3, 5, 12, 2, 40, 1, 7)) + "\n\n" + "Go now. " * 600
+    for budget in (20, 50, 250):
+        chunks = split_into_chunks(text, budget)
+        assert len(chunks) > 1
+        assert all(estimate_tokens(chunk) <= budget for chunk in chunks)
+        # Nothing is lost between chunks
+        assert " ".join(" ".join(chunks).split()) == " ".join(text.split())
+
+
+def test_merging_keeps_tables_and_a_chunks_own_repeats():
+    first = "## Budget\n\n| Item | Cost |\n| --- | --- |\n| Rent | 100 |\n\n- Follow up\n- Review the budget"
+    second = ("## Budget\n\n- Review the budget\n\n| Region | Cost |\n| --- | --- |\n| Rent | 100 |\n| Rent | 100 |\n\n"
+              "### North\n\n- Follow up\n\n### South\n\n- Follow up")
+    merged = merge_partial_notes([first, second])
+    # The second table keeps its separator and its duplicate rows
+    assert merged.count("| --- | --- |") == 2
+    assert merged.count("| Rent | 100 |") == 3
+    # A bullet repeated by the overlapping chunk is dropped, one under another heading is not
+    assert merged.count("- Review the budget") == 1
+    assert merged.count("- Follow up") == 3
+
+
+def test_oversized_csv_is_split_between_rows():
+    rows = ["id,name,region,amount"] + [f"{i},Customer {i},North,{i * 10}" for i in range(60)]
+    text = "\n".join(rows)
+    chunks = split_into_chunks(text, 100)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+    # Every chunk is made of whole rows, one per line
+    assert [line for chunk in chunks for line in chunk.splitlines()] == rows
@@ -0,0 +1,102 @@
+from main import CircuitBreaker, CircuitBreakerRegistry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def open_breaker(clock, **options):
+    breaker = CircuitBreaker("gpt2", failure_threshold=3, recovery_timeout=30.0, clock=clock, **options)
+    for _ in range(3):
+        assert breaker.allow_request()
+        breaker.record(False)
+    return breaker
+
+
+def test_consecutive_failures_open_the_circuit():
+    clock = FakeClock()
+    breaker = CircuitBreaker("gpt2", failure_threshold=3, recovery_timeout=30.0, clock=clock)
+    for success in (False, False, True, False, False):
+        assert breaker.allow_request()
+        breaker.record(success)
+    # A success in between resets the count
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    assert breaker.allow_request()
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.is_available()
+    assert not breaker.allow_request()
+    assert breaker.snapshot() == {"state": CircuitBreaker.OPEN, "consecutive_failures": 3,
+                                  "times_opened": 1, "rejected": 1}
+
+
+def test_abandoned_requests_do_not_count():
+    breaker = CircuitBreaker("gpt2", failure_threshold=1, clock=FakeClock())
+    assert breaker.allow_request()
+    breaker.record(None)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_trial_success_closes_the_circuit():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    clock.now += 29.9
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now += 0.1
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.is_available()
+    assert breaker.allow_request()
+    # Only one trial request at a time
+    assert not breaker.is_available()
+    assert not breaker.allow_request()
+
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.snapshot()["consecutive_failures"] == 0
+    assert breaker.allow_request()
+
+
+def test_half_open_trial_failure_reopens_the_circuit():
+    clock = FakeClock()
+    breaker = open_breaker(clock, half_open_max_calls=2)
+    clock.now += 30.0
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.snapshot()["times_opened"] == 2
+    # The recovery timeout starts again from the failed trial
+    clock.now += 29.0
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 1.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_abandoned_trial_frees_its_slot():
+    clock = FakeClock()
+    breaker = open_breaker(clock)
+    clock.now += 30.0
+    assert breaker.allow_request()
+    breaker.record(None)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_registry_keeps_one_breaker_per_model():
+    clock = FakeClock()
+    registry = CircuitBreakerRegistry(failure_threshold=1, recovery_timeout=5.0, clock=clock)
+    assert registry.get("gpt2") is registry.get("gpt2")
+
+    registry.get("gpt2").record(False)
+    assert registry.get("gpt2").state == CircuitBreaker.OPEN
+    assert registry.get("distilgpt2").state == CircuitBreaker.CLOSED
+    clock.now += 5.0
+    assert registry.snapshot()["gpt2"]["state"] == CircuitBreaker.HALF_OPEN
@@ -0,0 +1,58 @@
+from degeneration import (MAX_SYMBOL_RUN, MAX_WORD_CHARS, MIN_LOOP_WORDS, DegenerationDetector,
+                          find_degeneration)
+
+PROSE = ("The team met on Monday to review the marketing budget for the spring launch. Sarah walked through "
+         "the vendor quotes and flagged two that were well above last year. John asked whether the design "
+         "work could move in house, which would free up money for paid search. Everyone agreed to revisit "
+         "the numbers once the final mockups arrive, and Mike will draft a revised plan by Friday. ")
+
+
+def test_varied_text_is_not_degenerate():
+    assert find_degeneration(PROSE) is None
+    # Repeating a paragraph once is longer than any checked phrase and still varied
+    assert find_degeneration(PROSE * 2) is None
+
+
+def test_a_repeated_word_needs_min_loop_words():
+    intro = "Notes: "
+    assert find_degeneration(intro + "again " * (MIN_LOOP_WORDS - 1)) is None
+    assert find_degeneration(intro + "again " * MIN_LOOP_WORDS) == len(intro)
+
+
+def test_a_repeated_phrase_needs_three_copies():
+    intro = "Summary of the call. "
+    phrase = "we will follow up soon "
+    assert find_degeneration(intro + phrase * 2) is None
+    assert find_degeneration(intro + phrase * 3) == len(intro)
+
+
+def test_cycling_through_a_long_phrase_is_caught_by_diversity():
+    # Thirteen words is longer than any back-to-back period that is checked
+    phrase = "alpha beta gamma delta epsilon zeta eta theta iota kappa lambda mu nu "
+    intro = "Intro words here. "
+    loop_start = find_degeneration(intro + phrase * 4)
+    assert loop_start is not None and loop_start >= len(intro)
+
+
+def test_run_on_words_and_symbol_runs():
+    assert find_degeneration("Notes " + "k" * MAX_WORD_CHARS + " done") is None
+    assert find_degeneration("Notes " + "k" * (MAX_WORD_CHARS + 1)) == len("Notes ")
+    assert find_degeneration("Notes" + "\n" * MAX_SYMBOL_RUN + "done") is None
+    assert find_degeneration("Notes" + "\n" * (MAX_SYMBOL_RUN + 1) + "done") == len("Notes")
+    # A run at the end of the text is caught without a word after it
+    assert find_degeneration("Notes " + "= " * MAX_SYMBOL_RUN) == len("Notes")
+
+
+def test_streamed_pieces_find_the_same_loop():
+    text = PROSE + "and then " * 10
+    detector = DegenerationDetector()
+    fed = 0
+    for index in range(0, len(text), 3):
+        fed += 1
+        if detector.feed(text[index:index + 3]):
+            break
+    assert detector.degenerated
+    assert detector.loop_start == find_degeneration(text) == len(PROSE)
+    # Detection happens while streaming, before the rest of the text arrives
+    assert fed * 3 < len(text)
+    assert detector.feed("more text")
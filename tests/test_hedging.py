@@ -0,0 +1,98 @@
+import asyncio
+
+import httpx
+
+from main import AsyncNotionNotesConverter, HedgePolicy
+
+NOTES = [{"generated_text": "# Notes\n\n## Summary\n\n- Review the project budget\n"}]
+
+
+def is_valid(result):
+    return isinstance(result, list)
+
+
+def fake_transport(handler):
+    """Route the converter's requests to handler(model_name), an async function returning a response"""
+    async def route(request):
+        return await handler(request.url.path.rsplit("/", 1)[-1])
+    return httpx.AsyncClient(transport=httpx.MockTransport(route))
+
+
+def test_hedge_win_saves_latency():
+    policy = HedgePolicy(min_delay=0.02)
+    converter = AsyncNotionNotesConverter("token", "distilgpt2", fallback_models=["gpt2"], hedge_policy=policy)
+    delays = {"distilgpt2": [0.01] * 19 + [0.3, 0.3], "gpt2": [0.01]}
+
+    async def handler(model_name):
+        await asyncio.sleep(delays[model_name].pop(0))
+        return httpx.Response(200, json=NOTES)
+
+    async def run():
+        converter.client = fake_transport(handler)
+        try:
+            for _ in range(20):
+                await converter._hedged_query(lambda model_name: {}, None, "distilgpt2", is_valid)
+            # The primary is slow this time, so the hedge answers first
+            return await converter._hedged_query(lambda model_name: {}, None, "distilgpt2", is_valid)
+        finally:
+            await converter.client.aclose()
+
+    result, served_by = asyncio.run(run())
+    assert served_by == "gpt2"
+    stats = converter.hedge_stats()
+    assert stats["hedge_wins"] == 1
+    assert stats["p95_saved"] > 0.1
+    # The cancelled primary is kept as a lower bound of its latency
+    latencies = list(policy._latencies["distilgpt2"])
+    assert len(latencies) == 21
+    assert 0.02 <= latencies[-1] < 0.3
+
+
+def test_backoff_is_not_counted_as_latency():
+    policy = HedgePolicy()
+    converter = AsyncNotionNotesConverter("token", "gpt2", hedge_policy=policy)
+    converter.retry_policy.next_delay = lambda attempt, retry_hint: 0.2
+    responses = [httpx.Response(503, json={"error": "loading"}), httpx.Response(200, json=NOTES)]
+
+    async def handler(model_name):
+        return responses.pop(0)
+
+    async def run():
+        converter.client = fake_transport(handler)
+        try:
+            return await converter.query({}, None, "gpt2")
+        finally:
+            await converter.client.aclose()
+
+    assert asyncio.run(run()) == NOTES
+    assert max(policy._latencies["gpt2"]) < 0.1
+
+
+def test_queueing_for_a_connection_slot_is_not_latency():
+    # Requests take at most 80 ms at the server, but only two fit through at once
+    policy = HedgePolicy(min_samples=4, min_delay=0.02)
+    converter = AsyncNotionNotesConverter("token", "distilgpt2", fallback_models=["gpt2"], max_concurrency=2,
+                                          hedge_policy=policy)
+    models = []
+
+    async def handler(model_name):
+        models.append(model_name)
+        await asyncio.sleep(0.08 if len(models) <= 4 else 0.05)
+        return httpx.Response(200, json=NOTES)
+
+    async def run():
+        converter.client = fake_transport(handler)
+        try:
+            for _ in range(4):
+                await converter._hedged_query(lambda model_name: {}, None, "distilgpt2", is_valid)
+            return await asyncio.gather(*(
+                converter._hedged_query(lambda model_name: {}, None, "distilgpt2", is_valid) for _ in range(16)
+            ))
+        finally:
+            await converter.client.aclose()
+
+    results = asyncio.run(run())
+    assert [served_by for _, served_by in results] == ["distilgpt2"] * 16
+    assert models == ["distilgpt2"] * 20
+    assert converter.hedge_stats()["hedged"] == 0
+    assert max(policy._latencies["distilgpt2"]) < 0.15
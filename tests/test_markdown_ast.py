@@ -0,0 +1,46 @@
+from markdown_ast import parse_markdown, repair_emphasis
+
+
+def test_input_and_output_bullets_are_kept():
+    notes = "# Pipeline\n## Steps\n- Load data\n- Input: raw CSV files\n- Clean rows\n- Train model"
+    assert parse_markdown(notes).render() == (
+        "# Pipeline\n\n## Steps\n- Load data\n- Input: raw CSV files\n- Clean rows\n- Train model"
+    )
+
+
+def test_neural_network_note_keeps_its_list():
+    notes = ("# Neural networks\n\n- Input: a vector of features\n- Hidden layers transform it\n"
+             "- Output: class probabilities")
+    parser = parse_markdown(notes)
+    assert parser.render() == notes
+    assert parser.has_structure()
+
+
+def test_markers_in_code_blocks_are_kept():
+    notes = "# Usage\n\n```\nInput: data.csv\nOutput: model.bin\n```"
+    assert parse_markdown(notes).render() == notes
+
+
+def test_echoed_prompt_is_dropped():
+    completion = ("Convert the following messy text into notes:\n\nInput: we met today\n\n"
+                  "Output: # Notes\n- We met today\n\nInput: another example")
+    assert parse_markdown(completion).render() == "# Notes\n- We met today"
+
+
+def test_literal_asterisks_are_left_alone():
+    assert repair_emphasis("2 * 3 = 6") == "2 * 3 = 6"
+    assert repair_emphasis("Accepts *args/**kwargs") == "Accepts *args/**kwargs"
+    assert repair_emphasis("Call `f(*args` now") == "Call `f(*args` now"
+
+
+def test_open_emphasis_is_closed():
+    assert repair_emphasis("**Bold text") == "**Bold text**"
+    assert repair_emphasis("Some *italic") == "Some *italic*"
+    assert repair_emphasis("**Owner:** Sarah") == "**Owner:** Sarah"
+
+
+def test_ordered_lists_are_renumbered():
+    notes = "1. First\n1. Second\n   - Detail\n   1. Sub one\n   1. Sub two\n1. Third"
+    assert parse_markdown(notes).render() == (
+        "1. First\n2. Second\n  - Detail\n  1. Sub one\n  2. Sub two\n3. Third"
+    )
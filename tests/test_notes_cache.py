@@ -0,0 +1,38 @@
+import asyncio
+
+from main import AsyncNotionNotesConverter
+from notes_cache import NotesCache, make_cache_key
+
+TEXT = "John: we need to finalize the marketing budget by Friday. Sarah will send the design mockups."
+NOTES = "# Notes\n\n## Summary\n\n- Finalize the marketing budget by Friday\n- Sarah sends the design mockups\n"
+
+
+def test_key_depends_on_backend_and_engine():
+    keys = {
+        make_cache_key("gpt2", "prompt", {"max_new_tokens": 10}, backend, engine)
+        for backend in ("api", "local:gpt2") for engine in ("ai", "hybrid")
+    }
+    assert len(keys) == 4
+
+
+def test_cache_is_opt_in():
+    cache = NotesCache()
+    calls = []
+
+    async def query(payload, deadline=None, model_name=None):
+        calls.append(model_name)
+        return [{"generated_text": NOTES}]
+
+    async def convert_twice(converter):
+        converter.query = query
+        try:
+            for _ in range(2):
+                await converter.convert_to_notes(TEXT)
+        finally:
+            await converter.aclose()
+
+    asyncio.run(convert_twice(AsyncNotionNotesConverter("token", "gpt2", cache=cache)))
+    assert len(calls) == 2
+    calls.clear()
+    asyncio.run(convert_twice(AsyncNotionNotesConverter("token", "gpt2", cache=cache, deterministic=True)))
+    assert len(calls) == 1
@@ -0,0 +1,42 @@
+import asyncio
+
+from main import AsyncNotionNotesConverter
+from quality import ACCEPT_QUALITY_SCORE, score_notes
+
+SOURCE = ("John: we need to finalize the marketing budget by Friday. Sarah will send the design mockups "
+          "to the client. Mike: the client wants the launch moved to the fourth quarter.")
+ON_TOPIC = ("# Meeting Notes\n\n## Summary\n\n- Finalize the marketing budget by Friday\n"
+            "- Sarah sends the design mockups to the client\n- The client wants the launch moved to the fourth quarter\n")
+OFF_TOPIC = ("# Recipe Notes\n\n## Ingredients\n\n- Two cups of flour\n- One spoon of sugar\n"
+             "## Steps\n\n- Whisk the eggs gently\n- Bake for twenty minutes\n")
+
+
+def test_off_topic_notes_are_not_accepted():
+    assert score_notes(ON_TOPIC, SOURCE)["score"] >= ACCEPT_QUALITY_SCORE
+    off_topic = score_notes(OFF_TOPIC, SOURCE)
+    assert off_topic["recall"] == 0.0
+    assert off_topic["score"] < ACCEPT_QUALITY_SCORE
+
+
+def test_off_topic_notes_are_escalated():
+    converter = AsyncNotionNotesConverter("token", "gpt2", fallback_models=["EleutherAI/gpt-neo-125M"],
+                                          escalation_steps=1)
+    calls = []
+
+    async def query(payload, deadline=None, model_name=None):
+        calls.append(model_name)
+        return [{"generated_text": OFF_TOPIC if model_name == "gpt2" else ON_TOPIC}]
+
+    converter.query = query
+
+    async def convert():
+        try:
+            return await converter._convert_chunk(SOURCE)
+        finally:
+            await converter.aclose()
+
+    result = asyncio.run(convert())
+    assert calls == ["gpt2", "EleutherAI/gpt-neo-125M"]
+    assert result["model"] == "EleutherAI/gpt-neo-125M"
+    assert result["escalated"]
+    assert "flour" not in result["notes"]
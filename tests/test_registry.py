@@ -0,0 +1,61 @@
+import threading
+import time
+
+from main import SharedResourceRegistry
+
+
+def test_concurrent_acquires_build_once_without_blocking_other_keys():
+    registry = SharedResourceRegistry()
+    started = threading.Event()
+    builds = []
+
+    def slow_factory():
+        builds.append("slow")
+        started.set()
+        time.sleep(0.3)
+        return "slow model"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.acquire(("model", "a"), holder, slow_factory)))
+               for holder in ("one", "two")]
+    for thread in threads:
+        thread.start()
+    started.wait()
+    # Another key is served while the slow one is still being built
+    begun = time.monotonic()
+    assert registry.acquire(("model", "b"), "three", lambda: "fast model") == "fast model"
+    assert time.monotonic() - begun < 0.2
+    for thread in threads:
+        thread.join()
+    assert results == ["slow model", "slow model"]
+    assert builds == ["slow"]
+    assert registry.stats()["created"] == 2
+
+
+def test_evicted_resources_close_outside_the_lock():
+    registry = SharedResourceRegistry(idle_timeout=0, lease_timeout=0)
+    closed = []
+
+    class Resource:
+        def close(self):
+            # Would deadlock if the registry lock were still held
+            closed.append(registry.stats()["resources"])
+
+    registry.acquire(("model", "a"), "one", Resource)
+    registry.release(("model", "a"), "one")
+    time.sleep(0.01)
+    assert registry.evict_idle() == 1
+    assert closed == [0]
+
+
+def test_failed_build_is_not_kept():
+    registry = SharedResourceRegistry()
+
+    def broken_factory():
+        raise RuntimeError("no weights")
+
+    try:
+        registry.acquire(("model", "a"), "one", broken_factory)
+    except RuntimeError:
+        pass
+    assert registry.acquire(("model", "a"), "one", lambda: "model") == "model"
@@ -0,0 +1,85 @@
+import asyncio
+import random
+
+import httpx
+
+from main import AsyncNotionNotesConverter, RetryPolicy
+
+NOTES = [{"generated_text": "# Notes\n\n## Summary\n\n- Review the project budget\n"}]
+
+
+def run_query(policy, responses, deadline_in=None):
+    """Serve responses in order to one query(); returns (result, request times relative to the start)"""
+    converter = AsyncNotionNotesConverter("token", "gpt2", retry_policy=policy)
+    sent = []
+
+    async def route(request):
+        sent.append(asyncio.get_running_loop().time())
+        return responses.pop(0)
+
+    async def run():
+        converter.client = httpx.AsyncClient(transport=httpx.MockTransport(route))
+        started = asyncio.get_running_loop().time()
+        deadline = started + deadline_in if deadline_in is not None else None
+        try:
+            result = await converter.query({"inputs": "Notes", "parameters": {}}, deadline)
+        finally:
+            await converter.client.aclose()
+        return result, [at - started for at in sent]
+
+    return asyncio.run(run())
+
+
+def test_backoff_is_jittered_below_an_exponential_cap():
+    policy = RetryPolicy(max_retries=6, base_delay=1.0, max_delay=10.0)
+    random.seed(7)
+    for attempt, cap in enumerate([1.0, 2.0, 4.0, 8.0, 10.0, 10.0]):
+        delays = [policy.next_delay(attempt) for _ in range(200)]
+        assert all(0 <= delay <= cap for delay in delays)
+        # Full jitter spreads retries over the whole window
+        assert min(delays) < cap * 0.1 and max(delays) > cap * 0.9
+    assert policy.next_delay(6) is None
+
+
+def test_server_hints_set_a_floor_on_the_delay():
+    policy = RetryPolicy(max_retries=3, base_delay=1.0, max_delay=10.0)
+    assert all(policy.next_delay(0, retry_hint=5.0) == 5.0 for _ in range(50))
+    assert all(3.0 <= policy.next_delay(2, retry_hint=3.0) <= 4.0 for _ in range(50))
+    assert policy.next_delay(3, retry_hint=0.1) is None
+
+
+def test_retry_after_is_honored():
+    policy = RetryPolicy(max_retries=3, base_delay=0.001, max_delay=0.001)
+    responses = [httpx.Response(429, headers={"Retry-After": "0.2"}, json={"error": "Rate limited"}),
+                 httpx.Response(503, json={"error": "Loading", "estimated_time": 0.1}),
+                 httpx.Response(200, json=NOTES)]
+    result, sent = run_query(policy, responses)
+    assert result == NOTES
+    assert len(sent) == 3
+    assert sent[1] - sent[0] >= 0.2
+    assert sent[2] - sent[1] >= 0.1
+    metrics = policy.metrics.snapshot()
+    assert metrics["retries_by_status"] == {429: 1, 503: 1}
+    assert metrics["recovered"] == 1 and metrics["exhausted"] == 0
+
+
+def test_no_retry_is_scheduled_past_the_deadline():
+    policy = RetryPolicy(max_retries=3, base_delay=0.001, max_delay=0.001)
+    responses = [httpx.Response(503, json={"error": "Loading"}),
+                 httpx.Response(429, headers={"Retry-After": "5"}, json={"error": "Rate limited"}),
+                 httpx.Response(200, json=NOTES)]
+    result, sent = run_query(policy, responses, deadline_in=1.0)
+    # The first retry fits; waiting five seconds for the second would overrun the deadline
+    assert "error" in result
+    assert len(sent) == 2 and sent[-1] < 1.0
+    metrics = policy.metrics.snapshot()
+    assert metrics["retries"] == 1 and metrics["exhausted"] == 1
+
+
+def test_retries_stop_after_max_retries():
+    policy = RetryPolicy(max_retries=2, base_delay=0.001, max_delay=0.001)
+    responses = [httpx.Response(503, json={"error": "Loading"}) for _ in range(5)]
+    result, sent = run_query(policy, responses)
+    assert "error" in result
+    assert len(sent) == 3
+    assert policy.metrics.snapshot()["exhausted"] == 1
@@ -0,0 +1,62 @@
+import asyncio
+
+from main import AsyncNotionNotesConverter, StreamingError, split_into_chunks
+
+SENTENCE = "John: we need to review the project budget with the client before the launch on Friday. "
+
+
+def run_stream(converter, text):
+    async def collect():
+        try:
+            return [part async for part in converter.stream_notes(text)]
+        finally:
+            await converter.aclose()
+    return asyncio.run(collect())
+
+
+def test_later_chunks_convert_while_the_first_streams():
+    converter = AsyncNotionNotesConverter("token", "gpt2", chunk_token_budget=60)
+    text = SENTENCE * 12
+    chunk_count = len(split_into_chunks(text, converter.chunk_token_budget))
+    assert chunk_count > 2
+    events = []
+
+    async def stream_query(payload, deadline=None, model_name=None):
+        for token in ["# Notes\n\n", "## Summary\n\n", "- Review the project budget with the client\n"]:
+            await asyncio.sleep(0.01)
+            events.append("token")
+            yield token
+
+    async def query(payload, deadline=None, model_name=None):
+        events.append("query")
+        return [{"generated_text": "# Notes\n\n## Summary\n\n- Launch on Friday after the budget review\n"}]
+
+    converter.stream_query = stream_query
+    converter.query = query
+    parts = run_stream(converter, text)
+
+    # Every later chunk was sent before the first chunk finished streaming
+    assert events[:chunk_count - 1] == ["query"] * (chunk_count - 1)
+    assert events.count("query") == chunk_count - 1
+    assert any("Review the project budget" in part and "Launch" not in part for part in parts)
+    assert "Launch on Friday" in parts[-1]
+    stats = converter.escalation_stats()
+    assert stats["chunks"] == chunk_count
+
+
+def test_stream_fallback_counts_the_chunk_once():
+    converter = AsyncNotionNotesConverter("token", "gpt2")
+
+    async def stream_query(payload, deadline=None, model_name=None):
+        raise StreamingError("streaming is not supported")
+        yield
+
+    async def query(payload, deadline=None, model_name=None):
+        return [{"generated_text": "# Notes\n\n## Summary\n\n- Review the project budget with the client\n"}]
+
+    converter.stream_query = stream_query
+    converter.query = query
+    parts = run_stream(converter, SENTENCE)
+
+    assert "Review the project budget" in parts[-1]
+    assert converter.escalation_stats()["chunks"] == 1
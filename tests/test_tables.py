@@ -0,0 +1,43 @@
+import asyncio
+
+from main import AsyncNotionNotesConverter
+from tables import detect_tables, is_tabular
+
+DIALOGUE = ("John: yes, I agree, we should ship it.\nSarah: ok, fine, but test first.\n"
+            "Mike: sure, right, let us do that.\nJohn: great, thanks, everyone.\n")
+PROSE = ("First, we reviewed the budget, then the plan.\nSecond, we met the client, then the vendor.\n"
+         "Third, we wrote the report, then the memo.\nFinally, we shipped it, then celebrated.\n")
+CSV = "Name, Role, Team\nAlice, Engineer, Core\nBob, Designer, Web\nCara, Manager, Ops\n"
+
+
+def test_comma_separated_rows_are_a_table():
+    tables = detect_tables(CSV)
+    assert [table.header for table in tables] == [["Name", "Role", "Team"]]
+    assert len(tables[0].rows) == 3
+
+
+def test_dialogue_and_prose_with_commas_are_not_tables():
+    assert detect_tables(DIALOGUE) == []
+    assert detect_tables(PROSE) == []
+    assert not is_tabular(DIALOGUE)
+
+
+def test_tabular_input_skips_the_model():
+    converter = AsyncNotionNotesConverter("token", "gpt2")
+    calls = []
+
+    async def query(payload, deadline=None, model_name=None):
+        calls.append(model_name)
+        return [{"generated_text": "# Notes\n\n## Summary\n\n- The team roster lists three people\n"}]
+
+    async def run():
+        converter.query = query
+        try:
+            return await converter.convert_to_notes(CSV)
+        finally:
+            await converter.aclose()
+
+    notes = asyncio.run(run())
+    assert calls == []
+    # The table itself comes through intact
+    assert "| Alice | Engineer | Core |" in notes
@@ -0,0 +1,27 @@
+from text_analysis import analyze_text
+
+
+def sentences(text):
+    analysis = analyze_text(text)
+    return [analysis.span_text(span) for span in analysis.sentences]
+
+
+def test_year_or_amount_ends_a_sentence():
+    assert sentences("Revenue grew in 2024. Costs fell sharply.") == ["Revenue grew in 2024.", "Costs fell sharply."]
+    assert sentences("We paid 300. Then we left.") == ["We paid 300.", "Then we left."]
+
+
+def test_list_enumerators_do_not_end_a_sentence():
+    assert sentences("1. Buy milk\n2. Send the report") == ["1. Buy milk", "2. Send the report"]
+    assert sentences("Sarah: 2. Review the budget") == ["Sarah: 2. Review the budget"]
+
+
+def test_run_on_lecture_is_split_into_statements():
+    lecture = ("today we covered machine learning basics supervised learning uses labeled data "
+               "unsupervised learning finds patterns reinforcement learning learns through rewards")
+    assert sentences(lecture) == [
+        "today we covered machine learning basics",
+        "supervised learning uses labeled data",
+        "unsupervised learning finds patterns",
+        "reinforcement learning learns through rewards",
+    ]
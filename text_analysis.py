@@ -0,0 +1,351 @@
+import re
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Summarizer defaults
+DEFAULT_SUMMARY_SENTENCES = 5   # Sentences kept in an extractive summary
+MIN_SENTENCE_TERMS = 3          # Shorter sentences are too thin to summarize anything
+MAX_SENTENCE_WORDS = 40         # Unpunctuated runs are cut into windows of this many words
+MIN_SEGMENT_WORDS = 3           # Run-on sentences are only split once they have this many words
+
+# Words for term statistics; matched case-insensitively and lowercased afterwards
+WORD_RE = re.compile(r"[a-z0-9][a-z0-9'_-]*", re.IGNORECASE)
+# Whitespace-delimited tokens, line breaks, and runs of blank lines between paragraphs
+TOKEN_RE = re.compile(r"(?P<paragraph>\n(?:[^\S\n]*\n)+)|(?P<newline>\n)|(?P<word>\S+)")
+TOKEN_PUNCTUATION = ".,;:!?\"'()[]{}"
+SENTENCE_END_CHARS = ".!?"
+CLOSING_CHARS = "\"')]}"
+BOUNDARY_CHARS = frozenset(SENTENCE_END_CHARS + CLOSING_CHARS)
+
+# Sentence segmentation
+SPEAKER_LABEL_RE = re.compile(r"[A-Z][\w.'-]*:$")            # "Sarah:" at the start of a turn
+INITIALS_RE = re.compile(r"(?:[A-Za-z]\.)+$")                # "J.", "e.g.", "U.S."
+ABBREVIATIONS = frozenset((
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "approx", "dept", "est", "fig",
+    "inc", "ltd", "co", "corp", "no", "vol", "min", "max", "avg", "e.g", "i.e", "cf", "al", "jan", "feb",
+    "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec", "mon", "tue", "wed", "thu", "fri"
+))
+DISCOURSE_MARKERS = frozenset((
+    "also", "then", "next", "so", "anyway", "additionally", "finally", "firstly", "secondly", "lastly",
+    "meanwhile", "however", "afterwards", "moreover", "furthermore", "plus", "besides",
+    "need", "needs", "todo"
+))
+CONJUNCTIONS = frozenset(("and", "but", "or"))
+# A non-stopword followed by one of these starts a new clause: "... budget concerns mike will handle"
+SUBJECT_VERBS = frozenset((
+    "said", "says", "mentioned", "asked", "suggested", "noted", "explained", "added", "proposed",
+    "agreed", "reported", "thinks", "thought", "wants", "will", "should", "must"
+))
+# Two non-stopwords followed by one of these start a new statement: "... labeled data unsupervised learning finds"
+PRESENT_VERBS = frozenset((
+    "uses", "finds", "learns", "mimic", "mimics", "covers", "includes", "means", "requires", "helps",
+    "shows", "gives", "makes", "takes", "works", "involves", "describes", "provides", "allows", "creates",
+    "improves", "reduces", "increases", "depends", "contains", "produces", "measures", "predicts"
+))
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further had
+has have having he her here hers herself him himself his how i if in into is it its itself just
+let me more most my myself no nor not now of off on once only or other our ours ourselves out over
+own same she should so some such than that the their theirs them themselves then there these they
+this those through to too under until up us very was we were what when where which while who whom
+why will with would you your yours yourself yourselves ok okay yeah um uh like really get got going
+""".split())
+
+
+class PhraseAutomaton:
+    """Aho-Corasick automaton over words
+
+    Finds every occurrence of every phrase in one left-to-right pass, so the
+    cost depends on the input length and the number of matches, not on how
+    many phrases are registered. Phrases are matched on lowercased words with
+    surrounding punctuation stripped; each phrase carries a label.
+    """
+
+    def __init__(self, phrases: Dict[str, str]):
+        self.labels: Dict[str, str] = {}
+        self.max_length = 0
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[Tuple[str, int], ...]] = [()]  # (phrase, length in words)
+
+        for phrase, label in phrases.items():
+            words = normalize_word(phrase).split()
+            if not words:
+                continue
+            key = " ".join(words)
+            self.labels[key] = label
+            self.max_length = max(self.max_length, len(words))
+
+            state = 0
+            for word in words:
+                next_state = self._goto[state].get(word)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][word] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] = ((key, len(words)),)
+
+        # Breadth-first pass links each state to its longest proper suffix state
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for word, next_state in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(word, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+                pending.append(next_state)
+
+    def step(self, state: int, word: str) -> int:
+        """Advance from state on a normalized word"""
+        while state and word not in self._goto[state]:
+            state = self._fail[state]
+        return self._goto[state].get(word, 0)
+
+    def matches(self, state: int) -> Tuple[Tuple[str, int], ...]:
+        """Return the (phrase, length in words) pairs that end in state"""
+        return self._output[state]
+
+
+class TextAnalysis:
+    """Structure of a text gathered in one pass
+
+    Lines, sentences and paragraphs are (start, end) offsets into text, so
+    memory grows with the number of spans rather than with copies of the input.
+    Keyword matches are (start, end, phrase) triples.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lines: List[Tuple[int, int]] = []
+        self.sentences: List[Tuple[int, int]] = []
+        self.paragraphs: List[Tuple[int, int]] = []
+        self.word_count = 0
+        self.keyword_hits: Dict[str, int] = {}
+        self.keyword_matches: List[Tuple[int, int, str]] = []
+
+    def span_text(self, span: Tuple[int, int]) -> str:
+        """Return the text covered by a span"""
+        return self.text[span[0]:span[1]]
+
+    def sentence_texts(self) -> List[str]:
+        """Return every sentence as a string"""
+        return [self.text[start:end] for start, end in self.sentences]
+
+
+def normalize_word(word: str) -> str:
+    """Lowercase a token and strip surrounding punctuation for keyword matching"""
+    return word.lower().strip(TOKEN_PUNCTUATION)
+
+
+def ends_sentence(token: str, starts_clause: bool = False) -> bool:
+    """Return whether a token closes its sentence, ignoring abbreviations, initials and list markers
+
+    A number followed by a period is a list marker such as "1." only when it
+    starts its line or clause; "grew in 2024." ends the sentence.
+    """
+    core = token.rstrip(CLOSING_CHARS)
+    if not core or core[-1] not in SENTENCE_END_CHARS:
+        return False
+    if core[-1] != "." or core.endswith("..."):
+        return True
+    stem = core.rstrip(".").lower()
+    if stem in ABBREVIATIONS or INITIALS_RE.match(core) or (starts_clause and stem.isdigit()):
+        return False
+    return True
+
+
+def analyze_text(text: str, automaton: Optional[PhraseAutomaton] = None) -> TextAnalysis:
+    """Collect line, sentence and paragraph spans, the word count and keyword matches in one pass
+
+    Sentences end at terminal punctuation (but not after abbreviations,
+    initials or numbered-list markers) and at line breaks. Speaker labels
+    such as "Sarah:" start a new sentence. In run-on text, which is what
+    speech-to-text produces and which starts sentences in lowercase, a new
+    sentence also starts at discourse markers ("also", "then", "next") and at
+    a new subject followed by a reporting verb or modal ("mike will ...").
+    """
+    analysis = TextAnalysis(text)
+    state = 0
+    # Start offsets of the last few words, for locating multi-word matches
+    recent_starts = deque(maxlen=automaton.max_length if automaton is not None else 1)
+
+    line_start = paragraph_start = None
+    sentence = []       # (start, end, normalized word) for each word of the current sentence
+    run_on = False
+    last_end = 0
+
+    def close_sentence(split_at: int):
+        analysis.sentences.append((sentence[0][0], sentence[split_at - 1][1]))
+        del sentence[:split_at]
+
+    for match in TOKEN_RE.finditer(text):
+        if match.lastgroup == "word":
+            start, last_end = match.span()
+            if line_start is None:
+                line_start = start
+            if paragraph_start is None:
+                paragraph_start = start
+            analysis.word_count += 1
+
+            token = match.group()
+            word = token.lower().strip(TOKEN_PUNCTUATION)  # normalize_word, inlined for the hot loop
+
+            # Decide whether a new sentence starts at (or just before) this word
+            if sentence:
+                if token[-1] == ":" and SPEAKER_LABEL_RE.match(token):
+                    close_sentence(len(sentence))
+                elif run_on and len(sentence) >= MIN_SEGMENT_WORDS:
+                    previous = sentence[-1][2]
+                    if word in DISCOURSE_MARKERS:
+                        if previous in CONJUNCTIONS and len(sentence) > MIN_SEGMENT_WORDS:
+                            close_sentence(len(sentence) - 1)
+                        elif previous not in STOPWORDS:
+                            close_sentence(len(sentence))
+                    elif (word in SUBJECT_VERBS and len(sentence) > MIN_SEGMENT_WORDS
+                          and previous not in STOPWORDS and sentence[-2][2] not in STOPWORDS):
+                        close_sentence(len(sentence) - 1)
+                    elif (word in PRESENT_VERBS and len(sentence) >= MIN_SEGMENT_WORDS + 2
+                          and previous not in STOPWORDS and sentence[-2][2] not in STOPWORDS):
+                        close_sentence(len(sentence) - 2)
+
+            if not sentence or (len(sentence) == 1 and SPEAKER_LABEL_RE.match(text, sentence[0][0], sentence[0][1])):
+                run_on = token[:1].islower()
+            sentence.append((start, last_end, word))
+
+            if automaton is not None:
+                recent_starts.append(start)
+                state = automaton.step(state, word)
+                for phrase, length in automaton.matches(state):
+                    analysis.keyword_hits[phrase] = analysis.keyword_hits.get(phrase, 0) + 1
+                    analysis.keyword_matches.append((recent_starts[-length], last_end, phrase))
+
+            # Unpunctuated runs with no other boundary are cut into windows
+            starts_clause = len(sentence) == 1 or (
+                len(sentence) == 2 and SPEAKER_LABEL_RE.match(text, sentence[0][0], sentence[0][1]) is not None
+            )
+            if ((token[-1] in BOUNDARY_CHARS and ends_sentence(token, starts_clause))
+                    or len(sentence) >= MAX_SENTENCE_WORDS):
+                close_sentence(len(sentence))
+                state = 0
+            continue
+
+        # A line break ends the current sentence and line; a blank line also ends the paragraph
+        state = 0
+        if sentence:
+            close_sentence(len(sentence))
+        if line_start is not None:
+            analysis.lines.append((line_start, last_end))
+            line_start = None
+        if match.lastgroup == "paragraph" and paragraph_start is not None:
+            analysis.paragraphs.append((paragraph_start, last_end))
+            paragraph_start = None
+
+    if sentence:
+        close_sentence(len(sentence))
+    if line_start is not None:
+        analysis.lines.append((line_start, last_end))
+    if paragraph_start is not None:
+        analysis.paragraphs.append((paragraph_start, last_end))
+    return analysis
+
+
+def segment_sentences(text: str) -> List[Tuple[int, int]]:
+    """Return the (start, end) span of every sentence in text"""
+    return analyze_text(text).sentences
+
+
+class TermMatrix:
+    """Span-by-term counts of non-stopword words, kept in coordinate form
+
+    rows, cols and counts hold one entry per distinct (span, term) pair, so
+    memory is linear in the number of words rather than in spans x vocabulary.
+    terms maps a column back to its word; lengths counts the terms in each span.
+    """
+
+    def __init__(self, rows: np.ndarray, cols: np.ndarray, counts: np.ndarray,
+                 terms: List[str], lengths: np.ndarray):
+        self.rows = rows
+        self.cols = cols
+        self.counts = counts
+        self.terms = terms
+        self.lengths = lengths
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.lengths), len(self.terms)
+
+    def idf(self) -> np.ndarray:
+        """Return smoothed inverse document frequencies, treating each span as a document"""
+        n_spans, n_terms = self.shape
+        df = np.bincount(self.cols, minlength=n_terms)
+        return np.log((1 + n_spans) / (1 + df)) + 1.0
+
+
+def build_term_matrix(text: str, spans: List[Tuple[int, int]]) -> TermMatrix:
+    """Count the non-stopword words of every span, lowercasing one span at a time"""
+    vocabulary = {}
+    term_ids = []
+    lengths = np.zeros(len(spans), dtype=np.int64)
+    for index, (start, end) in enumerate(spans):
+        ids = [vocabulary.setdefault(word, len(vocabulary))
+               for word in WORD_RE.findall(text[start:end].lower()) if word not in STOPWORDS]
+        term_ids.extend(ids)
+        lengths[index] = len(ids)
+
+    n_terms = max(len(vocabulary), 1)
+    rows = np.repeat(np.arange(len(spans)), lengths)
+    cols = np.asarray(term_ids, dtype=np.int64)
+
+    # Collapse repeated (span, term) pairs into counts
+    pairs, counts = np.unique(rows * n_terms + cols, return_counts=True)
+    return TermMatrix(pairs // n_terms, pairs % n_terms, counts, list(vocabulary), lengths)
+
+
+def sentence_scores(text: str, sentences: List[Tuple[int, int]],
+                    matrix: Optional[TermMatrix] = None) -> np.ndarray:
+    """Score sentence spans by TF-IDF cosine similarity to the document centroid"""
+    if matrix is None:
+        matrix = build_term_matrix(text, sentences)
+    n_sentences, n_terms = matrix.shape
+    scores = np.zeros(n_sentences)
+    if not len(matrix.cols):
+        return scores
+
+    rows, cols = matrix.rows, matrix.cols
+    weights = (1.0 + np.log(matrix.counts)) * matrix.idf()[cols]
+
+    # L2-normalize each sentence vector, then compare it with the normalized centroid
+    norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n_sentences))
+    weights = weights / norms[rows]
+    centroid = np.bincount(cols, weights=weights, minlength=n_terms)
+    centroid /= np.linalg.norm(centroid)
+    scores = np.bincount(rows, weights=weights * centroid[cols], minlength=n_sentences)
+
+    scores[matrix.lengths < MIN_SENTENCE_TERMS] = 0.0
+    return scores
+
+
+def select_sentences(scores: np.ndarray, count: int, skip: int = 0) -> List[int]:
+    """Return indices of the sentences ranked skip..skip+count by score, in original order"""
+    if count <= 0 or skip >= len(scores):
+        return []
+    ranked = np.argsort(-scores, kind="stable")[skip:skip + count]
+    return [int(index) for index in np.sort(ranked) if scores[index] > 0]
+
+
+def summarize(text: str, max_sentences: int = DEFAULT_SUMMARY_SENTENCES) -> List[str]:
+    """Return the most central sentences of text, in their original order"""
+    analysis = analyze_text(text)
+    if len(analysis.sentences) <= max_sentences:
+        return analysis.sentence_texts()
+    scores = sentence_scores(text, analysis.sentences)
+    return [analysis.span_text(analysis.sentences[index]) for index in select_sentences(scores, max_sentences)]
@@ -0,0 +1,149 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from text_analysis import TextAnalysis, TermMatrix, analyze_text, build_term_matrix
+
+# Topic segmentation defaults
+DEFAULT_BLOCK_SENTENCES = 3     # Sentences compared on each side of a candidate boundary
+MIN_SECTION_SENTENCES = 4       # Sections shorter than this are merged into their neighbours
+MAX_TILING_TERMS = 1024         # Most frequent terms kept in the dense block vectors
+SMOOTHING_WIDTH = 3             # Gaps averaged when smoothing the similarity curve
+MAX_SECTIONS = 12               # Upper bound on sections, however long the input
+SECTION_POINTS = 4              # Sentences listed under each section heading
+HEADING_KEYWORDS = 3            # Keywords joined into each section heading
+
+
+def gap_similarities(matrix: TermMatrix, block: int = DEFAULT_BLOCK_SENTENCES) -> np.ndarray:
+    """Return the lexical similarity across each gap between consecutive sentences
+
+    Entry g compares the block of sentences just before sentence g + 1 with
+    the block starting at it. Block vectors come from a cumulative sum over
+    the sentence rows, so every gap is scored in one vectorized pass.
+    """
+    n_sentences, n_terms = matrix.shape
+    if n_sentences < 2:
+        return np.zeros(0)
+
+    rows, cols, counts = matrix.rows, matrix.cols, matrix.counts
+    n_kept = n_terms
+    if n_terms > MAX_TILING_TERMS:
+        # Keep the most widespread terms; rare ones say little about cohesion
+        df = np.bincount(cols, minlength=n_terms)
+        kept = np.argsort(-df, kind="stable")[:MAX_TILING_TERMS]
+        column = np.full(n_terms, -1, dtype=np.int64)
+        column[kept] = np.arange(len(kept))
+        mask = column[cols] >= 0
+        rows, cols, counts = rows[mask], column[cols[mask]], counts[mask]
+        n_kept = len(kept)
+
+    # (span, term) pairs are unique, so a weighted bincount fills the dense rows without np.add.at
+    dense = np.bincount((rows + 1) * n_kept + cols, weights=counts, minlength=(n_sentences + 1) * n_kept)
+    cumulative = np.cumsum(dense.reshape(n_sentences + 1, n_kept), axis=0)
+
+    gaps = np.arange(1, n_sentences)
+    left = cumulative[gaps] - cumulative[np.maximum(gaps - block, 0)]
+    right = cumulative[np.minimum(gaps + block, n_sentences)] - cumulative[gaps]
+    norms = np.linalg.norm(left, axis=1) * np.linalg.norm(right, axis=1)
+    dots = np.einsum("ij,ij->i", left, right)
+    similarities = np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+
+    # Light smoothing, as in TextTiling, so one short sentence does not look like a topic shift
+    if len(similarities) >= SMOOTHING_WIDTH:
+        kernel = np.ones(SMOOTHING_WIDTH) / SMOOTHING_WIDTH
+        edge = SMOOTHING_WIDTH // 2
+        padded = np.concatenate((np.repeat(similarities[:1], edge), similarities, np.repeat(similarities[-1:], edge)))
+        similarities = np.convolve(padded, kernel, mode="valid")
+    return similarities
+
+
+def depth_scores(similarities: np.ndarray, window: int = 2 * DEFAULT_BLOCK_SENTENCES) -> np.ndarray:
+    """Return how far each gap dips below the highest similarity on either side"""
+    if not len(similarities):
+        return similarities
+    count = len(similarities)
+    padded = np.full(count + 2 * window, -np.inf)
+    padded[window:window + count] = similarities
+    # Shifted maxima: a few ufunc calls cost less than a sliding window view on short notes
+    left_peak = similarities.copy()
+    right_peak = similarities.copy()
+    for shift in range(1, window + 1):
+        np.maximum(left_peak, padded[window - shift:window - shift + count], out=left_peak)
+        np.maximum(right_peak, padded[window + shift:window + shift + count], out=right_peak)
+    return (left_peak - similarities) + (right_peak - similarities)
+
+
+def find_boundaries(depths: np.ndarray, min_section: int = MIN_SECTION_SENTENCES) -> List[int]:
+    """Pick the deepest gaps as boundaries; returns the indices of sentences that start a section"""
+    n_sentences = len(depths) + 1
+    if n_sentences < 2 * min_section:
+        return []
+
+    # A conservative take on TextTiling's cutoff: deeper than the mean by half a standard deviation
+    cutoff = depths.mean() + depths.std() / 2
+    boundaries = []
+    # Plain floats: comparing numpy scalars one by one costs more than the sort
+    values = depths.tolist()
+    for gap in np.argsort(-depths, kind="stable").tolist():
+        if values[gap] <= cutoff or values[gap] <= 0:
+            break
+        start = gap + 1
+        if start < min_section or n_sentences - start < min_section:
+            continue
+        if all(abs(start - other) >= min_section for other in boundaries):
+            boundaries.append(start)
+    return sorted(boundaries)
+
+
+def segment_topics(text: str, analysis: Optional[TextAnalysis] = None,
+                   matrix: Optional[TermMatrix] = None,
+                   block: int = DEFAULT_BLOCK_SENTENCES,
+                   min_section: int = MIN_SECTION_SENTENCES,
+                   max_sections: int = MAX_SECTIONS) -> List[Tuple[int, int]]:
+    """Split text into topical sections; returns (first sentence, end sentence) index pairs"""
+    if analysis is None:
+        analysis = analyze_text(text)
+    n_sentences = len(analysis.sentences)
+    if not n_sentences:
+        return []
+    if n_sentences < 2 * min_section:
+        # Too short for two sections; skip the similarity work, which dominates on short notes
+        return [(0, n_sentences)]
+
+    if matrix is None:
+        matrix = build_term_matrix(text, analysis.sentences)
+    # Long inputs get longer sections rather than an unreadable number of headings
+    min_section = max(min_section, -(-n_sentences // max_sections))
+    depths = depth_scores(gap_similarities(matrix, block), 2 * block)
+    edges = [0] + find_boundaries(depths, min_section) + [n_sentences]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def section_keywords(text: str, analysis: TextAnalysis, sections: List[Tuple[int, int]],
+                     count: int = HEADING_KEYWORDS, matrix: Optional[TermMatrix] = None) -> List[List[str]]:
+    """Return the terms that best distinguish each section from the others"""
+    if matrix is None:
+        matrix = build_term_matrix(text, analysis.sentences)
+    n_sentences, n_terms = matrix.shape
+    if not len(matrix.cols):
+        return [[] for _ in sections]
+
+    # Treat each section as a document: TF-IDF over sections favours distinctive terms
+    section_of = np.zeros(n_sentences, dtype=np.int64)
+    for index, (first, end) in enumerate(sections):
+        section_of[first:end] = index
+    counts = np.zeros((len(sections), n_terms))
+    np.add.at(counts, (section_of[matrix.rows], matrix.cols), matrix.counts)
+    df = (counts > 0).sum(axis=0)
+    weights = counts * (np.log((1 + len(sections)) / (1 + df)) + 1.0)
+
+    keywords = []
+    for row in weights:
+        top = np.argsort(-row, kind="stable")[:count]
+        keywords.append([matrix.terms[column] for column in top if row[column] > 0])
+    return keywords
+
+
+def format_heading(keywords: List[str]) -> str:
+    """Turn section keywords into a heading title"""
+    return " · ".join(word.capitalize() for word in keywords)